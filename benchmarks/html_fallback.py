@@ -0,0 +1,105 @@
+"""Extracting offers from a youyuan search page: old regexes vs find_offer_data
+
+The streaming line feeds the encoded page to OfferDataScanner in 64 KiB
+chunks, as the sessions do, and shows how much of it had to be read and
+the peak memory compared with decoding the whole page first.
+
+Pass saved pages (s.1688.com/youyuan/index.htm responses) as arguments, or
+run without arguments to use synthetic pages of a similar size, once with
+strict JSON and once with trailing commas that need repairing.
+
+    python benchmarks/html_fallback.py [page.html ...]
+"""
+import json
+import random
+import re
+import sys
+import time
+import tracemalloc
+
+from offer_memory import make_item
+
+from search1688api.htmlscan import OfferDataScanner
+from search1688api.utils import extract_products_from_html
+
+
+def legacy_extract(html_content: str) -> list:
+    """The previous implementation: up to three DOTALL non-greedy regexes, then two re.sub passes"""
+    patterns = [
+        r'window\.data\.offerresultData\s*=\s*successDataCheck\(\s*({.*?})\s*\)',
+        r'window\.data\.offerresultData\s*=\s*({.*?});',
+        r'offerresultData\s*=\s*successDataCheck\(\s*({.*?})\s*\)'
+    ]
+    for pattern in patterns:
+        match = re.search(pattern, html_content, re.DOTALL)
+        if match:
+            try:
+                json_str = match.group(1)
+                json_str = re.sub(r',\s*]', ']', json_str)
+                json_str = re.sub(r',\s*}', '}', json_str)
+                return json.loads(json_str)["data"]["offerList"]
+            except (json.JSONDecodeError, KeyError):
+                continue
+    return []
+
+
+def synthetic_page(offers: int = 60, trailing_commas: bool = False) -> str:
+    random.seed(1688)
+    blob = json.dumps({"data": {"offerList": [make_item(i)["data"] for i in range(offers)], "total": offers}},
+                      ensure_ascii=False)
+    if trailing_commas:
+        blob = blob.replace("}]", "},]").replace('"}', '",}')
+    # Markup and scripts around the blob, including `})` sequences that stop non-greedy matches early
+    noise = "".join(
+        f'<div class="item-{n}"><script>window.cfg{n} = {{"k": "v{n}"}}; init({{"id": {n}}})</script></div>\n'
+        for n in range(3000)
+    )
+    return f"<html><head>{noise}</head><body><script>\nwindow.data.offerresultData = successDataCheck({blob});\n" \
+           f"</script>{noise}</body></html>"
+
+
+def seconds(function, page: str, rounds: int) -> float:
+    started = time.perf_counter()
+    for _ in range(rounds):
+        function(page)
+    return (time.perf_counter() - started) / rounds
+
+
+def stream(body: bytes) -> OfferDataScanner:
+    scanner = OfferDataScanner("utf-8")
+    for start in range(0, len(body), 65536):
+        if scanner.feed(body[start:start + 65536]):
+            break
+    scanner.finish()
+    return scanner
+
+
+def peak(function, *args) -> int:
+    tracemalloc.start()
+    function(*args)
+    peak_size = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return peak_size
+
+
+def main(paths):
+    if paths:
+        pages = [(path, open(path, encoding="utf-8", errors="replace").read()) for path in paths]
+    else:
+        pages = [("synthetic", synthetic_page()), ("synthetic, trailing commas", synthetic_page(trailing_commas=True))]
+
+    for name, page in pages:
+        rounds = 20
+        legacy, current = len(legacy_extract(page)), len(extract_products_from_html(page))
+        print(f"{name}: {len(page) / 1024:.0f} KiB, offers found: legacy {legacy}, find_offer_data {current}")
+        print(f"    legacy regexes   {seconds(legacy_extract, page, rounds) * 1000:>8.2f} ms")
+        print(f"    find_offer_data  {seconds(extract_products_from_html, page, rounds) * 1000:>8.2f} ms")
+
+        body = page.encode("utf-8")
+        full_peak = peak(lambda: extract_products_from_html(body.decode("utf-8")))
+        print(f"    streaming        {seconds(stream, body, rounds) * 1000:>8.2f} ms, read {stream(body).bytes_read / 1024:.0f}"
+              f" of {len(body) / 1024:.0f} KiB, peak {peak(stream, body) / 1024:.0f} KiB vs {full_peak / 1024:.0f} KiB")
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
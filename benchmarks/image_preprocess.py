@@ -0,0 +1,57 @@
+"""Upload size and preprocessing time with ImagePreprocessor
+
+Pass photos as arguments, or run without arguments to use a synthetic
+4000x3000 JPEG. Shows the bytes saved per image and the wall time of a
+batch run serially, in a thread pool and in a process pool.
+
+    python benchmarks/image_preprocess.py [photo.jpg ...]
+"""
+import io
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+from PIL import Image, ImageFilter
+
+from search1688api import ImagePreprocessor
+from search1688api.utils import read_image_bytes
+
+
+def synthetic_photo(width: int = 4000, height: int = 3000) -> bytes:
+    # Smoothed noise compresses about as badly as a phone photo
+    image = Image.effect_noise((width, height), 64).filter(ImageFilter.GaussianBlur(1)).convert("RGB")
+    output = io.BytesIO()
+    image.save(output, "JPEG", quality=95)
+    return output.getvalue()
+
+
+def batch_seconds(preprocessor: ImagePreprocessor, images, executor=None) -> float:
+    started = time.perf_counter()
+    if executor is None:
+        for image in images:
+            preprocessor.process(image)
+    else:
+        list(executor.map(preprocessor.process, images))
+    return time.perf_counter() - started
+
+
+def main(paths):
+    images = [bytes(read_image_bytes(path)) for path in paths] or [synthetic_photo()] * 8
+    preprocessor = ImagePreprocessor(max_edge=1000)
+
+    for image in images[:len(paths) or 1]:
+        processed = preprocessor(image)
+        print(f"{len(image) / 1024:>8.0f} KiB -> {len(processed) / 1024:>6.0f} KiB")
+    print(f"bytes saved: {preprocessor.stats()['bytes_saved'] / 2 ** 20:.1f} MiB")
+
+    print(f"batch of {len(images)}:")
+    print(f"    serial        {batch_seconds(preprocessor, images) * 1000:>8.0f} ms")
+    with ThreadPoolExecutor(4) as threads:
+        print(f"    4 threads     {batch_seconds(preprocessor, images, threads) * 1000:>8.0f} ms")
+    with ProcessPoolExecutor(4) as processes:
+        processes.submit(int).result()  # Start the workers before timing
+        print(f"    4 processes   {batch_seconds(preprocessor, images, processes) * 1000:>8.0f} ms")
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
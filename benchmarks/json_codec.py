@@ -0,0 +1,99 @@
+"""stdlib json vs the codec backend on the request/response hot paths
+
+Encodes the signed request data strings the sessions build for a text
+search and an image offer search, and decodes a search results page.
+Encoding always goes through the stdlib; the orjson line shows what
+encoding the small params dicts with orjson would cost, and is skipped
+when orjson isn't installed.
+
+    python benchmarks/json_codec.py [rounds]
+"""
+import json
+import random
+import sys
+import time
+
+from offer_memory import make_item
+
+from search1688api import codec
+
+
+def text_request(dumps, keywords: str) -> str:
+    # As built by _get_text_offer_list()
+    params_data = {
+        "beginPage": 1,
+        "pageSize": 60,
+        "method": "getOfferList",
+        "pageId": "qWJOoeNkRwblv903Iv6KQqPVkYDrgMudKHTRsee9Sjz7N9z1",
+        "verticalProductFlag": "pcmarket",
+        "searchScene": "pcOfferSearch",
+        "charset": "GBK",
+        "spm": "a26352.b28411319/2508.searchbox.0",
+        "keywords": keywords
+    }
+    return dumps({"appId": 32517, "params": dumps(params_data)})
+
+
+def image_request(dumps, image_id: str) -> str:
+    # As built by _get_offer_list()
+    params_data = {
+        "beginPage": 1,
+        "pageSize": 60,
+        "method": "imageOfferSearchService",
+        "searchScene": "pcImageSearch",
+        "appName": "pctusou",
+        "tab": "imageSearch",
+        "imageId": image_id,
+        "imageIdList": image_id,
+        "spm": "a26352.13672862.imagesearch.upload"
+    }
+    return dumps({"appId": 32517, "params": dumps(params_data)})
+
+
+def orjson_dumps():
+    """Leaf-by-leaf orjson encoding of flat dicts, None without orjson"""
+    try:
+        import orjson
+    except ImportError:
+        return None
+
+    def encode(value):
+        return orjson.dumps(value).decode("utf-8")
+
+    return lambda obj: "{" + ", ".join(f"{encode(key)}: {encode(value)}" for key, value in obj.items()) + "}"
+
+
+def seconds(function, rounds: int) -> float:
+    started = time.perf_counter()
+    for _ in range(rounds):
+        function()
+    return (time.perf_counter() - started) / rounds
+
+
+def main(rounds: int = 100000):
+    random.seed(1688)
+    keywords, image_id = "手机壳 phone case", "1a2b3c4d5e6f"
+    stdlib_dumps = lambda obj: json.dumps(obj, ensure_ascii=False)
+    assert text_request(stdlib_dumps, keywords) == text_request(codec.dumps, keywords)
+    assert image_request(stdlib_dumps, image_id) == image_request(codec.dumps, image_id)
+
+    page = {"ret": ["SUCCESS::调用成功"], "data": {"data": {"OFFER": {"items": [make_item(i) for i in range(60)]}}}}
+    body = json.dumps(page, ensure_ascii=False).encode("utf-8")
+    page_rounds = max(1, rounds // 1000)
+
+    print(f"backend {codec.BACKEND}, page {len(body) / 1024:.0f} KiB, {rounds} encodes, {page_rounds} decodes")
+    encoders = [("codec.dumps", codec.dumps)]
+    if orjson_dumps() is not None:
+        encoders.append(("orjson leaves", orjson_dumps()))
+    for name, dumps in encoders:
+        print(f"{'encode text request, ' + name:<40} {seconds(lambda: text_request(dumps, keywords), rounds) * 1e6:>8.2f} us")
+        print(f"{'encode image request, ' + name:<40} {seconds(lambda: image_request(dumps, image_id), rounds) * 1e6:>8.2f} us")
+    for name, function in (
+        ("decode page, json", lambda: json.loads(body)),
+        (f"decode page, {codec.BACKEND}", lambda: codec.loads(body)),
+    ):
+        print(f"{name:<40} {seconds(function, page_rounds) * 1000:>8.2f} ms")
+
+
+if __name__ == "__main__":
+    main(*(int(arg) for arg in sys.argv[1:2]))
@@ -0,0 +1,58 @@
+"""Per-page cost of parsing an mtopjsonp response
+
+Compares the previous str-based path (decode the whole body, scan it for
+the callback name, slice out the object, json.loads the slice) with
+decode_jsonp() on the raw response bytes. Peak is the extra memory on top
+of the body while parsing, the parsed result included.
+
+    python benchmarks/jsonp_decode.py [offers_per_page] [rounds]
+"""
+import json
+import random
+import sys
+import time
+import tracemalloc
+
+from offer_memory import make_item
+
+from search1688api.jsonp import decode_jsonp
+
+
+def parse_text(body: bytes) -> dict:
+    response_text = body.decode("utf-8")
+    if "mtopjsonp" not in response_text:
+        raise ValueError("Invalid JSONP response format")
+    json_start = response_text.find("{")
+    json_end = response_text.rfind("}") + 1
+    return json.loads(response_text[json_start:json_end])
+
+
+def peak(parse, body: bytes) -> int:
+    tracemalloc.start()
+    result = parse(body)
+    peak_size = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    assert result["data"]["data"]["OFFER"]["items"]
+    return peak_size
+
+
+def seconds(parse, body: bytes, rounds: int) -> float:
+    started = time.perf_counter()
+    for _ in range(rounds):
+        parse(body)
+    return (time.perf_counter() - started) / rounds
+
+
+def main(count: int = 60, rounds: int = 200):
+    random.seed(1688)
+    page = {"ret": ["SUCCESS::调用成功"], "data": {"data": {"OFFER": {"items": [make_item(i) for i in range(count)]}}}}
+    body = f"mtopjsonp12({json.dumps(page, ensure_ascii=False)})".encode("utf-8")
+    assert parse_text(body) == decode_jsonp(body)
+
+    print(f"{count} offers per page, body {len(body) / 1024:.0f} KiB, {rounds} rounds")
+    for name, parse in (("str + slice + json.loads", parse_text), ("decode_jsonp(bytes)", decode_jsonp)):
+        print(f"{name:<26} peak {peak(parse, body) / 1024:>8.0f} KiB  {seconds(parse, body, rounds) * 1000:>7.2f} ms/page")
+
+
+if __name__ == "__main__":
+    main(*(int(arg) for arg in sys.argv[1:3]))
@@ -0,0 +1,100 @@
+"""Event loop lag of concurrent image searches, inline vs offloaded work
+
+Runs image uploads (file read, base64 form body) and offer page requests
+(mtopjsonp decoding) against a local server process, several at once, and samples
+the loop with LoopLagMonitor. With offload_threshold=None everything runs
+on the loop, as before; with the default threshold the large steps run in
+the default thread pool and the loop keeps serving other requests.
+
+    python benchmarks/loop_lag.py [concurrency] [image_mib] [offers]
+"""
+import asyncio
+import json
+import multiprocessing
+import os
+import random
+import sys
+import tempfile
+import time
+
+from aiohttp import web
+from offer_memory import make_item
+
+from search1688api import Async1688Session
+from search1688api.async_session import DEFAULT_OFFLOAD_THRESHOLD
+from search1688api.looplag import LoopLagMonitor
+
+
+def serve(page: bytes, ports):
+    """Server in its own process, so its work doesn't show up as client loop lag"""
+    async def upload(request):
+        await request.read()
+        return web.json_response({"ret": ["SUCCESS::调用成功"], "data": {"success": True, "imageId": "1688"}})
+
+    async def offers(request):
+        return web.Response(body=page, content_type="application/javascript")
+
+    app = web.Application(client_max_size=256 * 1024 * 1024)
+    app.router.add_post("/h5/", upload)
+    app.router.add_get("/h5/", offers)
+    async def start():
+        runner = web.AppRunner(app)
+        await runner.setup()
+        site = web.TCPSite(runner, "127.0.0.1", 0)
+        await site.start()
+        ports.put(site._server.sockets[0].getsockname()[1])
+        await asyncio.Event().wait()
+
+    asyncio.run(start())
+
+
+async def run(port: int, paths, threshold):
+    async def no_refresh():
+        pass
+
+    session = Async1688Session(debug=False, offload_threshold=threshold)
+    session._initialized = True
+    session._ensure_token_fresh = no_refresh
+    session.cookies_dict["_m_h5_tk"] = "0" * 32 + "_1"
+    session.base_url = f"http://127.0.0.1:{port}/h5/"
+
+    async def search(path):
+        image_id = await session._upload_image(path)
+        return await session._get_offer_list(image_id)
+
+    started = time.perf_counter()
+    async with LoopLagMonitor(interval=0.005) as monitor:
+        results = await asyncio.gather(*(search(path) for path in paths))
+    elapsed = time.perf_counter() - started
+    await session.close()
+    assert all(len(products) == len(results[0]) for products in results)
+    return elapsed, monitor.stats()
+
+
+async def main(concurrency: int = 16, image_mib: float = 4, offers: int = 600):
+    random.seed(1688)
+    payload = {"ret": ["SUCCESS::调用成功"], "data": {"data": {"OFFER": {"items": [make_item(i) for i in range(offers)]}}}}
+    page = b"mtopjsonp1(" + json.dumps(payload, ensure_ascii=False).encode("utf-8") + b")"
+    ports = multiprocessing.Queue()
+    server = multiprocessing.Process(target=serve, args=(page, ports), daemon=True)
+    server.start()
+    port = ports.get()
+
+    with tempfile.TemporaryDirectory() as directory:
+        paths = []
+        for index in range(concurrency):
+            paths.append(os.path.join(directory, f"{index}.jpg"))
+            with open(paths[-1], "wb") as f:
+                f.write(os.urandom(int(image_mib * 1024 * 1024)))
+
+        print(f"{concurrency} searches at once, {image_mib} MiB images, {len(page) / 1024:.0f} KiB offer pages")
+        for name, threshold in (("inline", None), (f"offloaded >= {DEFAULT_OFFLOAD_THRESHOLD // 1024} KiB",
+                                                  DEFAULT_OFFLOAD_THRESHOLD)):
+            elapsed, lag = await run(port, paths, threshold)
+            print(f"{name:<22} {elapsed * 1000:>7.0f} ms  loop lag p50 {lag['p50'] * 1000:6.2f} ms"
+                  f"  p99 {lag['p99'] * 1000:6.2f} ms  max {lag['max'] * 1000:6.2f} ms")
+    server.terminate()
+
+
+if __name__ == "__main__":
+    asyncio.run(main(*(float(arg) if n == 1 else int(arg) for n, arg in enumerate(sys.argv[1:4]))))
@@ -0,0 +1,69 @@
+"""Memory per offer: dict(item) copies vs compact Offer records
+
+Builds a synthetic OFFER payload shaped like the mtop response, parses it
+the same way the sessions do and measures what stays alive once the
+parsed response itself is released.
+
+    python benchmarks/offer_memory.py [offers]
+"""
+import json
+import random
+import sys
+import tracemalloc
+
+from search1688api import Offer
+
+PROVINCES = ["浙江", "广东", "江苏", "福建", "山东"]
+CITIES = ["义乌市", "广州市", "深圳市", "苏州市", "泉州市", "临沂市"]
+
+
+def make_item(index: int) -> dict:
+    data = {
+        "offerId": 600000000000 + index,
+        "title": f"2024新款手机壳 透明防摔 适用于iPhone 15 Pro Max 型号{index}",
+        "priceInfo": {"price": f"{random.uniform(1, 100):.2f}", "priceType": "range", "unit": "个"},
+        "shopAddition": {"text": f"义乌市某某电子商务有限公司{index % 500}", "url": "https://shop.1688.com"},
+        "province": random.choice(PROVINCES),
+        "city": random.choice(CITIES),
+        "saleQuantity": random.randint(0, 100000),
+        "bookedCount": random.randint(0, 5000),
+        "tags": [{"text": "源头工厂", "type": 1}, {"text": "48小时发货", "type": 2}],
+        "imageUrl": f"https://cbu01.alicdn.com/img/ibank/O1CN01{index:010d}.jpg",
+        "trackInfo": {"scm": "1007.32517." + "x" * 120, "pvid": "y" * 40, "bizType": "offer"},
+    }
+    # Wide tail of rarely used fields, as in the real response
+    data.update({f"extField{n}": f"value-{n}-{index}" for n in range(40)})
+    return {"data": data, "type": "offer", "trace": {"exposure": "z" * 200}}
+
+
+def measure(payload: str, build) -> int:
+    tracemalloc.start()
+    result = json.loads(payload)
+    items = result["data"]["data"]["OFFER"]["items"]
+    products = [build(item) for item in items]
+    del result, items
+    retained = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    assert products
+    return retained
+
+
+def main(count: int = 10000):
+    random.seed(1688)
+    payload = json.dumps(
+        {"data": {"data": {"OFFER": {"items": [make_item(i) for i in range(count)]}}}}, ensure_ascii=False
+    )
+
+    results = [
+        ("dict(item)", measure(payload, dict)),
+        ("Offer", measure(payload, Offer.from_item)),
+        ("Offer(keep_raw=True)", measure(payload, lambda item: Offer.from_item(item, keep_raw=True))),
+    ]
+
+    print(f"{count} offers, payload {len(payload.encode('utf-8')) / count:.0f} bytes/offer")
+    for name, retained in results:
+        print(f"{name:<22} {retained / count:>8.0f} bytes/offer")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 10000)
@@ -0,0 +1,58 @@
+"""Peak memory of building one image upload request
+
+The old path base64-encodes the image to a str, JSON-encodes it twice,
+signs an f-string copy of the data string and urlencodes the form (as
+requests/aiohttp do for data={"data": ...}). build_image_upload() hashes
+and percent-encodes base64 chunks straight into the body. The image
+itself is loaded before measuring; peaks are on top of it.
+
+    python benchmarks/upload_memory.py [image_mib]
+"""
+import base64
+import json
+import os
+import sys
+import time
+import tracemalloc
+import urllib.parse
+
+from search1688api.utils import build_image_upload, generate_sign
+
+
+def legacy_upload(image_bytes: bytes, token_part: str, timestamp: str, app_key: str):
+    image_b64 = base64.b64encode(image_bytes).decode("utf-8")
+    params_data = {
+        "searchScene": "imageEx",
+        "interfaceName": "imageBase64ToImageId",
+        "serviceParam.extendParam[imageBase64]": image_b64,
+        "subChannel": "pc_image_search_image_id"
+    }
+    data_string = json.dumps({"appId": 32517, "params": json.dumps(params_data, ensure_ascii=False)},
+                             ensure_ascii=False)
+    sign = generate_sign(token_part, timestamp, app_key, data_string)
+    return urllib.parse.urlencode({"data": data_string}).encode("ascii"), sign
+
+
+def measure(build, image_bytes: bytes):
+    tracemalloc.start()
+    started = time.perf_counter()
+    body, sign = build(image_bytes, "token", "1700000000000", "12574478")
+    elapsed = time.perf_counter() - started
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return body, sign, peak, elapsed
+
+
+def main(image_mib: float = 5):
+    image_bytes = os.urandom(int(image_mib * 1024 * 1024))
+    legacy = measure(legacy_upload, image_bytes)
+    chunked = measure(build_image_upload, image_bytes)
+    assert legacy[:2] == chunked[:2], "bodies or signatures differ"
+
+    print(f"image {len(image_bytes) / 2 ** 20:.1f} MiB, form body {len(chunked[0]) / 2 ** 20:.1f} MiB")
+    for name, (_, _, peak, elapsed) in (("legacy", legacy), ("build_image_upload", chunked)):
+        print(f"{name:<20} peak {peak / 2 ** 20:>7.1f} MiB  {elapsed * 1000:>8.1f} ms")
+
+
+if __name__ == "__main__":
+    main(float(sys.argv[1]) if len(sys.argv) > 1 else 5)
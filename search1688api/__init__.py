@@ -1,9 +1,54 @@
 
 from .async_session import Async1688Session
 from .sync_session import Sync1688Session
+from .models import SearchResult, Offer
+from .batch import ResultBatch
+from .sinks import BaseSink, NDJSONSink, ParquetSink
+from .errors import (
+    Search1688Error, NetworkError, HTTPStatusError, JSONPParseError, ImageReadError,
+    MtopError, TokenError, ThrottledError, ValidationError, BusinessError
+)
+from .retry import RetryPolicy, RetryBudget
+from .cache import ImageIdCache, ResultCache
+from .tokens import TokenManager
+from .ratelimit import AdaptiveRateLimiter
+from .pool import SessionPool, SyncSessionPool
+from .executor import ThreadedSearchExecutor
+from .imageprep import ImagePreprocessor
+from .looplag import LoopLagMonitor
 
 __version__ = "2.0.0"
 __author__ = "netkaruma"
 __email__ = "suzumekaruma@gmail.com"
 
-__all__ = ["Sync1688Session", "Async1688Session"]
\ No newline at end of file
+__all__ = [
+    "Sync1688Session",
+    "Async1688Session",
+    "SearchResult",
+    "Offer",
+    "ResultBatch",
+    "BaseSink",
+    "NDJSONSink",
+    "ParquetSink",
+    "Search1688Error",
+    "NetworkError",
+    "HTTPStatusError",
+    "JSONPParseError",
+    "ImageReadError",
+    "MtopError",
+    "TokenError",
+    "ThrottledError",
+    "ValidationError",
+    "BusinessError",
+    "RetryPolicy",
+    "RetryBudget",
+    "ImageIdCache",
+    "ResultCache",
+    "TokenManager",
+    "AdaptiveRateLimiter",
+    "SessionPool",
+    "SyncSessionPool",
+    "ThreadedSearchExecutor",
+    "ImagePreprocessor",
+    "LoopLagMonitor",
+]
@@ -1,29 +1,78 @@
 import asyncio
 import aiohttp
-import json
 import re
 import time
 import urllib.parse
 import random
 import string
-from typing import List, Dict, Any
+from concurrent.futures import Executor
+from email.utils import formatdate
+from http.cookies import SimpleCookie
+from typing import List, Dict, Any, AsyncIterator, Awaitable, Callable, Iterable, Optional
 from yarl import URL
 from traceback import format_exc
 
-from .utils import prepare_image_request, generate_sign, read_and_encode_image, extract_products_from_html
+from . import codec
+from .cache import ImageIdCache, ResultCache
+from .errors import Search1688Error, NetworkError, HTTPStatusError, JSONPParseError, BusinessError, TokenError
+from .htmlscan import DEFAULT_MAX_BYTES, OfferDataScanner
+from .imageprep import ImagePreprocessor
+from .jsonp import decode_jsonp
+from .models import SearchResult
+from .projection import FieldProjection
+from .ratelimit import AdaptiveRateLimiter
+from .retry import RetryPolicy
+from .tokens import TokenManager
+from .utils import (
+    ImageSource, build_image_upload, generate_sign, image_label, read_image_bytes, offers_from_offer_data,
+    is_token_error, is_anti_bot_error, is_throttle_error, is_throttled_response, dump_session_state,
+    load_session_state, parse_retry_after, ret_error
+)
+
+# Bodies and images from this size on are decoded/encoded off the event loop
+DEFAULT_OFFLOAD_THRESHOLD = 128 * 1024
 
 
 class Async1688Session(aiohttp.ClientSession):
-    def __init__(self, *args, debug: bool = True, **kwargs):
+    def __init__(self, *args, debug: bool = True, concurrent_bootstrap: bool = False,
+                 image_id_cache: Optional[ImageIdCache] = None, result_cache: Optional[ResultCache] = None,
+                 warmup_ttl: float = 300, rate_limiter: Optional[AdaptiveRateLimiter] = None,
+                 retry_policy: Optional[RetryPolicy] = None, raise_errors: bool = False,
+                 offer_factory: Optional[Callable[[Dict], Any]] = None, fallback_max_bytes: int = DEFAULT_MAX_BYTES,
+                 image_preprocessor: Optional[ImagePreprocessor] = None, image_executor: Optional[Executor] = None,
+                 offload_executor: Optional[Executor] = None,
+                 offload_threshold: Optional[int] = DEFAULT_OFFLOAD_THRESHOLD, **kwargs):
         super().__init__(*args, **kwargs)
         
-        self._token = None
-        self._token_part = None
+        self.token_manager = TokenManager()  # _m_h5_tk value, expiry and refresh schedule
         self.app_key = "12574478"
         self.base_url = "https://h5api.m.1688.com/h5/mtop.relationrecommend.wirelessrecommend.recommend/2.0/"
         self._initialized = False
         self.cookies_dict = {}
         self.debug = debug  # Debug output control
+        self._restored_state = False  # Session was restored via from_state()
+        self._token_rejected = False
+        self._rejected_token = None  # Token value the API rejected last time
+        self.anti_bot_hits = 0  # Slider/captcha responses seen by this identity
+        self.rate_limiter = rate_limiter  # Optional AdaptiveRateLimiter applied to every request
+        self.retry_policy = retry_policy or RetryPolicy()
+        self.raise_errors = raise_errors  # Raise Search1688Error from search methods instead of returning []
+        self.last_error: Optional[Search1688Error] = None  # Why the last search returned nothing
+        self.offer_factory = offer_factory  # Builds each product from its raw item, e.g. Offer.from_item
+        self.fallback_max_bytes = fallback_max_bytes  # Most of the HTML fallback page read looking for offers
+        self._token_lock = asyncio.Lock()
+        self._token_refresher = None  # Background task from _start_token_refresher()
+        self.image_id_cache = image_id_cache  # Optional ImageIdCache, skips repeated uploads
+        self.image_preprocessor = image_preprocessor  # Optional ImagePreprocessor, shrinks images before upload
+        self.image_executor = image_executor  # Runs the preprocessor; None falls back to offload_executor
+        self.offload_executor = offload_executor  # File reads and large encode/decode steps; None is the loop's default
+        self.offload_threshold = offload_threshold  # Bytes from which work is offloaded; None keeps everything inline
+        self.result_cache = result_cache  # Optional ResultCache for search results
+        self.warmup_ttl = warmup_ttl  # Seconds search page cookies are reused without a new warm-up
+        self._warmed_up: Dict[str, float] = {}  # search_type -> time.monotonic() of last warm-up
+        self._refresh_tasks: Dict[str, asyncio.Future] = {}  # Background refresh of stale entries
+        self.concurrent_bootstrap = concurrent_bootstrap  # Fire independent warm-up GETs at once
+        self.bootstrap_timings: Dict[str, float] = {}  # Per-URL warm-up time, seconds
     
     def _log(self, message: str):
         """Print debug messages only if debug=True"""
@@ -67,44 +116,26 @@ class Async1688Session(aiohttp.ClientSession):
         if self.closed:
             raise RuntimeError("Session is closed")
         
+        self._restored_state = False
+        self._token_rejected = False
+        self._warmed_up = {}
+        
         try:
             # First get cookies from 1688.com main page
             await self._get_main_page_cookies()
             
             # Then try to get token via API
-            test_params = {
-                "jsv": "2.7.2",
-                "appKey": self.app_key,
-                "t": str(int(time.time() * 1000)),
-                "api": "mtop.relationrecommend.WirelessRecommend.recommend",
-                "v": "2.0",
-                "type": "originaljson"
-            }
+            await self._fetch_token()
+            self._initialized = True
             
-            async with self.get(
-                url=self.base_url,
-                params=test_params
-            ) as response:
-                
-                # Get cookies from API response via cookie_jar
-                url_obj = URL(self.base_url)
-                cookies = self.cookie_jar.filter_cookies(url_obj)
-                for cookie_name, cookie_obj in cookies.items():
-                    self.cookies_dict[cookie_name] = cookie_obj.value
-                
-                token_cookie = cookies.get('_m_h5_tk')
-                
-                if token_cookie:
-                    self._token = token_cookie.value
-                    self._token_part = self._token.split('_')[0]
-                    self._initialized = True
-                    self._log(f"Token initialized: {self._token_part}...")
-                    return True
-                else:
-                    # Even if token not received, mark as initialized
-                    self._initialized = True
-                    self._log("Session initialized without token, will try to get it later")
-                    return True
+            self._start_token_refresher()
+            
+            if self.token_manager.token:
+                self._log(f"Token initialized: {self.token_manager.token_part}...")
+            else:
+                # Even if token not received, mark as initialized
+                self._log("Session initialized without token, will try to get it later")
+            return True
                 
         except Exception as e:
             await self.close()
@@ -135,27 +166,31 @@ class Async1688Session(aiohttp.ClientSession):
                 "https://s.1688.com/selloffer/offer_search.htm?keywords=sample"
             ]
             
-            for url in urls_to_visit:
-                try:
-                    self._log(f"Getting cookies from: {url}")
-                    async with self.get(url, headers=headers, allow_redirects=True) as response:
-                        # Read response to complete request
-                        await response.text()
-                        
-                        # Get cookies via cookie_jar
-                        url_obj = URL(url)
-                        cookies = self.cookie_jar.filter_cookies(url_obj)
-                        
-                        for cookie_name, cookie_obj in cookies.items():
-                            self.cookies_dict[cookie_name] = cookie_obj.value
-                            self._log(f"Got cookie: {cookie_name} = {cookie_obj.value[:50]}...")
+            self.bootstrap_timings = {}
+            
+            if self.concurrent_bootstrap:
+                # Landing pages don't depend on each other; only the sample search
+                # page needs s.1688.com cookies and referer, so it runs second
+                landing_urls = urls_to_visit[:3]
+                await asyncio.gather(*(
+                    self._visit_warmup_url(url, dict(headers)) for url in landing_urls
+                ))
+                await self._visit_warmup_url(urls_to_visit[3], dict(headers, referer=urls_to_visit[1]))
+                
+                # Merge in visiting order so later pages win, same as sequential mode
+                for url in urls_to_visit:
+                    self._merge_jar_cookies(url)
+            else:
+                for url in urls_to_visit:
+                    if await self._visit_warmup_url(url, headers):
+                        self._merge_jar_cookies(url)
                         
                         # Update referer for next request
                         headers["referer"] = url
-                        
-                except Exception as e:
-                    self._log(f"Error getting cookies from {url}: {e}")
-                    continue
+            
+            self._log("Bootstrap timings: " + ", ".join(
+                f"{url} {elapsed * 1000:.0f}ms" for url, elapsed in self.bootstrap_timings.items()
+            ))
             
             # Check for important cookies
             important_cookies = ['_m_h5_tk', '_m_h5_tk_enc', 't', '_tb_token_', 'cookie2', 'cna']
@@ -174,6 +209,29 @@ class Async1688Session(aiohttp.ClientSession):
             self._log(f"Error getting main page cookies: {e}")
             return False
     
+    async def _visit_warmup_url(self, url: str, headers: Dict[str, str]) -> bool:
+        """GET warm-up page and record its timing in bootstrap_timings"""
+        started = time.perf_counter()
+        try:
+            self._log(f"Getting cookies from: {url}")
+            async with self.get(url, headers=headers, allow_redirects=True) as response:
+                # Read response to complete request
+                await response.text()
+            return True
+        except Exception as e:
+            self._log(f"Error getting cookies from {url}: {e}")
+            return False
+        finally:
+            self.bootstrap_timings[url] = time.perf_counter() - started
+    
+    def _merge_jar_cookies(self, url: str):
+        """Copy cookies visible for url from cookie_jar into cookies_dict"""
+        cookies = self.cookie_jar.filter_cookies(URL(url))
+        
+        for cookie_name, cookie_obj in cookies.items():
+            self.cookies_dict[cookie_name] = cookie_obj.value
+            self._log(f"Got cookie: {cookie_name} = {cookie_obj.value[:50]}...")
+    
     async def _use_fallback_cookies(self, missing_cookies):
         """Use generated random cookies for missing ones"""
         fallback_cookies = self._generate_fallback_cookies()
@@ -183,87 +241,354 @@ class Async1688Session(aiohttp.ClientSession):
                 self.cookies_dict[cookie_name] = fallback_cookies[cookie_name]
                 self._log(f"Using generated fallback for {cookie_name}: {fallback_cookies[cookie_name][:30]}...")
     
+    async def _fetch_token(self):
+        """Request fresh _m_h5_tk cookie from the mtop API"""
+        self.token_manager.mark_refresh_attempt()
+        
+        test_params = {
+            "jsv": "2.7.2",
+            "appKey": self.app_key,
+            "t": str(int(time.time() * 1000)),
+            "api": "mtop.relationrecommend.WirelessRecommend.recommend",
+            "v": "2.0",
+            "type": "originaljson"
+        }
+        
+        async with self.get(
+            url=self.base_url,
+            params=test_params
+        ) as response:
+            # Get cookies from API response via cookie_jar
+            cookies = self.cookie_jar.filter_cookies(URL(self.base_url))
+            for cookie_name, cookie_obj in cookies.items():
+                self.cookies_dict[cookie_name] = cookie_obj.value
+    
+    async def _request(self, method, str_or_url, **kwargs):
+        host = URL(str(str_or_url)).host or ''
+        if self.rate_limiter is not None:
+            await self.rate_limiter.acquire_async(host)
+        
+        response = await super()._request(method, str_or_url, **kwargs)
+        self._pick_up_token()
+        
+        if self.rate_limiter is not None:
+            if is_throttled_response(response.status, response.url, response.headers.get('location')):
+                self._log(f"Throttled by {host}: HTTP {response.status} {response.url}")
+                self.rate_limiter.on_throttle(host)
+            else:
+                self.rate_limiter.on_success(host)
+        return response
+    
+    def _pick_up_token(self):
+        """Take rotated _m_h5_tk from cookie jar after any response"""
+        cookies = self.cookie_jar.filter_cookies(URL(self.base_url))
+        token_cookie = cookies.get('_m_h5_tk')
+        
+        if token_cookie and self.token_manager.update(token_cookie.value):
+            self.cookies_dict['_m_h5_tk'] = token_cookie.value
+            if '_m_h5_tk_enc' in cookies:
+                self.cookies_dict['_m_h5_tk_enc'] = cookies['_m_h5_tk_enc'].value
+            self._log(f"Token updated: {self.token_manager.token_part}...")
+    
+    async def _ensure_token_fresh(self):
+        """Refresh token ahead of expiry instead of waiting for the API to reject it"""
+        if not self.token_manager.needs_refresh():
+            return
+        
+        async with self._token_lock:
+            # Another request may have refreshed it while we waited
+            if self.token_manager.needs_refresh():
+                self._log("Token is about to expire, refreshing")
+                try:
+                    await self._fetch_token()
+                except Exception as e:
+                    self._log(f"Token refresh error: {e}")
+    
+    def _start_token_refresher(self):
+        if self._token_refresher is None or self._token_refresher.done():
+            self._token_refresher = asyncio.ensure_future(self._token_refresh_loop())
+    
+    async def _token_refresh_loop(self):
+        """Background task refreshing the token shortly before it expires"""
+        while not self.closed:
+            await asyncio.sleep(self.token_manager.refresh_delay())
+            if not self.closed:
+                await self._ensure_token_fresh()
+    
+    def _signing_token_part(self) -> str:
+        if self.token_manager.token_part:
+            return self.token_manager.token_part
+        
+        # Try to get token from cookies
+        token_from_cookies = self.cookies_dict.get('_m_h5_tk')
+        if token_from_cookies:
+            self._log("Using token from cookies for signing")
+            return token_from_cookies.split('_')[0]
+        
+        self._log("Using fallback token for signing")
+        return "fallback"
+    
+    def _note_ret(self, ret):
+        """Track token and anti-bot errors reported in mtop "ret" """
+        if is_token_error(ret):
+            self._token_rejected = True
+            self._rejected_token = self.token_manager.token
+        if is_anti_bot_error(ret):
+            self.anti_bot_hits += 1
+        if (is_anti_bot_error(ret) or is_throttle_error(ret)) and self.rate_limiter is not None:
+            self.rate_limiter.on_throttle(URL(self.base_url).host)
+    
     async def close(self):
+        if self._token_refresher is not None:
+            self._token_refresher.cancel()
+            self._token_refresher = None
+        for task in list(self._refresh_tasks.values()):
+            task.cancel()
+        self._refresh_tasks.clear()
         await super().close()
-        self._token = None
-        self._token_part = None
+        self.token_manager.clear()
         self._initialized = False
         self.cookies_dict = {}
+        self._restored_state = False
+        self._token_rejected = False
+        self._warmed_up = {}
+    
+    def save_state(self, path: str):
+        """Save warmed cookies and token to file for later from_state()"""
+        jar = [
+            {
+                "name": morsel.key,
+                "value": morsel.value,
+                "domain": morsel["domain"],
+                "path": morsel["path"] or "/",
+                "expires": morsel["expires"] or None,
+                "secure": bool(morsel["secure"])
+            }
+            for morsel in self.cookie_jar
+        ]
+        
+        dump_session_state(path, {
+            "saved_at": time.time(),
+            "cookies_dict": dict(self.cookies_dict),
+            "jar": jar,
+            "token": self.token_manager.token,
+            "token_part": self.token_manager.token_part,
+            "token_expires": self.token_manager.expires_at
+        })
+        self._log(f"Session state saved to {path}")
+    
+    @classmethod
+    async def from_state(cls, path: str, *args, min_ttl: float = 60, **kwargs) -> "Async1688Session":
+        """Create session from saved state, bootstrapping only if state is unusable"""
+        session = cls(*args, **kwargs)
+        
+        try:
+            state = load_session_state(path)
+        except ValueError as e:
+            session._log(f"Saved state not loaded: {e}")
+            state = None
+        
+        if not state or not session._restore_state(state, min_ttl):
+            await session.start()
+        else:
+            session._start_token_refresher()
+        return session
+    
+    def _restore_state(self, state: Dict[str, Any], min_ttl: float) -> bool:
+        token_expires = state.get("token_expires")
+        if not state.get("token") or not token_expires or token_expires - time.time() < min_ttl:
+            self._log("Saved token is missing or expired, full start required")
+            return False
+        
+        for cookie in state.get("jar", []):
+            morsels = SimpleCookie()
+            morsels[cookie["name"]] = cookie["value"]
+            morsel = morsels[cookie["name"]]
+            morsel["path"] = cookie.get("path") or "/"
+            if cookie.get("domain"):
+                morsel["domain"] = cookie["domain"]
+            if isinstance(cookie.get("expires"), (int, float)):
+                morsel["expires"] = formatdate(cookie["expires"], usegmt=True)
+            elif cookie.get("expires"):
+                morsel["expires"] = cookie["expires"]
+            if cookie.get("secure"):
+                morsel["secure"] = True
+            
+            domain = (cookie.get("domain") or "1688.com").lstrip('.')
+            self.cookie_jar.update_cookies(morsels, response_url=URL(f"https://{domain}/"))
+        
+        self.cookies_dict.update(state.get("cookies_dict", {}))
+        self.token_manager.update(state["token"])
+        self._initialized = True
+        self._restored_state = True
+        self._token_rejected = False
+        self._log(f"Session restored from state, token valid for {int(token_expires - time.time())}s")
+        return True
+    
+    async def _recover_token(self) -> bool:
+        """Get a usable token once after the API rejected the current one"""
+        if not self._token_rejected:
+            return False
+        
+        self._token_rejected = False
+        
+        if self._restored_state:
+            self._log("Restored token rejected, running full session start")
+            self._restored_state = False
+            await self.start()
+            return True
+        
+        if self.token_manager.token == self._rejected_token:
+            # Error response didn't rotate _m_h5_tk, ask the API for a new one
+            self._log("Token rejected, requesting a new one")
+            await self._fetch_token()
+        else:
+            self._log("Token rejected, retrying with rotated token")
+        return True
+    
+    async def _refresh_after_token_error(self, search_param: str, search_type: str) -> bool:
+        """Re-bootstrap or re-warm once after the API rejected the token"""
+        if not await self._recover_token():
+            return False
+        
+        self._warmed_up.pop(search_type, None)
+        return await self._get_search_page_cookies(search_param, search_type)
+    
+    async def _call_with_retry(self, fetch: Callable[[], Awaitable[Any]], search_param: Optional[str] = None,
+                               search_type: Optional[str] = None) -> Any:
+        """Await fetch(), retrying failures that retry_policy classifies as transient"""
+        self.retry_policy.on_request()
+        attempt = 0
+        token_refreshed = False
+        
+        while True:
+            try:
+                return await fetch()
+            except TokenError:
+                # A new token fixes this, no need to wait or spend the retry budget
+                if token_refreshed:
+                    raise
+                token_refreshed = True
+                if search_type is not None:
+                    recovered = await self._refresh_after_token_error(search_param, search_type)
+                else:
+                    recovered = await self._recover_token()
+                if not recovered:
+                    raise
+            except Search1688Error as e:
+                attempt += 1
+                if not self.retry_policy.should_retry(e, attempt):
+                    raise
+                delay = self.retry_policy.backoff(attempt, e)
+                self._log(f"{type(e).__name__}: {e}, retry {attempt} in {delay:.2f}s")
+                await asyncio.sleep(delay)
+    
+    def _status_error(self, response) -> HTTPStatusError:
+        return HTTPStatusError(response.status, str(response.url), parse_retry_after(response.headers.get('retry-after')))
+    
+    def _search_failed(self, error: Search1688Error) -> List[Dict]:
+        """Remember the error and return [] as before, unless raise_errors is set"""
+        self.last_error = error
+        self._log(f"Search failed: {type(error).__name__}: {error}")
+        if self.raise_errors:
+            raise error
+        return []
     
     async def _ensure_initialized(self):
         if not self._initialized or self.closed:
             await self._initialize()
     
-    async def _get_image_id(self, image_path):
+    async def _offload(self, size: int, function: Callable, *args):
+        """function(*args) in offload_executor once size reaches offload_threshold, inline below it"""
+        if self.offload_threshold is None or size < self.offload_threshold:
+            return function(*args)
+        return await asyncio.get_running_loop().run_in_executor(self.offload_executor, function, *args)
+    
+    async def _cache_io(self, cache, method: str, *args):
+        """cache.method(*args); SQLite-backed caches are queried in offload_executor, off the loop"""
+        if not cache.persistent or self.offload_threshold is None:
+            return getattr(cache, method)(*args)
+        return await asyncio.get_running_loop().run_in_executor(self.offload_executor, getattr(cache, method), *args)
+    
+    async def _read_image(self, image: ImageSource):
+        """read_image_bytes; paths and file objects are read in offload_executor, their size isn't known up front"""
+        if self.offload_threshold is None or isinstance(image, (bytes, bytearray, memoryview)):
+            return read_image_bytes(image)
+        return await asyncio.get_running_loop().run_in_executor(self.offload_executor, read_image_bytes, image)
+    
+    async def _get_image_id(self, image: ImageSource, cache_key: Optional[str] = None) -> str:
         await self._ensure_initialized()
         
+        image_bytes = read_image_bytes(image)
+        
+        await self._ensure_token_fresh()
+        timestamp = str(int(time.time() * 1000))
+        
+        # Form body and sign are built from base64 chunks, no full-size data string is ever made
+        body, sign = await self._offload(
+            len(image_bytes), build_image_upload, image_bytes, self._signing_token_part(), timestamp, self.app_key
+        )
+        
+        params = {
+            "jsv": "2.7.2",
+            "appKey": self.app_key,
+            "t": timestamp,
+            "sign": sign,
+            "api": "mtop.relationrecommend.WirelessRecommend.recommend",
+            "ignoreLogin": "true",
+            "prefix": "h5api",
+            "v": "2.0",
+            "type": "originaljson",
+            "dataType": "jsonp", 
+            "jsonpIncPrefix": "search1688",
+            "timeout": "20000"
+        }
+        
+        headers = {
+            "content-type": "application/x-www-form-urlencoded",
+            "origin": "https://s.1688.com",
+            "referer": "https://s.1688.com/",
+            "user-agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36"
+        }
+        
         try:
-            image_b64 = read_and_encode_image(image_path)
-            data_string = prepare_image_request(image_b64)
-            timestamp = str(int(time.time() * 1000))
-            
-            # If token exists, use it for signing
-            if self._token_part:
-                sign = generate_sign(self._token_part, timestamp, self.app_key, data_string)
-            else:
-                # Try to get token from cookies
-                if '_m_h5_tk' in self.cookies_dict:
-                    token_from_cookies = self.cookies_dict['_m_h5_tk']
-                    token_part_from_cookies = token_from_cookies.split('_')[0] if '_' in token_from_cookies else token_from_cookies
-                    sign = generate_sign(token_part_from_cookies, timestamp, self.app_key, data_string)
-                    self._log("Using token from cookies for signing")
-                else:
-                    # Use fallback signature
-                    sign = generate_sign("fallback_token", timestamp, self.app_key, data_string)
-                    self._log("Using fallback token for signing")
-            
-            params = {
-                "jsv": "2.7.2",
-                "appKey": self.app_key,
-                "t": timestamp,
-                "sign": sign,
-                "api": "mtop.relationrecommend.WirelessRecommend.recommend",
-                "ignoreLogin": "true",
-                "prefix": "h5api",
-                "v": "2.0",
-                "type": "originaljson",
-                "dataType": "jsonp", 
-                "jsonpIncPrefix": "search1688",
-                "timeout": "20000"
-            }
-            
-            headers = {
-                "content-type": "application/x-www-form-urlencoded",
-                "origin": "https://s.1688.com",
-                "referer": "https://s.1688.com/",
-                "user-agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36"
-            }
-            
             async with self.post(
                 url=self.base_url,
                 params=params,
-                data={"data": data_string},
+                data=body,
                 headers=headers
             ) as response:
-                
-                if response.status == 200:
-                    result = await response.json()
-                    if result.get("data", {}).get("success"):
-                        image_id = result["data"].get("imageId")
-                        if image_id:
-                            return image_id
-                    else:
-                        self._log(f"API error in image upload: {result.get('ret', ['Unknown error'])}")
-                else:
-                    self._log(f"Image upload HTTP error: {response.status}")
-                return None
-            
-        except Exception as e:
-            self._log(f"Image upload request error: {e}")
-            return None
+                if response.status != 200:
+                    raise self._status_error(response)
+                response_bytes = await response.read()
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            raise NetworkError(f"Image upload request error: {e}") from e
+        
+        try:
+            result = codec.loads(response_bytes)
+        except ValueError as e:
+            raise JSONPParseError(f"Image upload JSON decode error: {e}") from e
+        
+        if not result.get("data", {}).get("success"):
+            self._log(f"API error in image upload: {result.get('ret', ['Unknown error'])}")
+            self._note_ret(result.get('ret'))
+            raise ret_error(result.get('ret')) or BusinessError(["Image upload was not accepted"])
+        
+        image_id = result["data"].get("imageId")
+        if not image_id:
+            raise BusinessError(["Image upload returned no imageId"])
+        
+        if cache_key is not None:
+            await self._cache_io(self.image_id_cache, "set", cache_key, image_id)
+        return image_id
     
     async def _get_search_page_cookies(self, search_param: str, search_type: str = "image"):
-        """Get cookies for search page"""
+        """Get cookies for search page, skipped while previous warm-up is fresh"""
+        warmed_at = self._warmed_up.get(search_type)
+        if warmed_at is not None and time.monotonic() - warmed_at < self.warmup_ttl:
+            self._log(f"Search page cookies for {search_type} search are fresh, skipping warm-up")
+            return True
+        
         try:
             if search_type == "image":
                 initial_url = "https://s.1688.com/youyuan/index.htm"
@@ -338,45 +663,419 @@ class Async1688Session(aiohttp.ClientSession):
                     for cookie_name, cookie_obj in cookies.items():
                         self.cookies_dict[cookie_name] = cookie_obj.value
 
+            self._warmed_up[search_type] = time.monotonic()
             return True
                 
         except Exception as e:
             self._log(f"Cookie collection error: {e}")
             return False
 
-    async def search_by_image(self, image_path: str) -> List[Dict]:
-        """Search products by image"""
+    async def search_by_image(self, image_path: ImageSource, fields: Optional[Iterable[str]] = None,
+                        exclude: Optional[Iterable[str]] = None) -> List[Dict]:
+        """Search products by image (path, bytes or binary file), optionally keeping only `fields` or dropping `exclude` keys"""
+        self.last_error = None
+        try:
+            return await self._search_image(image_path, FieldProjection.create(fields, exclude))
+        except Search1688Error as e:
+            return self._search_failed(e)
+
+    async def search_by_text(self, keywords: str, fields: Optional[Iterable[str]] = None,
+                       exclude: Optional[Iterable[str]] = None) -> List[Dict]:
+        """Search products by text keywords, optionally keeping only `fields` or dropping `exclude` keys"""
+        self.last_error = None
+        try:
+            return await self._search_text(keywords, FieldProjection.create(fields, exclude))
+        except Search1688Error as e:
+            return self._search_failed(e)
+
+    async def _search_image(self, image_path: ImageSource, projection: Optional[FieldProjection] = None) -> List[Dict]:
+        """search_by_image that raises Search1688Error instead of returning []"""
         await self._ensure_initialized()
         
-        image_id = await self._get_image_id(image_path)
+        # Read once: file objects can't be read again, and retries reuse the content
+        image = await self._read_image(image_path)
         
-        if not image_id:
-            self._log("Failed to get image ID")
-            return []
+        if self.result_cache is not None:
+            # Hashed once, the imageId cache reuses it on a miss
+            content_hash = await self._offload(len(image), ImageIdCache.key_for, image)
+            cache_key = ResultCache.make_key("image", content_hash, 1, self._cache_filters(60, projection))
+            return await self._cached_search(cache_key, lambda: self._search_by_image(image, projection, content_hash))
         
-        products = await self._search_by_image_id_api(image_id)
-        return products
+        return await self._search_by_image(image, projection)
 
-    async def search_by_text(self, keywords: str) -> List[Dict]:
-        """Search products by text keywords"""
+    async def _search_text(self, keywords: str, projection: Optional[FieldProjection] = None) -> List[Dict]:
+        """search_by_text that raises Search1688Error instead of returning []"""
         await self._ensure_initialized()
         
-        products = await self._search_by_keywords_api(keywords)
+        if self.result_cache is not None:
+            cache_key = ResultCache.make_key("text", keywords, 1, self._cache_filters(60, projection))
+            return await self._cached_search(cache_key, lambda: self._search_by_keywords_api(keywords, projection))
+        
+        return await self._search_by_keywords_api(keywords, projection)
+
+    async def _search_by_image(self, image: ImageSource, projection: Optional[FieldProjection] = None,
+                               content_hash: Optional[str] = None) -> List[Dict]:
+        image_id = await self._upload_image(image, content_hash)
+        return await self._search_by_image_id_api(image_id, projection)
+
+    async def _upload_image(self, image_path: ImageSource, content_hash: Optional[str] = None) -> str:
+        """Get imageId, retrying transient errors and token rejections
+        
+        `content_hash` is ImageIdCache.key_for() of the image, if the caller already has it.
+        """
+        image = await self._read_image(image_path)
+        
+        # Cached by the original content, so the preprocessor only runs on a miss
+        cache_key = None
+        if self.image_id_cache is not None:
+            cache_key = content_hash or await self._offload(len(image), self.image_id_cache.key_for, image)
+            cached_image_id = await self._cache_io(self.image_id_cache, "get", cache_key)
+            if cached_image_id:
+                self._log(f"Image ID taken from cache: {cached_image_id}")
+                return cached_image_id
+        
+        if self.image_preprocessor is not None:
+            # Decoding and resizing take tens of milliseconds, too long to block the loop.
+            # bytes() because a memoryview can't be pickled for a process pool
+            prepared = await asyncio.get_running_loop().run_in_executor(
+                self.image_executor or self.offload_executor, self.image_preprocessor.process, bytes(image)
+            )
+            self.image_preprocessor.record(len(image), len(prepared))
+            self._log(f"Image preprocessed: {len(image)} -> {len(prepared)} bytes")
+            image = prepared
+        
+        return await self._call_with_retry(lambda: self._get_image_id(image, cache_key))
+
+    @staticmethod
+    def _cache_filters(page_size: int, projection: Optional[FieldProjection]) -> Dict[str, Any]:
+        filters: Dict[str, Any] = {"page_size": page_size}
+        if projection is not None:
+            filters.update(projection.cache_filters())
+        return filters
+
+    async def _cached_search(self, cache_key: str, fetch: Callable[[], Awaitable[List[Dict]]]) -> List[Dict]:
+        """Serve from result_cache, refreshing stale entries in background"""
+        cached = await self._cache_io(self.result_cache, "get", cache_key)
+        if cached is not None:
+            products, is_fresh = cached
+            if self.offer_factory is not None:
+                # Entries loaded from the SQLite tier come back as plain items
+                products = [self._make_offer(item) if isinstance(item, dict) else item for item in products]
+            if not is_fresh:
+                self._schedule_refresh(cache_key, fetch)
+            self._log(f"Returning {len(products)} cached products ({'fresh' if is_fresh else 'stale'})")
+            return products
+        
+        # Failures raise Search1688Error, so an empty list is a real empty result
+        products = await fetch()
+        await self._cache_io(self.result_cache, "set", cache_key, products)
         return products
 
-    async def _search_by_image_id_api(self, image_id: str) -> List[Dict]:
+    def _schedule_refresh(self, cache_key: str, fetch: Callable[[], Awaitable[List[Dict]]]):
+        if cache_key in self._refresh_tasks:
+            return
+        
+        async def refresh():
+            try:
+                await self._cache_io(self.result_cache, "set", cache_key, await fetch())
+            except Exception as e:
+                self._log(f"Background cache refresh failed: {e}")
+            finally:
+                self._refresh_tasks.pop(cache_key, None)
+        
+        self._refresh_tasks[cache_key] = asyncio.ensure_future(refresh())
+
+    async def search_by_text_iter(self, keywords: str, max_pages: Optional[int] = None,
+                                  page_size: int = 60, fields: Optional[Iterable[str]] = None,
+                                  exclude: Optional[Iterable[str]] = None) -> AsyncIterator[List[Dict]]:
+        """Yield text search results page by page, prefetching the next page"""
+        projection = FieldProjection.create(fields, exclude)
+        self.last_error = None
+        await self._ensure_initialized()
+        
+        if not await self._get_search_page_cookies(keywords, "text"):
+            self._log("Cookie collection failed, paging without search page cookies")
+        
+        async def fetch_page(page):
+            return await self._call_with_retry(
+                lambda: self._get_text_offer_list(keywords, page, page_size, projection), keywords, "text"
+            )
+        
+        async def fetch_page_cached(page):
+            cache_key = ResultCache.make_key("text", keywords, page, self._cache_filters(page_size, projection))
+            return await self._cached_search(cache_key, lambda: fetch_page(page))
+        
+        pages = self._iter_pages(
+            fetch_page_cached if self.result_cache is not None else fetch_page, max_pages, page_size
+        )
+        async for products in pages:
+            yield products
+
+    async def search_by_image_iter(self, image_path: ImageSource, max_pages: Optional[int] = None,
+                                   page_size: int = 60, fields: Optional[Iterable[str]] = None,
+                                   exclude: Optional[Iterable[str]] = None) -> AsyncIterator[List[Dict]]:
+        """Yield image search results page by page, uploading the image once (and only if a page isn't cached)"""
+        projection = FieldProjection.create(fields, exclude)
+        self.last_error = None
+        try:
+            await self._ensure_initialized()
+            # Read once: the content is both the result cache key and what gets uploaded
+            image = await self._read_image(image_path)
+            content_hash = await self._offload(len(image), ImageIdCache.key_for, image) if self.result_cache is not None else None
+        except Search1688Error as e:
+            self._search_failed(e)
+            return
+        
+        uploading: Optional[asyncio.Future] = None
+        
+        async def upload():
+            # Deferred to the first page fetch, so a fully cached search needs neither the upload nor the page GETs
+            image_id = await self._upload_image(image, content_hash)
+            if not await self._get_search_page_cookies(image_id, "image"):
+                self._log("Cookie collection failed, using fallback method")
+                return image_id, True
+            return image_id, False
+        
+        async def fetch_page(page):
+            nonlocal uploading
+            if uploading is None:
+                # Shared, in case a prefetched page misses the cache while another one is uploading
+                uploading = asyncio.ensure_future(upload())
+            image_id, use_fallback = await asyncio.shield(uploading)
+            if use_fallback:
+                # The fallback only returns the first page
+                if page > 1:
+                    return []
+                return await self._call_with_retry(lambda: self._search_by_image_id_fallback(image_id, projection))
+            return await self._call_with_retry(
+                lambda: self._get_offer_list(image_id, page, page_size, projection), image_id, "image"
+            )
+        
+        async def fetch_page_cached(page):
+            # Same key as search_by_image for page 1 with 60 offers
+            cache_key = ResultCache.make_key("image", content_hash, page, self._cache_filters(page_size, projection))
+            return await self._cached_search(cache_key, lambda: fetch_page(page))
+        
+        pages = self._iter_pages(
+            fetch_page_cached if self.result_cache is not None else fetch_page, max_pages, page_size
+        )
+        try:
+            async for products in pages:
+                yield products
+        finally:
+            if uploading is not None and not uploading.done():
+                uploading.cancel()
+
+    async def _iter_pages(self, fetch_page: Callable[[int], Awaitable[List[Dict]]],
+                          max_pages: Optional[int], page_size: int) -> AsyncIterator[List[Dict]]:
+        """Page through fetch_page, loading page N+1 in background while N is consumed"""
+        page = 1
+        next_page = asyncio.ensure_future(fetch_page(page))
+        
+        try:
+            while next_page is not None:
+                try:
+                    products = await next_page
+                except Search1688Error as e:
+                    self._search_failed(e)
+                    return
+                finally:
+                    next_page = None
+                
+                if not products:
+                    return
+                
+                # A short page means there is nothing after it
+                is_last = len(products) < page_size or (max_pages is not None and page >= max_pages)
+                if not is_last:
+                    next_page = asyncio.ensure_future(fetch_page(page + 1))
+                
+                yield products
+                page += 1
+        finally:
+            if next_page is not None:
+                next_page.cancel()
+
+    async def search_many_text(self, keywords: Iterable[str], concurrency: int = 8,
+                               timeout: Optional[float] = None, ordered: bool = True) -> List[SearchResult]:
+        """Search many keywords over this session, at most `concurrency` at a time"""
+        return [
+            result async for result in self.iter_many_text(keywords, concurrency, timeout, ordered)
+        ]
+
+    async def iter_many_text(self, keywords: Iterable[str], concurrency: int = 8,
+                             timeout: Optional[float] = None, ordered: bool = False) -> AsyncIterator[SearchResult]:
+        """Stream (keyword, products, error) results as searches finish"""
+        async def search(keyword):
+            return await asyncio.wait_for(self._search_text(keyword), timeout)
+        
+        async for result in self._iter_bounded(keywords, search, concurrency, ordered):
+            yield result
+
+    async def _iter_bounded(self, queries: Iterable[Any], search: Callable[[Any], Awaitable[List[Dict]]],
+                            concurrency: int, ordered: bool) -> AsyncIterator[SearchResult]:
+        """Run search over queries with a fixed number of workers sharing this session"""
+        if concurrency < 1:
+            raise ValueError("concurrency must be at least 1")
+        
+        # Bootstrap once up front so workers don't race to start() the session
+        await self._ensure_initialized()
+        
+        pending = enumerate(queries)
+        results: asyncio.Queue = asyncio.Queue()
+        
+        async def worker():
+            try:
+                for index, query in pending:
+                    try:
+                        products = await search(query)
+                        result = SearchResult(query, products)
+                    except asyncio.TimeoutError as e:
+                        self._log(f"Search timed out for {query!r}")
+                        result = SearchResult(query, [], e)
+                    except Exception as e:
+                        self._log(f"Search failed for {query!r}: {e}")
+                        result = SearchResult(query, [], e)
+                    await results.put((index, result))
+            finally:
+                await results.put(None)
+        
+        workers = [asyncio.ensure_future(worker()) for _ in range(concurrency)]
+        
+        async for result in self._drain_results(results, concurrency, workers, ordered):
+            yield result
+
+    async def search_many_images(self, image_paths: Iterable[ImageSource], upload_concurrency: int = 4,
+                                 search_concurrency: int = 8, timeout: Optional[float] = None,
+                                 ordered: bool = True) -> List[SearchResult]:
+        """Search many images with separate limits for upload and search stages"""
+        return [
+            result async for result in self.iter_many_images(
+                image_paths, upload_concurrency, search_concurrency, timeout, ordered
+            )
+        ]
+
+    async def iter_many_images(self, image_paths: Iterable[ImageSource], upload_concurrency: int = 4,
+                               search_concurrency: int = 8, timeout: Optional[float] = None,
+                               ordered: bool = False) -> AsyncIterator[SearchResult]:
+        """Stream (image_path, products, error) results from an upload -> search pipeline
+        
+        Uploads run in their own worker pool and hand imageIds to the search
+        workers through a bounded queue, so slow uploads overlap with offer
+        fetching. `timeout` applies to each stage separately.
+        """
+        if upload_concurrency < 1 or search_concurrency < 1:
+            raise ValueError("concurrency must be at least 1")
+        
+        await self._ensure_initialized()
+        
+        pending = enumerate(image_paths)
+        # Bounded so uploads can't run arbitrarily far ahead of searches
+        uploaded: asyncio.Queue = asyncio.Queue(maxsize=search_concurrency * 2)
+        results: asyncio.Queue = asyncio.Queue()
+        
+        async def upload_worker():
+            for index, image_path in pending:
+                try:
+                    image_id = await asyncio.wait_for(self._upload_image(image_path), timeout)
+                    error = None
+                except asyncio.TimeoutError as e:
+                    self._log(f"Image upload timed out for {image_label(image_path)}")
+                    image_id, error = None, e
+                except Exception as e:
+                    self._log(f"Image upload failed for {image_label(image_path)}: {e}")
+                    image_id, error = None, e
+                
+                if error is not None:
+                    await results.put((index, SearchResult(image_path, [], error)))
+                else:
+                    await uploaded.put((index, image_path, image_id))
+        
+        async def search_worker():
+            try:
+                while True:
+                    item = await uploaded.get()
+                    if item is None:
+                        return
+                    
+                    index, image_path, image_id = item
+                    try:
+                        products = await asyncio.wait_for(self._search_by_image_id_api(image_id), timeout)
+                        result = SearchResult(image_path, products)
+                    except asyncio.TimeoutError as e:
+                        self._log(f"Image search timed out for {image_label(image_path)}")
+                        result = SearchResult(image_path, [], e)
+                    except Exception as e:
+                        self._log(f"Image search failed for {image_label(image_path)}: {e}")
+                        result = SearchResult(image_path, [], e)
+                    await results.put((index, result))
+            finally:
+                await results.put(None)
+        
+        async def run_uploads():
+            cancelled = False
+            try:
+                await asyncio.gather(*(upload_worker() for _ in range(upload_concurrency)))
+            except asyncio.CancelledError:
+                cancelled = True
+                raise
+            finally:
+                # Also when image_paths or an upload worker raised, or the search workers would wait
+                # forever; the error itself reaches the caller through _drain_results(). After a
+                # cancellation the search workers are being cancelled as well.
+                if not cancelled:
+                    for _ in range(search_concurrency):
+                        await uploaded.put(None)
+        
+        searchers = [asyncio.ensure_future(search_worker()) for _ in range(search_concurrency)]
+        uploader = asyncio.ensure_future(run_uploads())
+        
+        async for result in self._drain_results(results, search_concurrency, searchers + [uploader], ordered):
+            yield result
+
+    async def _drain_results(self, results: asyncio.Queue, producers: int, tasks: List[asyncio.Future],
+                             ordered: bool) -> AsyncIterator[SearchResult]:
+        """Yield results put as (index, result) until `producers` None sentinels arrive"""
+        buffered: Dict[int, SearchResult] = {}
+        next_index = 0
+        
+        try:
+            while producers:
+                item = await results.get()
+                if item is None:
+                    producers -= 1
+                    continue
+                
+                index, result = item
+                if not ordered:
+                    yield result
+                    continue
+                
+                buffered[index] = result
+                while next_index in buffered:
+                    yield buffered.pop(next_index)
+                    next_index += 1
+            
+            # Every producer has signed off; one that died (e.g. the queries iterator raised) re-raises here
+            await asyncio.gather(*tasks)
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    async def _search_by_image_id_api(self, image_id: str, projection: Optional[FieldProjection] = None) -> List[Dict]:
         await self._ensure_initialized()
         
         cookies_success = await self._get_search_page_cookies(image_id, "image")
         
         if not cookies_success:
             self._log("Cookie collection failed, using fallback method")
-            return await self._search_by_image_id_fallback(image_id)
+            return await self._call_with_retry(lambda: self._search_by_image_id_fallback(image_id, projection))
         
-        products = await self._get_offer_list(image_id)
-        return products
+        return await self._call_with_retry(
+            lambda: self._get_offer_list(image_id, projection=projection), image_id, "image"
+        )
 
-    async def _search_by_keywords_api(self, keywords: str) -> List[Dict]:
+    async def _search_by_keywords_api(self, keywords: str, projection: Optional[FieldProjection] = None) -> List[Dict]:
         """Search products by keywords using API"""
         await self._ensure_initialized()
         
@@ -384,281 +1083,224 @@ class Async1688Session(aiohttp.ClientSession):
         
         if not cookies_success:
             self._log("Cookie collection failed, using fallback method")
-            return await self._search_by_keywords_fallback(keywords)
+            return await self._search_by_keywords_fallback(keywords, projection)
         
-        products = await self._get_text_offer_list(keywords)
-        return products
+        return await self._call_with_retry(
+            lambda: self._get_text_offer_list(keywords, projection=projection), keywords, "text"
+        )
 
-    async def _get_offer_list(self, image_id: str) -> List[Dict]:
+    async def _get_offer_list(self, image_id: str, page: int = 1, page_size: int = 60,
+                        projection: Optional[FieldProjection] = None) -> List[Dict]:
+        params_data = {
+            "beginPage": page,
+            "pageSize": page_size,
+            "method": "imageOfferSearchService",
+            "searchScene": "pcImageSearch",
+            "appName": "pctusou",
+            "tab": "imageSearch",
+            "imageId": image_id,
+            "imageIdList": image_id,
+            "spm": "a26352.13672862.imagesearch.upload"
+        }
+        
+        request_data = {
+            "appId": 32517,
+            "params": codec.dumps(params_data)
+        }
+        
+        data_string = codec.dumps(request_data)
+        
+        await self._ensure_token_fresh()
+        timestamp = str(int(time.time() * 1000))
+        
+        sign = generate_sign(self._signing_token_part(), timestamp, self.app_key, data_string)
+        
+        params = {
+            "jsv": "2.7.2",
+            "appKey": self.app_key,
+            "t": timestamp,
+            "sign": sign,
+            "api": "mtop.relationrecommend.wirelessrecommend.recommend",
+            "v": "2.0",
+            "type": "jsonp",
+            "dataType": "jsonp",
+            "timeout": "20000",
+            "jsonpIncPrefix": "reqTppId_32517_getOfferList",
+            "callback": f"mtopjsonpreqTppId_32517_getOfferList{int(time.time())}",
+            "data": data_string
+        }
+        
+        full_url = f"{self.base_url}?{urllib.parse.urlencode(params)}"
+        
+        cookies_str = '; '.join([f'{k}={v}' for k, v in self.cookies_dict.items()])
+        
+        headers = {
+            "authority": "h5api.m.1688.com",
+            "method": "GET",
+            "scheme": "https",
+            "accept": "*/*",
+            "accept-language": "ru-RU,ru;q=0.9,en-US;q=0.8,en;q=0.7",
+            "cookie": cookies_str,
+            "referer": f"https://pages-fast.1688.com/wow/cbu/srch_rec/image_search/youyuan/index.html?tab=imageSearch&imageId={image_id}&imageIdList={image_id}&spm=a26352.13672862.imagesearch.upload",
+            "sec-ch-ua": '"Chromium";v="142", "Google Chrome";v="142", "Not_A Brand";v="99"',
+            "sec-ch-ua-mobile": "?0",
+            "sec-ch-ua-platform": '"Windows"',
+            "sec-fetch-dest": "script",
+            "sec-fetch-mode": "no-cors",
+            "sec-fetch-site": "same-site",
+            "user-agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/142.0.0.0 Safari/537.36"
+        }
+        
         try:
-            params_data = {
-                "beginPage": 1,
-                "pageSize": 60,
-                "method": "imageOfferSearchService",
-                "searchScene": "pcImageSearch",
-                "appName": "pctusou",
-                "tab": "imageSearch",
-                "imageId": image_id,
-                "imageIdList": image_id,
-                "spm": "a26352.13672862.imagesearch.upload"
-            }
-            
-            request_data = {
-                "appId": 32517,
-                "params": json.dumps(params_data, ensure_ascii=False)
-            }
-            
-            data_string = json.dumps(request_data, ensure_ascii=False)
-            
-            timestamp = str(int(time.time() * 1000))
-            
-            # Use token for signing if available
-            if self._token_part:
-                sign = generate_sign(self._token_part, timestamp, self.app_key, data_string)
-            else:
-                # Try to get token from cookies
-                if '_m_h5_tk' in self.cookies_dict:
-                    token_from_cookies = self.cookies_dict['_m_h5_tk']
-                    token_part_from_cookies = token_from_cookies.split('_')[0] if '_' in token_from_cookies else token_from_cookies
-                    sign = generate_sign(token_part_from_cookies, timestamp, self.app_key, data_string)
-                else:
-                    sign = generate_sign("fallback", timestamp, self.app_key, data_string)
-            
-            params = {
-                "jsv": "2.7.2",
-                "appKey": self.app_key,
-                "t": timestamp,
-                "sign": sign,
-                "api": "mtop.relationrecommend.wirelessrecommend.recommend",
-                "v": "2.0",
-                "type": "jsonp",
-                "dataType": "jsonp",
-                "timeout": "20000",
-                "jsonpIncPrefix": "reqTppId_32517_getOfferList",
-                "callback": f"mtopjsonpreqTppId_32517_getOfferList{int(time.time())}",
-                "data": data_string
-            }
-            
-            full_url = f"{self.base_url}?{urllib.parse.urlencode(params)}"
-            
-            cookies_str = '; '.join([f'{k}={v}' for k, v in self.cookies_dict.items()])
-            
-            headers = {
-                "authority": "h5api.m.1688.com",
-                "method": "GET",
-                "scheme": "https",
-                "accept": "*/*",
-                "accept-language": "ru-RU,ru;q=0.9,en-US;q=0.8,en;q=0.7",
-                "cookie": cookies_str,
-                "referer": f"https://pages-fast.1688.com/wow/cbu/srch_rec/image_search/youyuan/index.html?tab=imageSearch&imageId={image_id}&imageIdList={image_id}&spm=a26352.13672862.imagesearch.upload",
-                "sec-ch-ua": '"Chromium";v="142", "Google Chrome";v="142", "Not_A Brand";v="99"',
-                "sec-ch-ua-mobile": "?0",
-                "sec-ch-ua-platform": '"Windows"',
-                "sec-fetch-dest": "script",
-                "sec-fetch-mode": "no-cors",
-                "sec-fetch-site": "same-site",
-                "user-agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/142.0.0.0 Safari/537.36"
-            }
-            
             async with self.get(
                 url=full_url,
                 headers=headers
             ) as response:
-                
-                if response.status == 200:
-                    response_bytes = await response.read()
-                    
-                    response_text = await self._decode_response(response, response_bytes)
-                    
-                    if response_text:
-                        if response_text.startswith('mtopjsonp') or 'mtopjsonp' in response_text:
-                            json_start = response_text.find('{')
-                            json_end = response_text.rfind('}') + 1
-                            if json_start != -1 and json_end != -1:
-                                json_str = response_text[json_start:json_end]
-                                
-                                try:
-                                    result = json.loads(json_str)
-                                    
-                                    # Check for API errors
-                                    if 'ret' in result and not result.get('ret', ['SUCCESS'])[0].startswith('SUCCESS'):
-                                        self._log(f"API returned error: {result.get('ret')}")
-                                        return []
-                                    
-                                    products = self._parse_api_products(result)
-                                    return products
-                                    
-                                except json.JSONDecodeError as e:
-                                    self._log(f"JSON decode error: {e}")
-                                    return []
-                        else:
-                            self._log("Invalid JSONP response format")
-                            return []
-                    else:
-                        self._log("Failed to decode response")
-                        return []
-                else:
-                    self._log(f"Products request failed with status: {response.status}")
-                    return []
-                    
-        except Exception as e:
-            self._log(f"Products request error: {e}")
-            return []
+                if response.status != 200:
+                    raise self._status_error(response)
+                response_bytes = await response.read()
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            raise NetworkError(f"Products request error: {e}") from e
+        
+        result = await self._offload(len(response_bytes), self._decode_api_body, response, response_bytes)
+        
+        # Check for API errors
+        error = ret_error(result.get('ret'))
+        if error is not None:
+            self._log(f"Products API returned error: {result.get('ret')}")
+            self._note_ret(result.get('ret'))
+            raise error
+        
+        products = self._parse_api_products(result, projection)
+        return products
 
-    async def _get_text_offer_list(self, keywords: str) -> List[Dict]:
+    async def _get_text_offer_list(self, keywords: str, page: int = 1, page_size: int = 60,
+                             projection: Optional[FieldProjection] = None) -> List[Dict]:
         """Get product list for text search using the correct API"""
+        # Form parameters as in call stack
+        params_data = {
+            "beginPage": page,
+            "pageSize": page_size,
+            "method": "getOfferList",
+            "pageId": "qWJOoeNkRwblv903Iv6KQqPVkYDrgMudKHTRsee9Sjz7N9z1",  # fixed pageId
+            "verticalProductFlag": "pcmarket",
+            "searchScene": "pcOfferSearch",
+            "charset": "GBK",
+            "spm": "a26352.b28411319/2508.searchbox.0",
+            "keywords": keywords
+        }
+        
+        request_data = {
+            "appId": 32517,
+            "params": codec.dumps(params_data)
+        }
+        
+        data_string = codec.dumps(request_data)
+        
+        await self._ensure_token_fresh()
+        timestamp = str(int(time.time() * 1000))
+        
+        sign = generate_sign(self._signing_token_part(), timestamp, self.app_key, data_string)
+        
+        # Parameters as in call stack
+        params = {
+            "jsv": "2.7.4",  # version from stack
+            "appKey": self.app_key,
+            "t": timestamp,
+            "sign": sign,
+            "api": "mtop.relationrecommend.WirelessRecommend.recommend",
+            "v": "2.0",
+            "jsonpIncPrefix": "reqTppId_32517_getOfferList",
+            "excludeKeys": projection.exclude_keys if projection is not None else "",
+            "type": "jsonp",
+            "dataType": "jsonp",
+            "callback": f"mtopjsonpreqTppId_32517_getOfferList{int(time.time())}",
+            "data": data_string
+        }
+        
+        full_url = f"{self.base_url}?{urllib.parse.urlencode(params)}"
+        
+        cookies_str = '; '.join([f'{k}={v}' for k, v in self.cookies_dict.items()])
+        
+        headers = {
+            "authority": "h5api.m.1688.com",
+            "method": "GET",
+            "scheme": "https",
+            "accept": "*/*",
+            "accept-language": "ru-RU,ru;q=0.9,en-US;q=0.8,en;q=0.7",
+            "cookie": cookies_str,
+            "referer": f"https://s.1688.com/selloffer/offer_search.htm?keywords={urllib.parse.quote(keywords)}&spm=a26352.b28411319%2F2508.searchbox.0",
+            "sec-ch-ua": '"Chromium";v="142", "Google Chrome";v="142", "Not_A Brand";v="99"',
+            "sec-ch-ua-mobile": "?0",
+            "sec-ch-ua-platform": '"Windows"',
+            "sec-fetch-dest": "script",
+            "sec-fetch-mode": "no-cors",
+            "sec-fetch-site": "same-site",
+            "user-agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/142.0.0.0 Safari/537.36"
+        }
+        
         try:
-            # Form parameters as in call stack
-            params_data = {
-                "beginPage": 1,
-                "pageSize": 60,
-                "method": "getOfferList",
-                "pageId": "qWJOoeNkRwblv903Iv6KQqPVkYDrgMudKHTRsee9Sjz7N9z1",  # fixed pageId
-                "verticalProductFlag": "pcmarket",
-                "searchScene": "pcOfferSearch",
-                "charset": "GBK",
-                "spm": "a26352.b28411319/2508.searchbox.0",
-                "keywords": keywords
-            }
-            
-            request_data = {
-                "appId": 32517,
-                "params": json.dumps(params_data, ensure_ascii=False)
-            }
-            
-            data_string = json.dumps(request_data, ensure_ascii=False)
-            
-            timestamp = str(int(time.time() * 1000))
-            
-            # Use token for signing if available
-            if self._token_part:
-                sign = generate_sign(self._token_part, timestamp, self.app_key, data_string)
-            else:
-                sign = generate_sign("fallback", timestamp, self.app_key, data_string)
-            
-            # Parameters as in call stack
-            params = {
-                "jsv": "2.7.4",  # version from stack
-                "appKey": self.app_key,
-                "t": timestamp,
-                "sign": sign,
-                "api": "mtop.relationrecommend.WirelessRecommend.recommend",
-                "v": "2.0",
-                "jsonpIncPrefix": "reqTppId_32517_getOfferList",
-                "excludeKeys": "",
-                "type": "jsonp",
-                "dataType": "jsonp",
-                "callback": f"mtopjsonpreqTppId_32517_getOfferList{int(time.time())}",
-                "data": data_string
-            }
-            
-            full_url = f"{self.base_url}?{urllib.parse.urlencode(params)}"
-            
-            cookies_str = '; '.join([f'{k}={v}' for k, v in self.cookies_dict.items()])
-            
-            headers = {
-                "authority": "h5api.m.1688.com",
-                "method": "GET",
-                "scheme": "https",
-                "accept": "*/*",
-                "accept-language": "ru-RU,ru;q=0.9,en-US;q=0.8,en;q=0.7",
-                "cookie": cookies_str,
-                "referer": f"https://s.1688.com/selloffer/offer_search.htm?keywords={urllib.parse.quote(keywords)}&spm=a26352.b28411319%2F2508.searchbox.0",
-                "sec-ch-ua": '"Chromium";v="142", "Google Chrome";v="142", "Not_A Brand";v="99"',
-                "sec-ch-ua-mobile": "?0",
-                "sec-ch-ua-platform": '"Windows"',
-                "sec-fetch-dest": "script",
-                "sec-fetch-mode": "no-cors",
-                "sec-fetch-site": "same-site",
-                "user-agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/142.0.0.0 Safari/537.36"
-            }
-            
             async with self.get(
                 url=full_url,
                 headers=headers
             ) as response:
-                
-                if response.status == 200:
-                    response_bytes = await response.read()
-                    
-                    response_text = await self._decode_response(response, response_bytes)
-                    
-                    if response_text:
-                        if response_text.startswith('mtopjsonp') or 'mtopjsonp' in response_text:
-                            json_start = response_text.find('{')
-                            json_end = response_text.rfind('}') + 1
-                            if json_start != -1 and json_end != -1:
-                                json_str = response_text[json_start:json_end]
-                                
-                                try:
-                                    result = json.loads(json_str)
-                                    
-                                    # Check for API errors
-                                    if 'ret' in result and not result.get('ret', ['SUCCESS'])[0].startswith('SUCCESS'):
-                                        self._log(f"Text search API returned error: {result.get('ret')}")
-                                        return []
-                                    
-                                    products = self._parse_api_products(result)
-                                    self._log(f"Text search API found {len(products)} products")
-                                    return products
-                                    
-                                except json.JSONDecodeError as e:
-                                    self._log(f"Text search JSON decode error: {e}")
-                                    return []
-                        else:
-                            self._log("Invalid JSONP response format in text search")
-                            return []
-                    else:
-                        self._log("Failed to decode text search response")
-                        return []
-                else:
-                    self._log(f"Text search API request failed with status: {response.status}")
-                    return []
-                    
-        except Exception as e:
-            self._log(f"Text search API request error: {e}")
-            return []
+                if response.status != 200:
+                    raise self._status_error(response)
+                response_bytes = await response.read()
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            raise NetworkError(f"Text search request error: {e}") from e
+        
+        result = await self._offload(len(response_bytes), self._decode_api_body, response, response_bytes)
+        
+        # Check for API errors
+        error = ret_error(result.get('ret'))
+        if error is not None:
+            self._log(f"Text search API returned error: {result.get('ret')}")
+            self._note_ret(result.get('ret'))
+            raise error
+        
+        products = self._parse_api_products(result, projection)
+        self._log(f"Text search API found {len(products)} products")
+        return products
 
-    async def _decode_response(self, response, response_bytes: bytes) -> str:
+    def _decode_api_body(self, response, response_bytes: bytes) -> Dict:
+        """Decompressed and parsed mtopjsonp body; may run in offload_executor"""
+        return decode_jsonp(self._response_body(response, response_bytes))
+
+    def _response_body(self, response, response_bytes: bytes) -> bytes:
+        """Body bytes; aiohttp already undoes Content-Encoding unless auto_decompress is off"""
+        if self.auto_decompress:
+            return response_bytes
+        
+        content_encoding = response.headers.get('content-encoding', '').lower()
         try:
-            content_encoding = response.headers.get('content-encoding', '').lower()
-            
             if 'gzip' in content_encoding:
                 import gzip
-                return gzip.decompress(response_bytes).decode('utf-8')
+                return gzip.decompress(response_bytes)
             elif 'deflate' in content_encoding:
                 import zlib
-                return zlib.decompress(response_bytes).decode('utf-8')
+                return zlib.decompress(response_bytes)
             elif 'br' in content_encoding:
-                try:
-                    import brotli
-                    return brotli.decompress(response_bytes).decode('utf-8')
-                except ImportError:
-                    self._log("Brotli compression not supported")
+                import brotli
+                return brotli.decompress(response_bytes)
             elif 'zstd' in content_encoding:
-                try:
-                    import zstandard
-                    dctx = zstandard.ZstdDecompressor()
-                    return dctx.decompress(response_bytes).decode('utf-8')
-                except ImportError:
-                    self._log("Zstandard compression not supported")
-            
-            try:
-                return response_bytes.decode('utf-8')
-            except UnicodeDecodeError:
-                try:
-                    return response_bytes.decode('latin-1')
-                except UnicodeDecodeError:
-                    return response_bytes.decode('cp1251')
-                    
+                import zstandard
+                return zstandard.ZstdDecompressor().decompress(response_bytes)
+        except ImportError:
+            self._log(f"{content_encoding} compression not supported")
         except Exception as e:
-            self._log(f"Response decoding error: {e}")
-            try:
-                return response_bytes.decode('utf-8', errors='replace')
-            except:
-                return None
+            self._log(f"Response decompression error: {e}")
+        return response_bytes
 
-    def _parse_api_products(self, api_result: Dict) -> List[Dict]:
+    def _make_offer(self, item: Dict, projection: Optional[FieldProjection] = None) -> Any:
+        if projection is not None:
+            item = projection.apply(item)
+        if self.offer_factory is not None:
+            return self.offer_factory(item)
+        # Projected items are fresh dicts already
+        return item if projection is not None else dict(item)
+
+    def _parse_api_products(self, api_result: Dict, projection: Optional[FieldProjection] = None) -> List[Dict]:
         products = []
         
         try:
@@ -672,9 +1314,8 @@ class Async1688Session(aiohttp.ClientSession):
             
             for item in items:
                 try:
-                    # Simply convert each item to Python dictionary
-                    product_dict = dict(item)
-                    products.append(product_dict)
+                    # Simply convert each item to Python dictionary unless a compact type is requested
+                    products.append(self._make_offer(item, projection))
                 except Exception as e:
                     self._log(f"Error parsing product item: {e}")
                     continue
@@ -684,44 +1325,54 @@ class Async1688Session(aiohttp.ClientSession):
         
         return products
 
-    async def _search_by_image_id_fallback(self, image_id: str) -> List[Dict]:
+    async def _search_by_image_id_fallback(self, image_id: str, projection: Optional[FieldProjection] = None) -> List[Dict]:
+        search_url = "https://s.1688.com/youyuan/index.htm"
+        params = {
+            "tab": "imageSearch",
+            "imageId": image_id
+        }
+        
+        headers = {
+            "user-agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36",
+            "accept": "text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8",
+            "accept-language": "ru-RU,ru;q=0.9,en-US;q=0.8,en;q=0.7",
+            "referer": "https://s.1688.com/"
+        }
+        
         try:
-            search_url = "https://s.1688.com/youyuan/index.htm"
-            params = {
-                "tab": "imageSearch",
-                "imageId": image_id
-            }
-            
-            headers = {
-                "user-agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36",
-                "accept": "text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8",
-                "accept-language": "ru-RU,ru;q=0.9,en-US;q=0.8,en;q=0.7",
-                "referer": "https://s.1688.com/"
-            }
-            
             async with self.get(
                 url=search_url,
                 params=params,
                 headers=headers
             ) as response:
+                if response.status != 200:
+                    raise self._status_error(response)
                 
-                if response.status == 200:
-                    html_content = await response.text()
-                    # Now extract_products_from_html returns dictionaries directly
-                    products = extract_products_from_html(html_content)
-                    self._log(f"Fallback method found {len(products)} products")
-                    return products
-                else:
-                    self._log(f"Fallback method HTTP error: {response.status}")
-                    return []
-                    
-        except Exception as e:
-            self._log(f"Fallback method error: {e}")
-            return []
+                # Stop downloading as soon as the embedded offer data is complete
+                scanner = OfferDataScanner(response.charset or "utf-8")
+                async for chunk in response.content.iter_chunked(65536):
+                    if scanner.feed(chunk):
+                        break
+                    if scanner.bytes_read >= self.fallback_max_bytes:
+                        self._log(f"Fallback page exceeds {self.fallback_max_bytes} bytes, giving up")
+                        break
+                if not response.content.at_eof():
+                    # Drop the connection instead of draining the rest of the page
+                    response.close()
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            raise NetworkError(f"Fallback method request error: {e}") from e
+        
+        offer_data = scanner.finish()
+        items = offers_from_offer_data(offer_data) if offer_data else []
+        products = [self._make_offer(item, projection) for item in items]
+        self._log(f"Fallback method found {len(products)} products after {scanner.bytes_read} bytes")
+        return products
 
-    async def _search_by_keywords_fallback(self, keywords: str) -> List[Dict]:
+    async def _search_by_keywords_fallback(self, keywords: str, projection: Optional[FieldProjection] = None) -> List[Dict]:
         """Fallback method for text search"""
-        return await self._get_text_offer_list(keywords)
+        return await self._call_with_retry(
+            lambda: self._get_text_offer_list(keywords, projection=projection), keywords, "text"
+        )
 
     @property
     def is_active(self):
@@ -0,0 +1,293 @@
+import re
+from array import array
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Union
+
+from .models import Offer
+
+# Column name -> array typecode; int64 ids and counts, float64 prices
+NUMERIC_COLUMNS = {"offer_id": "q", "price": "d", "sale_quantity": "q", "booked_count": "q"}
+STRING_COLUMNS = ("title", "shop", "province", "city")
+
+_NUMBER = re.compile(r"\d+(?:\.\d+)?")
+
+
+def _numpy():
+    """numpy if installed; mask/filter/sort/take fall back to Python loops without it"""
+    try:
+        import numpy
+    except ImportError:
+        return None
+    return numpy
+
+
+def _to_float(value: Any) -> float:
+    """"12.50" -> 12.5, price ranges take their lower bound, unknown -> nan"""
+    if isinstance(value, (int, float)):
+        return float(value)
+    match = _NUMBER.search(str(value)) if value is not None else None
+    return float(match.group()) if match else float("nan")
+
+
+def _to_int(value: Any) -> int:
+    """1200, "1200+", "1.2万" -> 1200 / 1200 / 12000, unknown -> 0"""
+    if isinstance(value, int):
+        return value
+    if isinstance(value, float):
+        return int(value)
+    text = str(value) if value is not None else ""
+    match = _NUMBER.search(text)
+    if not match:
+        return 0
+    number = float(match.group())
+    if "万" in text[match.end():]:
+        number *= 10000
+    return int(number)
+
+
+def _take(values: array, indices: Sequence[int]) -> array:
+    """values[indices] as a new array of the same type"""
+    np = _numpy()
+    if np is None or not len(values):
+        return array(values.typecode, [values[index] for index in indices])
+    result = array(values.typecode)
+    # The view goes away on return, so `values` stays resizable
+    view = np.frombuffer(values, dtype=np.dtype(values.typecode))
+    result.frombytes(view[np.asarray(indices, dtype=np.intp)].tobytes())
+    return result
+
+
+class _DictColumn:
+    """Dictionary-encoded strings: int32 codes into a list of distinct values"""
+
+    __slots__ = ("codes", "values", "_index")
+
+    def __init__(self, codes: Optional[array] = None, values: Optional[List[Optional[str]]] = None):
+        self.codes = codes if codes is not None else array("i")
+        self.values = values if values is not None else []
+        self._index = {value: code for code, value in enumerate(self.values)}
+
+    def code_for(self, value: Optional[str]) -> int:
+        code = self._index.get(value)
+        if code is None:
+            code = self._index[value] = len(self.values)
+            self.values.append(value)
+        return code
+
+    def append(self, value: Optional[str]):
+        self.codes.append(self.code_for(value))
+
+    def extend(self, other: "_DictColumn"):
+        remap = [self.code_for(value) for value in other.values]
+        self.codes.extend(array("i", [remap[code] for code in other.codes]))
+
+    def take(self, indices: Sequence[int]) -> "_DictColumn":
+        return _DictColumn(_take(self.codes, indices), list(self.values))
+
+    def decode(self) -> List[Optional[str]]:
+        values = self.values
+        return [values[code] for code in self.codes]
+
+
+class ResultBatch:
+    """Search results stored column by column
+
+    Numeric fields (offer_id, price, sale_quantity, booked_count) live in
+    contiguous stdlib arrays, strings (title, shop, province, city) are
+    dictionary-encoded. to_numpy()/to_arrow() export the numeric columns and
+    string codes without copying; while such views exist the batch can't be
+    extended (arrays with exported buffers can't be resized).
+
+        batch = ResultBatch()
+        for page in session.search_by_text_iter("phone case", max_pages = 10):
+            batch.extend(page)
+        cheap = batch.filter(batch.mask("price", lambda price: price < 5)).sort("sale_quantity", descending = True)
+
+    With numpy installed mask/filter/sort/take run on the column buffers
+    (numeric predicates are called once with the whole column), otherwise
+    row by row. Missing prices are nan, missing counts 0; sort() puts
+    missing values last in either direction.
+    """
+
+    def __init__(self):
+        self._numeric: Dict[str, array] = {name: array(typecode) for name, typecode in NUMERIC_COLUMNS.items()}
+        self._strings: Dict[str, _DictColumn] = {name: _DictColumn() for name in STRING_COLUMNS}
+
+    @classmethod
+    def from_products(cls, products: Iterable[Union[Dict, Offer]]) -> "ResultBatch":
+        """Build from _parse_api_products output: raw items or Offer records"""
+        batch = cls()
+        batch.extend(products)
+        return batch
+
+    @classmethod
+    def concat(cls, batches: Iterable["ResultBatch"]) -> "ResultBatch":
+        result = cls()
+        for batch in batches:
+            for name, values in batch._numeric.items():
+                result._numeric[name].extend(values)
+            for name, column in batch._strings.items():
+                result._strings[name].extend(column)
+        return result
+
+    def extend(self, products: Iterable[Union[Dict, Offer]]):
+        numeric = self._numeric
+        strings = self._strings
+
+        for product in products:
+            offer = product if isinstance(product, Offer) else Offer.from_item(product)
+            numeric["offer_id"].append(_to_int(offer.offer_id))
+            numeric["price"].append(_to_float(offer.price))
+            numeric["sale_quantity"].append(_to_int(offer.sale_quantity))
+            numeric["booked_count"].append(_to_int(offer.booked_count))
+            strings["title"].append(offer.title)
+            strings["shop"].append(offer.shop)
+            strings["province"].append(offer.province)
+            strings["city"].append(offer.city)
+
+    def __len__(self) -> int:
+        return len(self._numeric["offer_id"])
+
+    @property
+    def columns(self) -> List[str]:
+        return list(NUMERIC_COLUMNS) + list(STRING_COLUMNS)
+
+    def __getitem__(self, name: str) -> Union[array, List[Optional[str]]]:
+        """Numeric column as its array, string column decoded to a list"""
+        if name in self._numeric:
+            return self._numeric[name]
+        if name in self._strings:
+            return self._strings[name].decode()
+        raise KeyError(name)
+
+    def categories(self, name: str) -> List[Optional[str]]:
+        """Distinct values of a string column, indexed by its codes"""
+        return self._strings[name].values
+
+    def codes(self, name: str) -> array:
+        return self._strings[name].codes
+
+    def row(self, index: int) -> Dict[str, Any]:
+        row: Dict[str, Any] = {name: values[index] for name, values in self._numeric.items()}
+        row.update((name, column.values[column.codes[index]]) for name, column in self._strings.items())
+        return row
+
+    def mask(self, name: str, predicate: Callable[[Any], bool]) -> Sequence[bool]:
+        """predicate applied to a column; for strings it runs once per distinct value
+
+        With numpy the result is a boolean array and numeric predicates get
+        the whole column as an array first; predicates that don't work on
+        arrays (math.isnan, ...) are applied value by value instead.
+        """
+        np = _numpy()
+        if name in self._strings:
+            column = self._strings[name]
+            matches = [bool(predicate(value)) for value in column.values]
+            if np is None or not len(column.codes):
+                return [matches[code] for code in column.codes]
+            return np.array(matches, dtype=bool)[np.frombuffer(column.codes, dtype=np.int32)]
+
+        values = self._numeric[name]
+        if np is not None and len(values):
+            view = np.frombuffer(values, dtype=np.dtype(values.typecode))
+            try:
+                result = np.asarray(predicate(view))
+            except (TypeError, ValueError):
+                result = None
+            del view
+            if result is not None and result.dtype == bool and result.shape == (len(values),):
+                return result
+            return np.fromiter((bool(predicate(value)) for value in values), dtype=bool, count=len(values))
+        return [bool(predicate(value)) for value in values]
+
+    def filter(self, mask: Sequence[bool]) -> "ResultBatch":
+        """Rows where mask is true; mask may also be a NumPy boolean array"""
+        if len(mask) != len(self):
+            raise ValueError(f"mask has {len(mask)} values, batch has {len(self)} rows")
+        np = _numpy()
+        if np is not None:
+            return self.take(np.flatnonzero(np.asarray(mask, dtype=bool)))
+        return self.take([index for index, keep in enumerate(mask) if keep])
+
+    def sort(self, by: str, descending: bool = False) -> "ResultBatch":
+        """Stable sort by one column, missing values (nan prices, None strings) last"""
+        np = _numpy()
+        if by in self._strings:
+            column = self._strings[by]
+            # Rank distinct values once, then sort rows by rank
+            values = column.values
+            present = sorted((code for code, value in enumerate(values) if value is not None),
+                             key=values.__getitem__, reverse=descending)
+            rank = [0] * len(values)
+            for position, code in enumerate(present + [code for code, value in enumerate(values) if value is None]):
+                rank[code] = position
+            codes = column.codes
+            if np is not None and len(codes):
+                order = np.argsort(np.array(rank, dtype=np.int64)[np.frombuffer(codes, dtype=np.int32)], kind="stable")
+                return self.take(order)
+            return self.take(sorted(range(len(self)), key=lambda index: rank[codes[index]]))
+
+        values = self._numeric[by]
+        if np is not None and len(values):
+            view = np.frombuffer(values, dtype=np.dtype(values.typecode))
+            # argsort puts nan last; negating keeps it there for descending order
+            order = np.argsort(-view if descending else view, kind="stable")
+            del view
+            return self.take(order)
+
+        def key(index):
+            value = values[index]
+            # nan != nan; comparing nan directly would leave the order undefined
+            return (True, 0) if value != value else (False, -value if descending else value)
+
+        return self.take(sorted(range(len(self)), key=key))
+
+    def take(self, indices: Sequence[int]) -> "ResultBatch":
+        result = ResultBatch()
+        for name, values in self._numeric.items():
+            result._numeric[name] = _take(values, indices)
+        for name, column in self._strings.items():
+            result._strings[name] = column.take(indices)
+        return result
+
+    def to_numpy(self) -> Dict[str, Any]:
+        """Dict of NumPy arrays; numeric columns are zero-copy views, strings are decoded object arrays"""
+        try:
+            import numpy as np
+        except ImportError:
+            raise ImportError("ResultBatch.to_numpy() requires numpy") from None
+
+        result: Dict[str, Any] = {
+            name: np.frombuffer(values, dtype=np.dtype(values.typecode)) for name, values in self._numeric.items()
+        }
+        for name, column in self._strings.items():
+            codes = np.frombuffer(column.codes, dtype=np.dtype(column.codes.typecode))
+            result[name] = np.array(column.values, dtype=object)[codes]
+        return result
+
+    def to_arrow(self):
+        """pyarrow.Table; numeric columns and dictionary indices share memory with the batch"""
+        try:
+            import pyarrow as pa
+        except ImportError:
+            raise ImportError("ResultBatch.to_arrow() requires pyarrow") from None
+
+        arrow_types = {"q": pa.int64(), "d": pa.float64(), "i": pa.int32()}
+
+        def wrap(values: array, validity=None):
+            return pa.Array.from_buffers(
+                arrow_types[values.typecode], len(values), [validity, pa.py_buffer(values)]
+            )
+
+        def wrap_strings(column: _DictColumn):
+            values = column.values
+            validity = None
+            if None in values:
+                # Arrow (and Parquet) want missing values as null indices, not as a null dictionary entry
+                null_code = values.index(None)
+                validity = pa.array([code != null_code for code in column.codes], type=pa.bool_()).buffers()[1]
+                values = ["" if value is None else value for value in values]
+            return pa.DictionaryArray.from_arrays(wrap(column.codes, validity), pa.array(values, type=pa.string()))
+
+        arrays = [wrap(values) for values in self._numeric.values()]
+        arrays += [wrap_strings(column) for column in self._strings.values()]
+        return pa.Table.from_arrays(arrays, names=self.columns)
@@ -0,0 +1,224 @@
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+from . import codec
+from .utils import json_default
+
+
+class ImageIdCache:
+    """imageId cache keyed by SHA-256 of image bytes
+    
+    Keeps an in-memory LRU of `max_size` entries and, if `db_path` is given,
+    a SQLite tier that survives restarts and can be shared between processes.
+    Entries older than `ttl` seconds are ignored (ttl=None keeps them forever).
+    """
+
+    def __init__(self, max_size: int = 1024, db_path: Optional[str] = None, ttl: Optional[float] = None):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[str, Tuple[str, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._db = None
+        
+        if db_path:
+            self._db = sqlite3.connect(db_path, check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS image_ids ("
+                "key TEXT PRIMARY KEY, image_id TEXT NOT NULL, created_at REAL NOT NULL)"
+            )
+            self._db.commit()
+
+    @staticmethod
+    def key_for(image_bytes: bytes) -> str:
+        return hashlib.sha256(image_bytes).hexdigest()
+
+    def _is_fresh(self, created_at: float) -> bool:
+        return self.ttl is None or time.time() - created_at < self.ttl
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry and self._is_fresh(entry[1]):
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[0]
+            if entry:
+                del self._entries[key]
+            
+            if self._db is not None:
+                row = self._db.execute(
+                    "SELECT image_id, created_at FROM image_ids WHERE key = ?", (key,)
+                ).fetchone()
+                if row and self._is_fresh(row[1]):
+                    self._remember(key, row[0], row[1])
+                    self.hits += 1
+                    return row[0]
+            
+            self.misses += 1
+            return None
+
+    def set(self, key: str, image_id: str):
+        created_at = time.time()
+        with self._lock:
+            self._remember(key, image_id, created_at)
+            if self._db is not None:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO image_ids (key, image_id, created_at) VALUES (?, ?, ?)",
+                    (key, image_id, created_at)
+                )
+                self._db.commit()
+
+    def _remember(self, key: str, image_id: str, created_at: float):
+        self._entries[key] = (image_id, created_at)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            if self._db is not None:
+                self._db.execute("DELETE FROM image_ids")
+                self._db.commit()
+
+    def close(self):
+        with self._lock:
+            if self._db is not None:
+                self._db.close()
+                self._db = None
+
+    @property
+    def persistent(self) -> bool:
+        """True with a SQLite tier, whose reads and writes may block on disk"""
+        return self._db is not None
+
+    def stats(self) -> Dict[str, int]:
+        return {"hits": self.hits, "misses": self.misses, "size": len(self._entries)}
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class ResultCache:
+    """TTL cache of search results with LRU eviction and optional SQLite tier
+    
+    Entries are fresh for `ttl` seconds. During the following `stale_ttl`
+    seconds they are still returned, but marked stale so the session serves
+    them immediately and refreshes the entry in background
+    (stale-while-revalidate; Sync1688Session does so on a separate session
+    in a worker thread). The SQLite tier at `db_path` can be shared by
+    several processes.
+    """
+
+    def __init__(self, ttl: float = 300, max_size: int = 1024, db_path: Optional[str] = None,
+                 stale_ttl: float = 0):
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.max_size = max_size
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[str, Tuple[List[Dict], float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._db = None
+        
+        if db_path:
+            self._db = sqlite3.connect(db_path, timeout=30, check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS results ("
+                "key TEXT PRIMARY KEY, products TEXT NOT NULL, created_at REAL NOT NULL)"
+            )
+            self._db.commit()
+
+    @staticmethod
+    def make_key(search_type: str, query: str, page: int = 1, filters: Optional[Dict[str, Any]] = None) -> str:
+        return json.dumps([search_type, query, page, filters or {}], ensure_ascii=False, sort_keys=True)
+
+    def get(self, key: str) -> Optional[Tuple[List[Dict], bool]]:
+        """Return (products, is_fresh) or None if there is no usable entry
+
+        products is a new list each time; the offers in it are shared with the
+        cache and must not be modified in place.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None and self._db is not None:
+                row = self._db.execute(
+                    "SELECT products, created_at FROM results WHERE key = ?", (key,)
+                ).fetchone()
+                if row:
+                    entry = (codec.loads(row[0]), row[1])
+                    self._remember(key, *entry)
+            
+            if entry is None:
+                self.misses += 1
+                return None
+            
+            products, created_at = entry
+            age = time.time() - created_at
+            if age < self.ttl:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return list(products), True
+            if age < self.ttl + self.stale_ttl:
+                self._entries.move_to_end(key)
+                self.stale_hits += 1
+                return list(products), False
+            
+            del self._entries[key]
+            self.misses += 1
+            return None
+
+    def set(self, key: str, products: List[Dict]):
+        created_at = time.time()
+        with self._lock:
+            # A copy, so the caller appending to or sorting its list doesn't change the entry
+            self._remember(key, list(products), created_at)
+            if self._db is not None:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO results (key, products, created_at) VALUES (?, ?, ?)",
+                    (key, json.dumps(products, ensure_ascii=False, default=json_default), created_at)
+                )
+                self._db.commit()
+
+    def _remember(self, key: str, products: List[Dict], created_at: float):
+        self._entries[key] = (products, created_at)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            if self._db is not None:
+                self._db.execute("DELETE FROM results")
+                self._db.commit()
+
+    def close(self):
+        with self._lock:
+            if self._db is not None:
+                self._db.close()
+                self._db = None
+
+    @property
+    def persistent(self) -> bool:
+        """True with a SQLite tier, whose reads and writes may block on disk"""
+        return self._db is not None
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "hits": self.hits,
+            "stale_hits": self.stale_hits,
+            "misses": self.misses,
+            "size": len(self._entries)
+        }
+
+    def __len__(self) -> int:
+        return len(self._entries)
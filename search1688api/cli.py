@@ -0,0 +1,234 @@
+import argparse
+import asyncio
+import contextlib
+import os
+import sys
+import time
+from typing import List, Optional, TextIO
+
+from .async_session import Async1688Session
+from .cache import ImageIdCache, ResultCache
+from .errors import Search1688Error
+from .imageprep import ImagePreprocessor
+from .looplag import LoopLagMonitor
+from .ratelimit import AdaptiveRateLimiter
+from .retry import RetryPolicy
+from .sinks import NDJSONSink
+
+
+def read_queries(source: TextIO) -> List[str]:
+    """One keyword or image path per line; blank lines and # comments are skipped"""
+    queries = []
+    for line in source:
+        line = line.strip()
+        if line and not line.startswith("#"):
+            queries.append(line)
+    return queries
+
+
+def percentile(sorted_values: List[float], fraction: float) -> float:
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(round(fraction * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+class SessionStartError(Exception):
+    """The session could be neither restored from --state nor bootstrapped"""
+
+
+class HarvestStats:
+    """Counters and page latencies of one harvest run"""
+
+    def __init__(self, total_queries: int):
+        self.total_queries = total_queries
+        self.done = 0
+        self.failed = 0
+        self.pages = 0
+        self.offers = 0
+        self.latencies: List[float] = []  # Seconds spent waiting for each page
+        self.loop_lag = LoopLagMonitor()  # Started by harvest(), shows whether the event loop keeps up
+        self.started = time.monotonic()
+
+    def record_page(self, latency: float, offers: int):
+        self.pages += 1
+        self.offers += offers
+        self.latencies.append(latency)
+
+    def record_query(self, ok: bool):
+        self.done += 1
+        if not ok:
+            self.failed += 1
+
+    def line(self) -> str:
+        elapsed = max(time.monotonic() - self.started, 1e-9)
+        latencies = sorted(self.latencies)
+        return (
+            f"[{elapsed:7.1f}s] queries {self.done}/{self.total_queries} (failed {self.failed}) "
+            f"pages {self.pages} offers {self.offers} | "
+            f"{self.pages / elapsed:.2f} pages/s {self.offers / elapsed:.1f} offers/s "
+            f"p50 {percentile(latencies, 0.5):.2f}s p95 {percentile(latencies, 0.95):.2f}s | "
+            f"loop lag p99 {self.loop_lag.percentile(0.99) * 1000:.0f}ms max {self.loop_lag.max * 1000:.0f}ms"
+        )
+
+
+def positive_int(value: str) -> int:
+    """argparse type for counts that must be at least 1"""
+    number = int(value)
+    if number < 1:
+        raise argparse.ArgumentTypeError(f"must be at least 1, got {value}")
+    return number
+
+
+def positive_float(value: str) -> float:
+    """argparse type for rates and durations that must be above 0"""
+    number = float(value)
+    if not number > 0:
+        raise argparse.ArgumentTypeError(f"must be greater than 0, got {value}")
+    return number
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog="search1688",
+        description="Harvest 1688.com offers for many keywords or images into NDJSON",
+        epilog="Exit status is 1 if any query failed or the session could not be started. "
+               "Progress and stats go to stderr."
+    )
+    parser.add_argument("mode", choices=["text", "image"], help="search by keywords or by image files")
+    parser.add_argument("-i", "--input", default="-", help="file with one query per line (default: stdin)")
+    parser.add_argument("-o", "--output", default="-", help="NDJSON output file (default: stdout)")
+    parser.add_argument("--gzip", action="store_true", help="gzip the output (implied by a .gz output name)")
+    parser.add_argument("-c", "--concurrency", type=positive_int, default=8, help="queries searched at once (default: 8)")
+    parser.add_argument("-p", "--pages", type=positive_int, default=1, help="pages per query (default: 1)")
+    parser.add_argument("--page-size", type=positive_int, default=60, help="offers per page (default: 60)")
+    parser.add_argument("--fields", help="comma-separated offer fields to keep, e.g. offerId,title,priceInfo.price")
+    parser.add_argument("--rate", type=positive_float, help="initial requests/s per host, adapted on throttling")
+    parser.add_argument("--max-rate", type=positive_float, default=50.0, help="upper bound for --rate (default: 50)")
+    parser.add_argument("--cache", help="SQLite file for imageId and result caches")
+    parser.add_argument("--cache-ttl", type=positive_float, default=3600, help="result cache TTL in seconds (default: 3600)")
+    parser.add_argument("--max-edge", type=positive_int,
+                        help="image mode: shrink images to this many pixels and re-encode as JPEG (needs Pillow)")
+    parser.add_argument("--state", help="session state file, reused if valid and saved on exit")
+    parser.add_argument("--retries", type=positive_int, default=3, help="attempts per request for transient errors (default: 3)")
+    parser.add_argument("--progress", type=float, default=5.0,
+                        help="seconds between progress lines on stderr, 0 disables (default: 5)")
+    parser.add_argument("--debug", action="store_true", help="print session debug output to stderr")
+    return parser
+
+
+def _log(message: str):
+    print(message, file=sys.stderr, flush=True)
+
+
+async def _open_session(args, **session_kwargs) -> Async1688Session:
+    try:
+        if args.state and os.path.exists(args.state):
+            return await Async1688Session.from_state(args.state, **session_kwargs)
+
+        session = Async1688Session(**session_kwargs)
+        try:
+            await session.start()
+        except Exception:
+            await session.close()
+            raise
+        return session
+    except Exception as e:
+        raise SessionStartError(str(e)) from e
+
+
+async def harvest(args, queries: List[str], sink: NDJSONSink) -> HarvestStats:
+    stats = HarvestStats(len(queries))
+    fields = [field.strip() for field in args.fields.split(",")] if args.fields else None
+
+    session_kwargs = {
+        "debug": args.debug,
+        "retry_policy": RetryPolicy(max_attempts=args.retries),
+        "raise_errors": True,
+    }
+    if args.rate:
+        session_kwargs["rate_limiter"] = AdaptiveRateLimiter(
+            rate=args.rate, burst=max(1.0, args.rate),
+            min_rate=min(0.2, args.rate), max_rate=max(args.rate, args.max_rate)
+        )
+    if args.cache:
+        session_kwargs["result_cache"] = ResultCache(ttl=args.cache_ttl, db_path=args.cache)
+        session_kwargs["image_id_cache"] = ImageIdCache(db_path=args.cache)
+    preprocessor = None
+    if args.max_edge and args.mode == "image":
+        preprocessor = session_kwargs["image_preprocessor"] = ImagePreprocessor(max_edge=args.max_edge)
+
+    session = await _open_session(args, **session_kwargs)
+    pending = iter(queries)
+
+    async def worker():
+        for query in pending:
+            if args.mode == "text":
+                pages = session.search_by_text_iter(query, args.pages, args.page_size, fields=fields)
+            else:
+                pages = session.search_by_image_iter(query, args.pages, args.page_size, fields=fields)
+
+            try:
+                requested = time.monotonic()
+                async for products in pages:
+                    stats.record_page(time.monotonic() - requested, len(products))
+                    sink.write_page(products, query)
+                    requested = time.monotonic()
+                stats.record_query(True)
+            except Search1688Error as e:
+                stats.record_query(False)
+                _log(f"{query!r} failed: {type(e).__name__}: {e}")
+
+    async def report():
+        while True:
+            await asyncio.sleep(args.progress)
+            _log(stats.line())
+
+    reporter = asyncio.ensure_future(report()) if args.progress > 0 else None
+    stats.loop_lag.start()
+    try:
+        await asyncio.gather(*(worker() for _ in range(max(1, args.concurrency))))
+    finally:
+        if reporter is not None:
+            reporter.cancel()
+        await stats.loop_lag.stop()
+        if args.state:
+            session.save_state(args.state)
+        await session.close()
+        if preprocessor is not None:
+            _log(f"preprocessed {preprocessor.images} images, {preprocessor.bytes_saved / 2 ** 20:.1f} MiB saved")
+    return stats
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = build_parser().parse_args(argv)
+
+    if args.input == "-":
+        queries = read_queries(sys.stdin)
+    else:
+        with open(args.input, encoding="utf-8") as source:
+            queries = read_queries(source)
+    if not queries:
+        _log("No queries in input, nothing to do")
+        return 0
+
+    compress = args.gzip or args.output.endswith(".gz")
+    output = sys.stdout.buffer if args.output == "-" else args.output
+
+    # Session debug output uses print(), keep it out of the NDJSON stream
+    with NDJSONSink(output, compress=compress, query_key="query") as sink, contextlib.redirect_stdout(sys.stderr):
+        try:
+            stats = asyncio.run(harvest(args, queries, sink))
+        except KeyboardInterrupt:
+            _log("Interrupted, output is complete up to the last written page")
+            return 130
+        except SessionStartError as e:
+            _log(f"Could not start session: {e}")
+            return 1
+
+    _log(stats.line())
+    return 1 if stats.failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,57 @@
+import json
+from typing import Any, Union
+
+
+def _load_backend():
+    """(name, loads, whether loads takes a memoryview as is)"""
+    try:
+        import orjson
+    except ImportError:
+        pass
+    else:
+        return "orjson", orjson.loads, True
+
+    try:
+        import msgspec
+    except ImportError:
+        pass
+    else:
+        return "msgspec", msgspec.json.Decoder().decode, True
+
+    try:
+        import ujson
+    except ImportError:
+        pass
+    else:
+        return "ujson", ujson.loads, False
+
+    return "json", json.loads, False
+
+
+# Decoding uses orjson, msgspec or ujson when installed, else the stdlib.
+# Encoding always uses the stdlib: request data strings are signed, so they
+# must match json.dumps(obj, ensure_ascii=False) byte for byte, and the only
+# objects encoded are small params dicts, where the stdlib is fastest anyway.
+BACKEND, _loads, BYTES_NATIVE = _load_backend()
+
+
+def loads(data: Union[bytes, bytearray, memoryview, str]) -> Any:
+    """Parse JSON text or UTF-8 bytes; raises ValueError on invalid input"""
+    if isinstance(data, memoryview) and not BYTES_NATIVE:
+        data = data.tobytes()
+    try:
+        return _loads(data)
+    except ValueError:
+        raise
+    except Exception as e:
+        # Backend-specific errors (msgspec.DecodeError is a ValueError, others may not be)
+        raise ValueError(str(e)) from e
+
+
+# json.dumps() builds a new encoder whenever an option differs from the defaults
+_encoder = json.JSONEncoder(ensure_ascii=False)
+
+
+def dumps(obj: Any) -> str:
+    """json.dumps(obj, ensure_ascii=False), the form request data strings are signed in"""
+    return _encoder.encode(obj)
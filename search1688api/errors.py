@@ -0,0 +1,78 @@
+from typing import List, Optional
+
+
+class Search1688Error(Exception):
+    """Base class for all search failures
+
+    `retryable` tells RetryPolicy whether repeating the same request may
+    succeed.
+    """
+    retryable = False
+
+
+class NetworkError(Search1688Error):
+    """Connection error or timeout before a response was received"""
+    retryable = True
+
+
+class HTTPStatusError(Search1688Error):
+    """Response with an unexpected HTTP status"""
+
+    # 408/429 and gateway errors are transient, everything else is not
+    RETRYABLE_STATUSES = (408, 429, 500, 502, 503, 504)
+
+    def __init__(self, status: int, url: str = "", retry_after: Optional[float] = None):
+        super().__init__(f"HTTP {status} for {url}" if url else f"HTTP {status}")
+        self.status = status
+        self.url = url
+        self.retry_after = retry_after  # Seconds from Retry-After header, if any
+
+    @property
+    def retryable(self) -> bool:
+        return self.status in self.RETRYABLE_STATUSES
+
+
+class JSONPParseError(Search1688Error):
+    """Response body is not a parsable mtop JSONP payload
+
+    Usually a truncated or interrupted response, so it is retried.
+    """
+    retryable = True
+
+
+class ImageReadError(Search1688Error, ValueError):
+    """Image file could not be read"""
+
+
+class MtopError(Search1688Error):
+    """mtop API answered with a non-SUCCESS "ret" """
+
+    def __init__(self, ret: List[str]):
+        self.ret = list(ret or [])
+        super().__init__(", ".join(str(code) for code in self.ret) or "Unknown mtop error")
+
+    @property
+    def code(self) -> str:
+        """Error code without the "::message" part"""
+        return str(self.ret[0]).split("::")[0] if self.ret else ""
+
+
+class TokenError(MtopError):
+    """Signing token is missing, expired or rejected
+
+    Fixed by refreshing the token, which the sessions do before retrying.
+    """
+    retryable = True
+
+
+class ThrottledError(MtopError):
+    """mtop flow control: the API asks to slow down"""
+    retryable = True
+
+
+class ValidationError(MtopError):
+    """Anti-bot slider/captcha validation; retrying the same identity won't help"""
+
+
+class BusinessError(MtopError):
+    """Any other mtop error, e.g. invalid parameters"""
@@ -0,0 +1,80 @@
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, Dict, Iterable, List, Optional
+
+from .pool import SyncSessionPool
+from .sync_session import Sync1688Session
+from .utils import ImageSource
+
+
+class ThreadedSearchExecutor:
+    """Run Sync1688Session searches in parallel worker threads
+
+    Sync1688Session mutates its cookies and token on every call, so it must
+    not be shared between threads. The executor keeps a SyncSessionPool with
+    one identity per worker; every task borrows an idle identity for the
+    duration of one search. Extra keyword arguments go to every session.
+
+        with ThreadedSearchExecutor(max_workers=8, debug=False) as executor:
+            futures = executor.search_many_text(["phone case", "usb cable"])
+            for future in as_completed(futures):
+                products = future.result()
+    """
+
+    def __init__(self, max_workers: int = 4,
+                 session_factory: Optional[Callable[[], Sync1688Session]] = None, **session_kwargs):
+        self.max_workers = max_workers
+        self._pool = SyncSessionPool(size=max_workers, session_factory=session_factory, **session_kwargs)
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._lock = threading.Lock()
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.shutdown()
+
+    def start(self):
+        with self._lock:
+            self._start()
+
+    def _start(self):
+        # Called with self._lock held
+        if self._executor is not None:
+            return
+        self._pool.start()
+        self._executor = ThreadPoolExecutor(
+            max_workers=self.max_workers, thread_name_prefix="search1688"
+        )
+
+    def shutdown(self, wait: bool = True):
+        with self._lock:
+            if self._executor is None:
+                return
+            self._executor.shutdown(wait=wait)
+            self._executor = None
+            self._pool.close()
+
+    def submit_text(self, keywords: str) -> "Future[List[Dict]]":
+        return self._submit(self._pool.search_by_text, keywords)
+
+    def submit_image(self, image_path: ImageSource) -> "Future[List[Dict]]":
+        return self._submit(self._pool.search_by_image, image_path)
+
+    def search_many_text(self, keywords: Iterable[str]) -> List["Future[List[Dict]]"]:
+        """Submit every keyword, futures come back in input order"""
+        return [self.submit_text(keyword) for keyword in keywords]
+
+    def search_many_images(self, image_paths: Iterable[ImageSource]) -> List["Future[List[Dict]]"]:
+        """Submit every image, futures come back in input order"""
+        return [self.submit_image(image_path) for image_path in image_paths]
+
+    def _submit(self, search: Callable[[str], List[Dict]], query: str) -> "Future[List[Dict]]":
+        # Checked and submitted under the lock, so a concurrent shutdown() can't slip in between
+        with self._lock:
+            self._start()
+            return self._executor.submit(search, query)
+
+    def stats(self):
+        return self._pool.stats()
@@ -0,0 +1,188 @@
+import codecs
+import json
+import re
+from typing import Dict, List, Optional
+
+from .utils import OBJECT_CLOSE, OFFER_DATA_ASSIGNMENT, OFFER_DATA_MARKER, decode_object_at
+
+# Pages are read up to this many bytes when the offer data hasn't turned up
+DEFAULT_MAX_BYTES = 4 * 1024 * 1024
+
+# Text kept after a marker while waiting for the rest of its assignment
+_ASSIGNMENT_LOOKAHEAD = 64
+
+# A strict parse is only tried once OBJECT_CLOSE has arrived
+_CLOSE_OVERLAP = 64
+
+# A strict parse failing this close to the end of the text (a cut "true" or "\u4e2d") or in a string
+# running to the end means the rest hasn't arrived yet
+_TRUNCATION_MARGIN = 16
+
+# JSON strings (group 1 is None while the closing quote hasn't arrived yet) and brackets
+_STREAM_TOKEN = re.compile(r'"[^"\\]*(?:\\.[^"\\]*)*(?:(")|\\?\Z)|[{}\[\]]')
+
+_json_decoder = json.JSONDecoder()
+
+
+def content_type_charset(content_type: Optional[str], default: str = "utf-8") -> str:
+    """Charset of a Content-Type header; unlike requests, text/html without one isn't taken as latin-1"""
+    for parameter in (content_type or "").split(";")[1:]:
+        name, _, value = parameter.partition("=")
+        if name.strip().lower() == "charset" and value.strip(' "'):
+            return value.strip(' "')
+    return default
+
+
+class OfferDataScanner:
+    """Finds the offerresultData object in a search page fed chunk by chunk
+
+    feed() returns True as soon as the object is complete and parsed into
+    `data`, so the rest of the page doesn't need to be downloaded. Until
+    the marker is seen only a few bytes of the page are kept, afterwards
+    only the object itself. Chunks are decoded incrementally with the
+    page's charset (multi-byte GBK characters may contain bracket bytes).
+
+    The object is parsed strictly whenever its closing "})" may have
+    arrived; only if it isn't strict JSON (trailing commas) its end is
+    tracked token by token and the commas are repaired.
+    """
+
+    def __init__(self, encoding: str = "utf-8"):
+        try:
+            decoder_class = codecs.getincrementaldecoder(encoding)
+        except LookupError:
+            decoder_class = codecs.getincrementaldecoder("utf-8")
+        self._decoder = decoder_class(errors="replace")
+        self._text = ""  # Page text while looking for the marker
+        self._chunks: List[str] = []  # Once located, the text from the object's "{" on
+        self._size = 0
+        self._located = False
+        self._checked = 0  # OBJECT_CLOSE was searched (or a strict parse failed) up to here
+        self._tokenize = False
+        self._scan_pos = 0
+        self._depth = 0
+        self._parsed: Optional[Dict] = None
+        self.bytes_read = 0
+        self.data: Optional[Dict] = None
+
+    def feed(self, chunk: bytes) -> bool:
+        self.bytes_read += len(chunk)
+        self._append(self._decoder.decode(chunk))
+        return self._scan(final=False)
+
+    def finish(self) -> Optional[Dict]:
+        """Call at the end of the page (or when giving up on it), returns `data`"""
+        if self.data is None:
+            self._append(self._decoder.decode(b"", final=True))
+            self._scan(final=True)
+        return self.data
+
+    def _append(self, text: str):
+        if not self._located:
+            # Trimmed to a few bytes by _locate(), so this stays cheap
+            self._text += text
+        elif text:
+            # Joined only when a parse is attempted, not once per chunk
+            self._chunks.append(text)
+            self._size += len(text)
+
+    def _join(self) -> str:
+        text = "".join(self._chunks)
+        self._chunks = [text]
+        return text
+
+    def _tail(self, start: int) -> str:
+        """Object text from offset `start` on, joining only the chunks it spans"""
+        parts = []
+        offset = self._size
+        for chunk in reversed(self._chunks):
+            if offset <= start:
+                break
+            offset -= len(chunk)
+            parts.append(chunk)
+        return "".join(reversed(parts))[start - offset:]
+
+    def _scan(self, final: bool) -> bool:
+        while self.data is None:
+            if not self._located and not self._locate(final):
+                return False
+            end = self._object_end(final)
+            if end is None:
+                return False
+
+            text = self._join()
+            self.data = self._parsed if self._parsed is not None else decode_object_at(text, 0, end)
+            # Not valid JSON after all; look for the next marker after it
+            self._text = "" if self.data is not None else text[end:]
+            self._chunks, self._size = [], 0
+            self._located = False
+        return True
+
+    def _locate(self, final: bool) -> bool:
+        text = self._text
+        position = text.find(OFFER_DATA_MARKER)
+        while position != -1:
+            after = position + len(OFFER_DATA_MARKER)
+            match = OFFER_DATA_ASSIGNMENT.match(text, after)
+            if match:
+                # Drop everything before the object
+                self._chunks = [text[match.end():]]
+                self._size = len(self._chunks[0])
+                self._text = ""
+                self._located, self._tokenize, self._parsed = True, False, None
+                self._checked = self._scan_pos = self._depth = 0
+                return True
+            if not final and len(text) - after < _ASSIGNMENT_LOOKAHEAD:
+                # The rest of the assignment may still be on its way
+                self._text = text[position:]
+                return False
+            position = text.find(OFFER_DATA_MARKER, after)
+
+        # Only a marker split across chunks needs to survive
+        self._text = text[-(len(OFFER_DATA_MARKER) - 1):]
+        return False
+
+    def _object_end(self, final: bool) -> Optional[int]:
+        """Offset just past the object, None while it is incomplete"""
+        if self._tokenize:
+            return self._find_end()
+
+        if not final:
+            closes = list(OBJECT_CLOSE.finditer(self._tail(self._checked)))
+            if not closes:
+                self._checked = max(self._checked, self._size - _CLOSE_OVERLAP)
+                return None
+
+        text = self._join()
+        try:
+            self._parsed, end = _json_decoder.raw_decode(text)
+            return end
+        except json.JSONDecodeError as e:
+            if not final and (e.pos >= len(text) - _TRUNCATION_MARGIN or e.msg.startswith("Unterminated string")):
+                # A "})" inside the object; retried once another one arrives past it
+                self._checked += closes[-1].end()
+                return None
+        # Not strict JSON, follow it token by token from now on
+        self._tokenize = True
+        return self._find_end()
+
+    def _find_end(self) -> Optional[int]:
+        # Only the text not tokenized yet, offsets are relative to _scan_pos
+        base = self._scan_pos
+        text = self._tail(base)
+        depth = self._depth
+        for token in _STREAM_TOKEN.finditer(text):
+            value = token.group()
+            if value[0] == '"':
+                if token.group(1) is None:
+                    # Rescan the unfinished string once more text has arrived
+                    self._scan_pos, self._depth = base + token.start(), depth
+                    return None
+            elif value == "{" or value == "[":
+                depth += 1
+            else:
+                depth -= 1
+                if depth == 0:
+                    return base + token.end()
+        self._scan_pos, self._depth = self._size, depth
+        return None
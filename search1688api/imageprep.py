@@ -0,0 +1,106 @@
+import io
+import threading
+from typing import Any, Dict, Union
+
+
+class ImagePreprocessor:
+    """Downscales and re-encodes images before upload (requires Pillow)
+
+    Images larger than `max_edge` pixels on their longer side are resized,
+    EXIF orientation is applied and all metadata dropped, and the result is
+    encoded as `format` ("JPEG" or "WEBP") at `quality`. If that doesn't
+    make the image smaller the original is uploaded; so is anything Pillow
+    can't open. Image search doesn't need more than ~1000 px.
+
+        preprocessor = ImagePreprocessor(max_edge = 1000)
+        session = Sync1688Session(image_preprocessor = preprocessor)
+        ...
+        print(preprocessor.stats())
+
+    Instances can be shared between sessions and threads, and process()
+    can run in a ProcessPoolExecutor (the async session's image_executor).
+    """
+
+    def __init__(self, max_edge: int = 1000, format: str = "JPEG", quality: int = 85):
+        try:
+            import PIL.Image
+        except ImportError:
+            raise ImportError("ImagePreprocessor requires Pillow") from None
+
+        format = format.upper()
+        if format not in ("JPEG", "WEBP"):
+            raise ValueError("format must be JPEG or WEBP")
+
+        self.max_edge = max_edge
+        self.format = format
+        self.quality = quality
+        self.images = 0
+        self.bytes_in = 0
+        self.bytes_out = 0
+        self._lock = threading.Lock()
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        del state["_lock"]
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+
+    def __call__(self, image_bytes: Union[bytes, memoryview]) -> Union[bytes, memoryview]:
+        result = self.process(image_bytes)
+        self.record(len(image_bytes), len(result))
+        return result
+
+    def process(self, image_bytes: Union[bytes, memoryview]) -> Union[bytes, memoryview]:
+        """Re-encoded image, or image_bytes itself if that isn't smaller"""
+        from PIL import Image, ImageOps
+
+        try:
+            image = Image.open(io.BytesIO(image_bytes))
+            if image.format == "JPEG":
+                # Let the JPEG decoder skip detail that resizing would throw away anyway
+                image.draft("RGB", (self.max_edge, self.max_edge))
+            image = ImageOps.exif_transpose(image)
+            image.thumbnail((self.max_edge, self.max_edge), Image.LANCZOS)
+
+            if self.format == "JPEG" and image.mode != "RGB":
+                if image.mode in ("RGBA", "LA", "P"):
+                    # Transparent areas become white instead of black
+                    image = image.convert("RGBA")
+                    background = Image.new("RGB", image.size, (255, 255, 255))
+                    background.paste(image, mask=image.getchannel("A"))
+                    image = background
+                else:
+                    image = image.convert("RGB")
+            elif self.format == "WEBP" and image.mode not in ("RGB", "RGBA"):
+                image = image.convert("RGBA" if "A" in image.getbands() or image.mode == "P" else "RGB")
+
+            output = io.BytesIO()
+            # Saved without exif=/icc_profile=, so no metadata is carried over
+            image.save(output, self.format, quality=self.quality, optimize=True)
+        except (OSError, ValueError, Image.DecompressionBombError):
+            return image_bytes
+
+        if output.tell() >= len(image_bytes):
+            return image_bytes
+        return output.getvalue()
+
+    def record(self, size_in: int, size_out: int):
+        with self._lock:
+            self.images += 1
+            self.bytes_in += size_in
+            self.bytes_out += size_out
+
+    @property
+    def bytes_saved(self) -> int:
+        return self.bytes_in - self.bytes_out
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "images": self.images,
+            "bytes_in": self.bytes_in,
+            "bytes_out": self.bytes_out,
+            "bytes_saved": self.bytes_saved,
+        }
@@ -0,0 +1,86 @@
+import json
+from typing import Dict, Union
+
+from . import codec
+from .errors import JSONPParseError
+
+CALLBACK_PREFIX = b"mtopjsonp"
+
+# The callback name ("mtopjsonp12") and the opening "(" are within the first bytes
+_HEAD_SIZE = 128
+_WHITESPACE = " \t\r\n"
+
+_decoder = json.JSONDecoder()
+
+
+def jsonp_start(body: Union[bytes, bytearray, memoryview]) -> int:
+    """Offset of the JSON object inside an mtopjsonp callback
+
+    Only the first bytes of the body are looked at, the payload itself is
+    neither scanned nor copied.
+    """
+    head = bytes(body[:_HEAD_SIZE])
+    prefix = head.find(CALLBACK_PREFIX)
+    if prefix == -1 or head[:prefix].strip():
+        raise JSONPParseError("Invalid JSONP response format")
+
+    paren = head.find(b"(", prefix)
+    start = head.find(b"{", paren) if paren != -1 else -1
+    if start == -1 or head[paren + 1:start].strip():
+        raise JSONPParseError("No JSON object in JSONP response")
+    return start
+
+
+def _jsonp_end(body: Union[bytes, bytearray, memoryview]) -> int:
+    """End offset of the JSON object, found by looking only at the last bytes"""
+    tail_start = max(0, len(body) - _HEAD_SIZE)
+    tail = bytes(body[tail_start:])
+    close = tail.rfind(b"}")
+    if close == -1 or not tail[close + 1:].strip().startswith(b")"):
+        raise JSONPParseError("Unterminated JSONP callback")
+    return tail_start + close + 1
+
+
+def decode_jsonp(body: Union[bytes, bytearray, memoryview, str]) -> Dict:
+    """Parse an mtopjsonp callback straight from the response body
+
+    With a bytes-native JSON backend (orjson, msgspec) the object is parsed
+    from a memoryview of the body without any copy. Otherwise the body is
+    decoded to text once and the object is parsed in place from its offset
+    (JSONDecoder.raw_decode) instead of slicing out a second copy.
+    str bodies are accepted as well.
+    """
+    if not body:
+        raise JSONPParseError("Invalid JSONP response format")
+
+    if isinstance(body, str):
+        # Everything before the object is ASCII, so byte and character offsets agree
+        start = jsonp_start(body[:_HEAD_SIZE].encode("utf-8", "replace"))
+        text = body
+    else:
+        start = jsonp_start(body)
+        if codec.BYTES_NATIVE:
+            end = _jsonp_end(body)
+            try:
+                result = codec.loads(memoryview(body)[start:end])
+            except ValueError:
+                # Invalid UTF-8 is replaced below rather than rejected
+                pass
+            else:
+                if not isinstance(result, dict):
+                    raise JSONPParseError("JSONP payload is not an object")
+                return result
+        text = str(body, "utf-8", "replace")
+
+    try:
+        result, end = _decoder.raw_decode(text, start)
+    except json.JSONDecodeError as e:
+        raise JSONPParseError(f"JSON decode error: {e}") from e
+
+    # Only ")" and an optional ";" may follow the object
+    tail = text[end:end + _HEAD_SIZE].strip(_WHITESPACE)
+    if not tail.startswith(")"):
+        raise JSONPParseError("Unterminated JSONP callback")
+    if not isinstance(result, dict):
+        raise JSONPParseError("JSONP payload is not an object")
+    return result
@@ -0,0 +1,75 @@
+import asyncio
+import time
+from collections import deque
+from typing import Deque, Dict, Optional
+
+
+class LoopLagMonitor:
+    """Measures how late the event loop wakes up a sleeping task
+
+    Every `interval` seconds a background task sleeps and records how much
+    later than requested it was resumed. Anything that blocks the loop
+    (file reads, base64, decoding a large page) shows up as lag for every
+    other coroutine; a responsive loop stays at a fraction of a millisecond.
+
+        async with LoopLagMonitor() as monitor:
+            await session.search_many_images(paths)
+        print(monitor.stats())  # seconds: {'samples': ..., 'p50': ..., 'p99': ..., 'max': ...}
+
+    The last `window` samples are kept for percentiles; `max` covers the
+    whole run.
+    """
+
+    def __init__(self, interval: float = 0.01, window: int = 10000):
+        self.interval = interval
+        self.samples: Deque[float] = deque(maxlen=window)
+        self.count = 0
+        self.max = 0.0
+        self._task: Optional[asyncio.Task] = None
+
+    async def __aenter__(self):
+        self.start()
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.stop()
+
+    def start(self):
+        """Start sampling on the running loop"""
+        if self._task is None:
+            self._task = asyncio.ensure_future(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self):
+        while True:
+            started = time.perf_counter()
+            await asyncio.sleep(self.interval)
+            self.record(max(0.0, time.perf_counter() - started - self.interval))
+
+    def record(self, lag: float):
+        self.samples.append(lag)
+        self.count += 1
+        if lag > self.max:
+            self.max = lag
+
+    def percentile(self, fraction: float) -> float:
+        if not self.samples:
+            return 0.0
+        ordered = sorted(self.samples)
+        return ordered[min(len(ordered) - 1, int(round(fraction * (len(ordered) - 1))))]
+
+    def stats(self) -> Dict[str, float]:
+        return {
+            "samples": self.count,
+            "p50": self.percentile(0.5),
+            "p99": self.percentile(0.99),
+            "max": self.max,
+        }
@@ -0,0 +1,102 @@
+import json
+import sys
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple
+
+from . import codec
+
+
+class SearchResult(NamedTuple):
+    """Outcome of one query in a bulk search"""
+    query: Any
+    products: List[Dict]
+    error: Optional[BaseException] = None
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+
+class Offer:
+    """Compact record of one offer from data.data.OFFER.items
+
+    Keeps only the commonly used fields in __slots__ instead of the whole
+    (very wide) item dict. Province and city are interned, they repeat
+    across offers. With keep_raw=True the original item is kept as UTF-8
+    JSON bytes and decoded again on every `raw` access.
+
+        session = Sync1688Session(offer_factory=Offer.from_item)
+    """
+
+    __slots__ = (
+        "offer_id", "title", "price", "shop", "province", "city",
+        "sale_quantity", "booked_count", "tags", "_raw"
+    )
+
+    def __init__(self, offer_id: Any = None, title: Optional[str] = None, price: Any = None,
+                 shop: Optional[str] = None, province: Optional[str] = None, city: Optional[str] = None,
+                 sale_quantity: Any = None, booked_count: Any = None, tags: Tuple[str, ...] = (),
+                 raw: Optional[bytes] = None):
+        self.offer_id = offer_id
+        self.title = title
+        self.price = price
+        self.shop = shop
+        self.province = sys.intern(province) if isinstance(province, str) else province
+        self.city = sys.intern(city) if isinstance(city, str) else city
+        self.sale_quantity = sale_quantity
+        self.booked_count = booked_count
+        self.tags = tags
+        self._raw = raw
+
+    @classmethod
+    def from_item(cls, item: Dict, keep_raw: bool = False) -> "Offer":
+        """Build from one API item, fields are read from item["data"]"""
+        data = item.get("data", item)
+        price_info = data.get("priceInfo")
+        shop_addition = data.get("shopAddition")
+
+        return cls(
+            offer_id=data.get("offerId"),
+            title=data.get("title"),
+            price=price_info.get("price") if isinstance(price_info, dict) else None,
+            shop=shop_addition.get("text") if isinstance(shop_addition, dict) else None,
+            province=data.get("province"),
+            city=data.get("city"),
+            sale_quantity=data.get("saleQuantity"),
+            booked_count=data.get("bookedCount"),
+            tags=tuple(tag.get("text", "") for tag in data.get("tags") or () if isinstance(tag, dict)),
+            raw=json.dumps(item, ensure_ascii=False).encode("utf-8") if keep_raw else None
+        )
+
+    @property
+    def raw(self) -> Optional[Dict]:
+        """Original item, or None if it was not kept"""
+        if self._raw is None:
+            return None
+        return codec.loads(self._raw)
+
+    def to_dict(self) -> Dict:
+        """Original item if kept, otherwise an item-shaped dict of the compact fields"""
+        if self._raw is not None:
+            return codec.loads(self._raw)
+
+        return {
+            "data": {
+                "offerId": self.offer_id,
+                "title": self.title,
+                "priceInfo": {"price": self.price},
+                "shopAddition": {"text": self.shop},
+                "province": self.province,
+                "city": self.city,
+                "saleQuantity": self.sale_quantity,
+                "bookedCount": self.booked_count,
+                "tags": [{"text": tag} for tag in self.tags]
+            }
+        }
+
+    def __eq__(self, other):
+        if not isinstance(other, Offer):
+            return NotImplemented
+        return all(getattr(self, name) == getattr(other, name) for name in self.__slots__)
+
+    def __repr__(self):
+        return f"Offer(offer_id={self.offer_id!r}, title={self.title!r}, price={self.price!r})"
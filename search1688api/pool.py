@@ -0,0 +1,317 @@
+import asyncio
+import threading
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+from .async_session import Async1688Session
+from .sync_session import Sync1688Session
+from .utils import ImageSource
+
+
+class _PoolMember:
+    """One session identity inside a pool"""
+
+    def __init__(self, index: int, session):
+        self.index = index
+        self.session = session
+        self.in_flight = 0
+        self.strikes = 0  # Consecutive requests that ran into anti-bot responses
+        self.healthy = True
+        self.requests = 0
+        self.rebootstraps = 0
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "index": self.index,
+            "healthy": self.healthy,
+            "in_flight": self.in_flight,
+            "requests": self.requests,
+            "strikes": self.strikes,
+            "rebootstraps": self.rebootstraps
+        }
+
+
+class SessionPool:
+    """Pool of independently bootstrapped Async1688Session identities
+
+    Each member has its own cookie jar and token. Searches go to the
+    least-loaded healthy member; a member that gets `max_strikes` anti-bot
+    responses in a row is retired and re-bootstrapped in background.
+    Extra keyword arguments are passed to every Async1688Session.
+    """
+
+    def __init__(self, size: int = 4, max_strikes: int = 2,
+                 session_factory: Optional[Callable[[], Async1688Session]] = None, **session_kwargs):
+        if size < 1:
+            raise ValueError("size must be at least 1")
+
+        self.size = size
+        self.max_strikes = max_strikes
+        self._session_factory = session_factory or (lambda: Async1688Session(**session_kwargs))
+        self._members: List[_PoolMember] = []
+        self._member_ready: Optional[asyncio.Event] = None
+        self._rebootstrap_tasks = set()
+
+    async def __aenter__(self):
+        await self.start()
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.close()
+
+    async def start(self):
+        """Bootstrap all identities concurrently"""
+        self._member_ready = asyncio.Event()
+        sessions = [self._session_factory() for _ in range(self.size)]
+        results = await asyncio.gather(*(session.start() for session in sessions), return_exceptions=True)
+
+        for index, (session, result) in enumerate(zip(sessions, results)):
+            member = _PoolMember(index, session)
+            self._members.append(member)
+            if isinstance(result, Exception):
+                member.healthy = False
+                self._schedule_rebootstrap(member)
+
+        if not any(member.healthy for member in self._members):
+            await self.close()
+            raise Exception("Session pool initialization error: no identity could be bootstrapped")
+        self._member_ready.set()
+
+    async def close(self):
+        for task in list(self._rebootstrap_tasks):
+            task.cancel()
+        self._rebootstrap_tasks.clear()
+
+        await asyncio.gather(
+            *(member.session.close() for member in self._members), return_exceptions=True
+        )
+        self._members = []
+
+    async def search_by_text(self, keywords: str, fields: Optional[Iterable[str]] = None,
+                             exclude: Optional[Iterable[str]] = None) -> List[Dict]:
+        return await self._dispatch("search_by_text", keywords, fields=fields, exclude=exclude)
+
+    async def search_by_image(self, image_path: ImageSource, fields: Optional[Iterable[str]] = None,
+                              exclude: Optional[Iterable[str]] = None) -> List[Dict]:
+        return await self._dispatch("search_by_image", image_path, fields=fields, exclude=exclude)
+
+    async def _acquire(self) -> _PoolMember:
+        while True:
+            healthy = [member for member in self._members if member.healthy]
+            if healthy:
+                return min(healthy, key=lambda member: (member.in_flight, member.requests))
+
+            if not self._members:
+                raise RuntimeError("Session pool is closed or not started")
+
+            # Every identity is being re-bootstrapped, wait for the first one back
+            self._member_ready.clear()
+            await self._member_ready.wait()
+
+    async def _dispatch(self, method_name: str, *args, **kwargs) -> List[Dict]:
+        member = await self._acquire()
+        session = member.session
+        anti_bot_hits = session.anti_bot_hits
+
+        member.in_flight += 1
+        member.requests += 1
+        try:
+            return await getattr(session, method_name)(*args, **kwargs)
+        finally:
+            member.in_flight -= 1
+            self._record_outcome(member, session, session.anti_bot_hits > anti_bot_hits)
+
+    def _record_outcome(self, member: _PoolMember, session: Async1688Session, hit_anti_bot: bool):
+        # Member may have been replaced while the request was running
+        if member.session is not session or not member.healthy:
+            return
+
+        if not hit_anti_bot:
+            member.strikes = 0
+            return
+
+        member.strikes += 1
+        if member.strikes >= self.max_strikes:
+            member.healthy = False
+            self._schedule_rebootstrap(member)
+
+    def _schedule_rebootstrap(self, member: _PoolMember):
+        task = asyncio.ensure_future(self._rebootstrap(member))
+        self._rebootstrap_tasks.add(task)
+        task.add_done_callback(self._rebootstrap_tasks.discard)
+
+    async def _rebootstrap(self, member: _PoolMember):
+        """Replace a retired identity with a freshly bootstrapped session"""
+        old_session = member.session
+        delay = 1.0
+
+        while True:
+            session = self._session_factory()
+            try:
+                await session.start()
+                break
+            except Exception:
+                await session.close()
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, 60)
+
+        member.session = session
+        member.strikes = 0
+        member.rebootstraps += 1
+        member.healthy = True
+        self._member_ready.set()
+
+        # Give requests still running on the old identity time to finish
+        for _ in range(300):
+            if not member.in_flight:
+                break
+            await asyncio.sleep(0.1)
+        await old_session.close()
+
+    def stats(self) -> List[Dict[str, Any]]:
+        return [member.stats() for member in self._members]
+
+
+class SyncSessionPool:
+    """Pool of independently bootstrapped Sync1688Session identities
+
+    Safe to share between threads: every member serves one request at a time,
+    callers wait for an idle healthy member. Retired members are
+    re-bootstrapped in a background thread.
+    """
+
+    def __init__(self, size: int = 4, max_strikes: int = 2,
+                 session_factory: Optional[Callable[[], Sync1688Session]] = None, **session_kwargs):
+        if size < 1:
+            raise ValueError("size must be at least 1")
+
+        self.size = size
+        self.max_strikes = max_strikes
+        self._session_factory = session_factory or (lambda: Sync1688Session(**session_kwargs))
+        self._members: List[_PoolMember] = []
+        self._condition = threading.Condition()
+        self._closed = False
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def start(self):
+        """Bootstrap all identities in parallel threads"""
+        sessions = [self._session_factory() for _ in range(self.size)]
+        errors: List[Optional[Exception]] = [None] * self.size
+
+        def bootstrap(index):
+            try:
+                sessions[index].start()
+            except Exception as e:
+                errors[index] = e
+
+        threads = [threading.Thread(target=bootstrap, args=(index,)) for index in range(self.size)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        with self._condition:
+            self._closed = False
+            for index, session in enumerate(sessions):
+                member = _PoolMember(index, session)
+                self._members.append(member)
+                if errors[index] is not None:
+                    member.healthy = False
+                    self._schedule_rebootstrap(member)
+
+        if not any(member.healthy for member in self._members):
+            self.close()
+            raise Exception("Session pool initialization error: no identity could be bootstrapped")
+
+    def close(self):
+        with self._condition:
+            self._closed = True
+            members, self._members = self._members, []
+            self._condition.notify_all()
+
+        for member in members:
+            member.session.close()
+
+    def search_by_text(self, keywords: str, fields: Optional[Iterable[str]] = None,
+                       exclude: Optional[Iterable[str]] = None) -> List[Dict]:
+        return self._dispatch("search_by_text", keywords, fields=fields, exclude=exclude)
+
+    def search_by_image(self, image_path: ImageSource, fields: Optional[Iterable[str]] = None,
+                        exclude: Optional[Iterable[str]] = None) -> List[Dict]:
+        return self._dispatch("search_by_image", image_path, fields=fields, exclude=exclude)
+
+    def _acquire(self) -> _PoolMember:
+        with self._condition:
+            while True:
+                if self._closed:
+                    raise RuntimeError("Session pool is closed")
+
+                idle = [member for member in self._members if member.healthy and not member.in_flight]
+                if idle:
+                    member = min(idle, key=lambda member: member.requests)
+                    member.in_flight += 1
+                    member.requests += 1
+                    return member
+                self._condition.wait()
+
+    def _dispatch(self, method_name: str, *args, **kwargs) -> List[Dict]:
+        member = self._acquire()
+        session = member.session
+        anti_bot_hits = session.anti_bot_hits
+
+        try:
+            return getattr(session, method_name)(*args, **kwargs)
+        finally:
+            with self._condition:
+                member.in_flight -= 1
+                self._record_outcome(member, session.anti_bot_hits > anti_bot_hits)
+                self._condition.notify_all()
+
+    def _record_outcome(self, member: _PoolMember, hit_anti_bot: bool):
+        if not hit_anti_bot:
+            member.strikes = 0
+            return
+
+        member.strikes += 1
+        if member.strikes >= self.max_strikes:
+            member.healthy = False
+            self._schedule_rebootstrap(member)
+
+    def _schedule_rebootstrap(self, member: _PoolMember):
+        threading.Thread(target=self._rebootstrap, args=(member,), daemon=True).start()
+
+    def _rebootstrap(self, member: _PoolMember):
+        """Replace a retired identity with a freshly bootstrapped session"""
+        old_session = member.session
+        old_session.close()
+        delay = 1.0
+
+        while not self._closed:
+            session = self._session_factory()
+            try:
+                session.start()
+            except Exception:
+                session.close()
+                threading.Event().wait(delay)
+                delay = min(delay * 2, 60)
+                continue
+
+            with self._condition:
+                if self._closed:
+                    session.close()
+                    return
+                member.session = session
+                member.strikes = 0
+                member.rebootstraps += 1
+                member.healthy = True
+                self._condition.notify_all()
+            return
+
+    def stats(self) -> List[Dict[str, Any]]:
+        with self._condition:
+            return [member.stats() for member in self._members]
@@ -0,0 +1,95 @@
+from typing import Any, Dict, Iterable, Optional
+
+
+def _path_tree(paths: Iterable[str]) -> Dict[str, Any]:
+    """["priceInfo.price", "title"] -> {"priceInfo": {"price": None}, "title": None}"""
+    tree: Dict[str, Any] = {}
+    for path in paths:
+        node = tree
+        *parents, leaf = path.split(".")
+        for key in parents:
+            child = node.get(key, {})
+            if child is None:
+                # Whole subtree is already selected
+                break
+            node = node.setdefault(key, child)
+        else:
+            node[leaf] = None
+    return tree
+
+
+def _keep(tree: Dict[str, Any], value: Any) -> Any:
+    if isinstance(value, list):
+        return [_keep(tree, element) for element in value]
+    if not isinstance(value, dict):
+        return value
+    return {
+        key: value[key] if subtree is None else _keep(subtree, value[key])
+        for key, subtree in tree.items() if key in value
+    }
+
+
+def _drop(tree: Dict[str, Any], value: Any) -> Any:
+    if isinstance(value, list):
+        return [_drop(tree, element) for element in value]
+    if not isinstance(value, dict):
+        return value
+    result = dict(value)
+    for key, subtree in tree.items():
+        if key not in result:
+            continue
+        if subtree is None:
+            del result[key]
+        else:
+            result[key] = _drop(subtree, result[key])
+    return result
+
+
+class FieldProjection:
+    """Which keys of each offer's "data" to keep (`fields`) or drop (`exclude`)
+
+    Paths are dotted, e.g. "priceInfo.price"; inside lists the path applies
+    to every element ("tags.text"). Top-level excluded keys are also sent as
+    mtop `excludeKeys`, but since the API doesn't always honor it, items are
+    pruned after parsing as well.
+    """
+
+    def __init__(self, fields: Optional[Iterable[str]] = None, exclude: Optional[Iterable[str]] = None):
+        self.fields = sorted(set(fields)) if fields is not None else None
+        self.exclude = sorted(set(exclude)) if exclude is not None else None
+        self._keep_tree = _path_tree(self.fields) if self.fields is not None else None
+        self._drop_tree = _path_tree(self.exclude) if self.exclude else None
+
+    @classmethod
+    def create(cls, fields: Optional[Iterable[str]] = None,
+               exclude: Optional[Iterable[str]] = None) -> Optional["FieldProjection"]:
+        """None when there is nothing to project"""
+        if fields is None and not exclude:
+            return None
+        return cls(fields, exclude)
+
+    @property
+    def exclude_keys(self) -> str:
+        """Value for the mtop excludeKeys parameter"""
+        return ",".join(path for path in self.exclude or () if "." not in path)
+
+    def cache_filters(self) -> Dict[str, Any]:
+        """Part of the result cache key, projected results are cached separately"""
+        return {"fields": self.fields, "exclude": self.exclude}
+
+    def apply(self, item: Dict) -> Dict:
+        """Pruned copy of an offer item, the item itself is not modified"""
+        nested = isinstance(item.get("data"), dict)
+        data = item["data"] if nested else item
+
+        if self._keep_tree is not None:
+            data = _keep(self._keep_tree, data)
+        if self._drop_tree is not None:
+            data = _drop(self._drop_tree, data)
+
+        if not nested:
+            return data
+        if self._keep_tree is None:
+            return {**item, "data": data}
+        # Keys next to "data" (tracking info) are not among the selected fields
+        return {"data": data}
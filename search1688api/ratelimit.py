@@ -0,0 +1,91 @@
+import asyncio
+import threading
+import time
+from typing import Dict
+
+
+class _Bucket:
+    """Token bucket state for one host"""
+
+    def __init__(self, rate: float, burst: float):
+        self.rate = rate
+        self.tokens = burst
+        self.updated = time.monotonic()
+        self.throttled = 0
+
+
+class AdaptiveRateLimiter:
+    """Per-host token bucket that adapts its rate AIMD-style
+
+    Every request takes one token from the bucket of its host. Successful
+    responses raise the host rate by `increase` requests/s (up to
+    `max_rate`), anti-bot responses multiply it by `decrease` (down to
+    `min_rate`). The limiter holds the highest rate the site tolerates
+    without hand-tuned sleeps. One instance can be shared by several
+    sessions, sync or async.
+    """
+
+    def __init__(self, rate: float = 5.0, burst: float = 5.0, min_rate: float = 0.2, max_rate: float = 50.0,
+                 increase: float = 0.1, decrease: float = 0.5):
+        if not 0 < min_rate <= rate <= max_rate:
+            raise ValueError("rate must satisfy 0 < min_rate <= rate <= max_rate")
+
+        self.initial_rate = rate
+        self.burst = burst
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.increase = increase
+        self.decrease = decrease
+        self._buckets: Dict[str, _Bucket] = {}
+        self._lock = threading.Lock()
+
+    def _bucket(self, host: str) -> _Bucket:
+        bucket = self._buckets.get(host)
+        if bucket is None:
+            bucket = self._buckets[host] = _Bucket(self.initial_rate, self.burst)
+        return bucket
+
+    def _reserve(self, host: str) -> float:
+        """Take one token, returning how long the caller has to wait for it"""
+        with self._lock:
+            bucket = self._bucket(host)
+            now = time.monotonic()
+            bucket.tokens = min(self.burst, bucket.tokens + (now - bucket.updated) * bucket.rate)
+            bucket.updated = now
+            bucket.tokens -= 1
+            # Negative balance is a queue of callers already waiting for tokens
+            return 0.0 if bucket.tokens >= 0 else -bucket.tokens / bucket.rate
+
+    def acquire(self, host: str):
+        delay = self._reserve(host)
+        if delay:
+            time.sleep(delay)
+
+    async def acquire_async(self, host: str):
+        delay = self._reserve(host)
+        if delay:
+            await asyncio.sleep(delay)
+
+    def on_success(self, host: str):
+        with self._lock:
+            bucket = self._bucket(host)
+            bucket.rate = min(self.max_rate, bucket.rate + self.increase)
+
+    def on_throttle(self, host: str):
+        with self._lock:
+            bucket = self._bucket(host)
+            bucket.rate = max(self.min_rate, bucket.rate * self.decrease)
+            bucket.throttled += 1
+            # Drop saved-up burst so the lower rate applies immediately
+            bucket.tokens = min(bucket.tokens, 0)
+
+    def rate(self, host: str) -> float:
+        with self._lock:
+            return self._bucket(host).rate
+
+    def stats(self) -> Dict[str, Dict[str, float]]:
+        with self._lock:
+            return {
+                host: {"rate": bucket.rate, "throttled": bucket.throttled}
+                for host, bucket in self._buckets.items()
+            }
@@ -0,0 +1,75 @@
+import random
+import threading
+from typing import Optional
+
+from .errors import HTTPStatusError
+
+
+class RetryBudget:
+    """Caps retries to a fraction of regular requests
+
+    Every first attempt deposits `ratio` of a retry, every retry withdraws a
+    whole one; at most `burst` retries can be saved up. When the site is
+    failing for everyone this stops retries from multiplying the load.
+    Share one budget between sessions to cap retries across a whole pool.
+    """
+
+    def __init__(self, ratio: float = 0.2, burst: float = 10.0):
+        self.ratio = ratio
+        self.burst = burst
+        self._balance = burst
+        self._lock = threading.Lock()
+        self.exhausted = 0  # Retries refused because the budget ran out
+
+    def deposit(self):
+        with self._lock:
+            self._balance = min(self.burst, self._balance + self.ratio)
+
+    def withdraw(self) -> bool:
+        with self._lock:
+            if self._balance < 1:
+                self.exhausted += 1
+                return False
+            self._balance -= 1
+            return True
+
+    @property
+    def balance(self) -> float:
+        return self._balance
+
+
+class RetryPolicy:
+    """Which failures to retry and how long to wait between attempts
+
+    Only errors with `retryable = True` are retried, at most `max_attempts`
+    attempts in total. Delays grow exponentially from `base_delay` up to
+    `max_delay` with full jitter, so parallel callers don't retry in
+    lockstep. A Retry-After header is respected up to `max_delay`.
+    `RetryPolicy(max_attempts=1)` disables retries.
+    """
+
+    def __init__(self, max_attempts: int = 3, base_delay: float = 0.5, max_delay: float = 10.0,
+                 budget: Optional[RetryBudget] = None):
+        if max_attempts < 1:
+            raise ValueError("max_attempts must be at least 1")
+
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.budget = budget if budget is not None else RetryBudget()
+
+    def on_request(self):
+        """Called once per logical request, before its first attempt"""
+        self.budget.deposit()
+
+    def should_retry(self, error: BaseException, attempt: int) -> bool:
+        """`attempt` is the number of attempts already made"""
+        if not getattr(error, "retryable", False) or attempt >= self.max_attempts:
+            return False
+        return self.budget.withdraw()
+
+    def backoff(self, attempt: int, error: Optional[BaseException] = None) -> float:
+        delay = random.uniform(0, min(self.max_delay, self.base_delay * 2 ** (attempt - 1)))
+        if isinstance(error, HTTPStatusError) and error.retry_after:
+            delay = max(delay, min(self.max_delay, error.retry_after))
+        return delay
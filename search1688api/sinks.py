@@ -0,0 +1,202 @@
+import gzip
+import json
+import os
+from typing import Any, AsyncIterable, BinaryIO, Dict, Iterable, List, Optional, Union
+
+from .models import SearchResult
+from .utils import json_default
+
+
+class BaseSink:
+    """Writes search results page by page
+
+    Subclasses implement write_page() and flush each page before it
+    returns; memory use is bounded by one page. How much a crash loses
+    depends on the format: at most the page being written for NDJSONSink,
+    the whole unfinished file for ParquetSink.
+    """
+
+    def __init__(self):
+        self.pages_written = 0
+        self.offers_written = 0
+        self.errors = 0  # Failed SearchResults skipped by write_results()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def write_page(self, products: List[Any], query: Any = None) -> int:
+        raise NotImplementedError
+
+    def close(self):
+        pass
+
+    def write_pages(self, pages: Iterable[List[Any]], query: Any = None) -> int:
+        """Drain a page iterator such as search_by_text_iter()"""
+        return sum(self.write_page(products, query) for products in pages)
+
+    async def write_pages_async(self, pages: AsyncIterable[List[Any]], query: Any = None) -> int:
+        written = 0
+        async for products in pages:
+            written += self.write_page(products, query)
+        return written
+
+    def write_results(self, results: Iterable[SearchResult]) -> int:
+        """Drain bulk search results, each successful result is written as one page"""
+        return sum(self._write_result(result) for result in results)
+
+    async def write_results_async(self, results: AsyncIterable[SearchResult]) -> int:
+        """Drain iter_many_text()/iter_many_images() as results arrive"""
+        written = 0
+        async for result in results:
+            written += self._write_result(result)
+        return written
+
+    def stats(self) -> Dict[str, Any]:
+        return {"pages": self.pages_written, "offers": self.offers_written, "errors": self.errors}
+
+    def _write_result(self, result: SearchResult) -> int:
+        if not result.ok:
+            self.errors += 1
+            return 0
+        return self.write_page(result.products, result.query)
+
+
+class NDJSONSink(BaseSink):
+    """One offer per line, optionally gzip-compressed
+
+    With `query_key` every line gets the query it was found by under that
+    key. gzip output is sync-flushed per page, so everything up to the last
+    complete page can be decompressed even if the file was never closed.
+    `fsync=True` also forces each page to disk. `path` may also be an open
+    binary file (e.g. sys.stdout.buffer), which close() leaves open.
+    """
+
+    def __init__(self, path: Union[str, BinaryIO], compress: bool = False, append: bool = False,
+                 query_key: Optional[str] = None, fsync: bool = False):
+        super().__init__()
+        self.path = path
+        self.query_key = query_key
+        self.fsync = fsync
+        mode = "ab" if append else "wb"
+        self._owns_file = isinstance(path, str)
+        if self._owns_file:
+            self._file = gzip.open(path, mode) if compress else open(path, mode)
+        else:
+            self._file = gzip.GzipFile(fileobj=path, mode=mode) if compress else path
+
+    def write_page(self, products: List[Any], query: Any = None) -> int:
+        if not products:
+            return 0
+
+        lines = []
+        for product in products:
+            if self.query_key is not None:
+                item = product if isinstance(product, dict) else json_default(product)
+                product = {**item, self.query_key: query}
+            lines.append(json.dumps(product, ensure_ascii=False, default=json_default))
+        lines.append("")
+
+        self._file.write("\n".join(lines).encode("utf-8"))
+        self._flush()
+        self.pages_written += 1
+        self.offers_written += len(products)
+        return len(products)
+
+    def _flush(self):
+        self._file.flush()
+        if self.fsync:
+            fileobj = getattr(self._file, "fileobj", None) or self._file
+            fileobj.flush()
+            os.fsync(fileobj.fileno())
+
+    def close(self):
+        if self._file.closed:
+            return
+        if self._owns_file or isinstance(self._file, gzip.GzipFile):
+            # Closing a GzipFile writes the trailer but leaves a passed-in fileobj open
+            self._file.close()
+        else:
+            self._file.flush()
+
+
+class ParquetSink(BaseSink):
+    """Offers as Parquet, one row group per page (requires pyarrow)
+
+    Columns are those of ResultBatch plus `query`, and with include_raw=True
+    the full product as a JSON string in `raw`. A Parquet file is only
+    readable once its footer is written on close(), so by default a crash
+    loses everything written so far. With `pages_per_file` the sink rotates
+    to a new part file ("offers-00000.parquet", ...) every that many pages
+    and a crash loses at most the unfinished part; only NDJSONSink keeps
+    the "at most one page" guarantee.
+    """
+
+    def __init__(self, path: str, include_raw: bool = False, pages_per_file: Optional[int] = None,
+                 compression: str = "zstd"):
+        super().__init__()
+        try:
+            import pyarrow
+            import pyarrow.parquet
+        except ImportError:
+            raise ImportError("ParquetSink requires pyarrow") from None
+
+        self._pa = pyarrow
+        self._pq = pyarrow.parquet
+        self.path = path
+        self.include_raw = include_raw
+        self.pages_per_file = pages_per_file
+        self.compression = compression
+        self.paths: List[str] = []  # Files written so far
+        self._writer = None
+        self._pages_in_file = 0
+
+    def _part_path(self) -> str:
+        if self.pages_per_file is None:
+            return self.path
+        stem, suffix = os.path.splitext(self.path)
+        return f"{stem}-{len(self.paths):05d}{suffix or '.parquet'}"
+
+    def write_page(self, products: List[Any], query: Any = None) -> int:
+        from .batch import ResultBatch
+
+        if not products:
+            return 0
+
+        pa = self._pa
+        table = ResultBatch.from_products(products).to_arrow()
+        query_value = None if query is None else str(query)
+        table = table.append_column("query", pa.array([query_value] * len(products), type=pa.string()))
+        if self.include_raw:
+            raw = [json.dumps(product, ensure_ascii=False, default=json_default) for product in products]
+            table = table.append_column("raw", pa.array(raw, type=pa.string()))
+
+        if self._writer is None:
+            part_path = self._part_path()
+            self._writer = self._pq.ParquetWriter(part_path, table.schema, compression=self.compression)
+            self.paths.append(part_path)
+
+        self._writer.write_table(table, row_group_size=len(products))
+        self._pages_in_file += 1
+        self.pages_written += 1
+        self.offers_written += len(products)
+
+        if self.pages_per_file is not None and self._pages_in_file >= self.pages_per_file:
+            self._close_writer()
+        return len(products)
+
+    def _close_writer(self):
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+            self._pages_in_file = 0
+
+    def close(self):
+        self._close_writer()
+
+    def stats(self) -> Dict[str, Any]:
+        stats = super().stats()
+        stats["files"] = list(self.paths)
+        return stats
@@ -1,27 +1,65 @@
 import requests
-import json
 import re
 import time
 import urllib.parse
 import random
 import string
-from typing import List, Dict, Any
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Dict, Any, Callable, Iterable, Iterator, Optional
 from traceback import format_exc
 
-from .utils import prepare_image_request, generate_sign, read_and_encode_image, extract_products_from_html
+from . import codec
+from .cache import ImageIdCache, ResultCache
+from .projection import FieldProjection
+from .errors import Search1688Error, NetworkError, HTTPStatusError, JSONPParseError, BusinessError, TokenError
+from .htmlscan import DEFAULT_MAX_BYTES, OfferDataScanner, content_type_charset
+from .imageprep import ImagePreprocessor
+from .jsonp import decode_jsonp
+from .ratelimit import AdaptiveRateLimiter
+from .retry import RetryPolicy
+from .tokens import TokenManager
+from .utils import (
+    ImageSource, build_image_upload, generate_sign, read_image_bytes, offers_from_offer_data,
+    is_token_error, is_anti_bot_error, is_throttle_error, is_throttled_response, parse_token_expiry,
+    dump_session_state, load_session_state, parse_retry_after, ret_error
+)
 
 
 class Sync1688Session(requests.Session):
-    def __init__(self, debug: bool = True, *args, **kwargs):
+    def __init__(self, debug: bool = True, *args, image_id_cache: Optional[ImageIdCache] = None,
+                 result_cache: Optional[ResultCache] = None, warmup_ttl: float = 300,
+                 rate_limiter: Optional[AdaptiveRateLimiter] = None, retry_policy: Optional[RetryPolicy] = None,
+                 raise_errors: bool = False, offer_factory: Optional[Callable[[Dict], Any]] = None,
+                 fallback_max_bytes: int = DEFAULT_MAX_BYTES, image_preprocessor: Optional[ImagePreprocessor] = None,
+                 **kwargs):
         super().__init__(*args, **kwargs)
         
-        self._token = None
-        self._token_part = None
+        self.token_manager = TokenManager()  # _m_h5_tk value, expiry and refresh schedule
         self.app_key = "12574478"
         self.base_url = "https://h5api.m.1688.com/h5/mtop.relationrecommend.wirelessrecommend.recommend/2.0/"
         self._initialized = False
         self.cookies_dict = {}
         self.debug = debug  # Debug output control
+        self._restored_state = False  # Session was restored via from_state()
+        self._token_rejected = False
+        self._rejected_token = None  # Token value the API rejected last time
+        self.anti_bot_hits = 0  # Slider/captcha responses seen by this identity
+        self.rate_limiter = rate_limiter  # Optional AdaptiveRateLimiter applied to every request
+        self.retry_policy = retry_policy or RetryPolicy()
+        self.raise_errors = raise_errors  # Raise Search1688Error from search methods instead of returning []
+        self.last_error: Optional[Search1688Error] = None  # Why the last search returned nothing
+        self.offer_factory = offer_factory  # Builds each product from its raw item, e.g. Offer.from_item
+        self.fallback_max_bytes = fallback_max_bytes  # Most of the HTML fallback page read looking for offers
+        self.image_id_cache = image_id_cache  # Optional ImageIdCache, skips repeated uploads
+        self.image_preprocessor = image_preprocessor  # Optional ImagePreprocessor, shrinks images before upload
+        self.result_cache = result_cache  # Optional ResultCache for search results
+        self.warmup_ttl = warmup_ttl  # Seconds search page cookies are reused without a new warm-up
+        self._warmed_up: Dict[str, float] = {}  # search_type -> time.monotonic() of last warm-up
+        self._refresh_executor: Optional[ThreadPoolExecutor] = None  # Stale cache entries are refreshed here
+        self._refresh_session: Optional["Sync1688Session"] = None  # Used only by the refresh thread
+        self._refresh_lock = threading.Lock()
+        self._refreshing = set()
     
     def _log(self, message: str):
         """Print debug messages only if debug=True"""
@@ -62,42 +100,24 @@ class Sync1688Session(requests.Session):
         self._initialized = True
     
     def start(self):
+        self._restored_state = False
+        self._token_rejected = False
+        self._warmed_up = {}
+        
         try:
             # First get cookies from 1688.com main page
             self._get_main_page_cookies()
             
             # Then try to get token via API
-            test_params = {
-                "jsv": "2.7.2",
-                "appKey": self.app_key,
-                "t": str(int(time.time() * 1000)),
-                "api": "mtop.relationrecommend.WirelessRecommend.recommend",
-                "v": "2.0",
-                "type": "originaljson"
-            }
-            
-            response = self.get(
-                url=self.base_url,
-                params=test_params
-            )
-            
-            # Get cookies from API response
-            for cookie_name, cookie_value in self.cookies.items():
-                self.cookies_dict[cookie_name] = cookie_value
+            self._fetch_token()
+            self._initialized = True
             
-            token_cookie = self.cookies.get('_m_h5_tk')
-            
-            if token_cookie:
-                self._token = token_cookie
-                self._token_part = self._token.split('_')[0]
-                self._initialized = True
-                self._log(f"Token initialized: {self._token_part}...")
-                return True
+            if self.token_manager.token:
+                self._log(f"Token initialized: {self.token_manager.token_part}...")
             else:
                 # Even if token not received, mark as initialized
-                self._initialized = True
                 self._log("Session initialized without token, will try to get it later")
-                return True
+            return True
                 
         except Exception as e:
             self.close()
@@ -171,87 +191,317 @@ class Sync1688Session(requests.Session):
                 self.cookies_dict[cookie_name] = fallback_cookies[cookie_name]
                 self._log(f"Using generated fallback for {cookie_name}: {fallback_cookies[cookie_name][:30]}...")
     
+    def _fetch_token(self):
+        """Request fresh _m_h5_tk cookie from the mtop API"""
+        self.token_manager.mark_refresh_attempt()
+        
+        test_params = {
+            "jsv": "2.7.2",
+            "appKey": self.app_key,
+            "t": str(int(time.time() * 1000)),
+            "api": "mtop.relationrecommend.WirelessRecommend.recommend",
+            "v": "2.0",
+            "type": "originaljson"
+        }
+        
+        self.get(
+            url=self.base_url,
+            params=test_params
+        )
+        
+        # Get cookies from API response
+        for cookie_name, cookie_value in self.cookies.items():
+            self.cookies_dict[cookie_name] = cookie_value
+    
+    def request(self, method, url, *args, **kwargs):
+        host = urllib.parse.urlsplit(url).hostname or ''
+        if self.rate_limiter is not None:
+            self.rate_limiter.acquire(host)
+        
+        response = super().request(method, url, *args, **kwargs)
+        self._pick_up_token()
+        
+        if self.rate_limiter is not None:
+            if is_throttled_response(response.status_code, response.url, response.headers.get('location')):
+                self._log(f"Throttled by {host}: HTTP {response.status_code} {response.url}")
+                self.rate_limiter.on_throttle(host)
+            else:
+                self.rate_limiter.on_success(host)
+        return response
+    
+    def _pick_up_token(self):
+        """Take rotated _m_h5_tk from cookie jar after any response"""
+        token_cookies = [cookie for cookie in self.cookies if cookie.name == '_m_h5_tk']
+        if not token_cookies:
+            return
+        
+        # Same name may be set for several domains, the newest token expires last
+        token_cookie = max(token_cookies, key=lambda cookie: parse_token_expiry(cookie.value) or 0)
+        
+        if self.token_manager.update(token_cookie.value):
+            self.cookies_dict['_m_h5_tk'] = token_cookie.value
+            for cookie in self.cookies:
+                if cookie.name == '_m_h5_tk_enc' and cookie.domain == token_cookie.domain:
+                    self.cookies_dict['_m_h5_tk_enc'] = cookie.value
+            self._log(f"Token updated: {self.token_manager.token_part}...")
+    
+    def _ensure_token_fresh(self):
+        """Refresh token ahead of expiry instead of waiting for the API to reject it"""
+        if not self.token_manager.needs_refresh():
+            return
+        
+        self._log("Token is about to expire, refreshing")
+        try:
+            self._fetch_token()
+        except Exception as e:
+            self._log(f"Token refresh error: {e}")
+    
+    def _signing_token_part(self) -> str:
+        if self.token_manager.token_part:
+            return self.token_manager.token_part
+        
+        # Try to get token from cookies
+        token_from_cookies = self.cookies_dict.get('_m_h5_tk')
+        if token_from_cookies:
+            self._log("Using token from cookies for signing")
+            return token_from_cookies.split('_')[0]
+        
+        self._log("Using fallback token for signing")
+        return "fallback"
+    
+    def _note_ret(self, ret):
+        """Track token and anti-bot errors reported in mtop "ret" """
+        if is_token_error(ret):
+            self._token_rejected = True
+            self._rejected_token = self.token_manager.token
+        if is_anti_bot_error(ret):
+            self.anti_bot_hits += 1
+        if (is_anti_bot_error(ret) or is_throttle_error(ret)) and self.rate_limiter is not None:
+            self.rate_limiter.on_throttle(urllib.parse.urlsplit(self.base_url).hostname)
+    
     def close(self):
+        with self._refresh_lock:
+            executor, self._refresh_executor = self._refresh_executor, None
+        if executor is not None:
+            # Closed on the refresh thread, once a refresh still running there is done
+            executor.submit(self._close_refresh_session)
+            executor.shutdown(wait=False)
         super().close()
-        self._token = None
-        self._token_part = None
+        self.token_manager.clear()
         self._initialized = False
         self.cookies_dict = {}
+        self._restored_state = False
+        self._token_rejected = False
+        self._warmed_up = {}
+    
+    def save_state(self, path: str):
+        """Save warmed cookies and token to file for later from_state()"""
+        jar = [
+            {
+                "name": cookie.name,
+                "value": cookie.value,
+                "domain": cookie.domain,
+                "path": cookie.path,
+                "expires": cookie.expires,
+                "secure": cookie.secure
+            }
+            for cookie in self.cookies
+        ]
+        
+        dump_session_state(path, {
+            "saved_at": time.time(),
+            "cookies_dict": dict(self.cookies_dict),
+            "jar": jar,
+            "token": self.token_manager.token,
+            "token_part": self.token_manager.token_part,
+            "token_expires": self.token_manager.expires_at
+        })
+        self._log(f"Session state saved to {path}")
+    
+    @classmethod
+    def from_state(cls, path: str, *args, min_ttl: float = 60, **kwargs) -> "Sync1688Session":
+        """Create session from saved state, bootstrapping only if state is unusable"""
+        session = cls(*args, **kwargs)
+        
+        try:
+            state = load_session_state(path)
+        except ValueError as e:
+            session._log(f"Saved state not loaded: {e}")
+            state = None
+        
+        if not state or not session._restore_state(state, min_ttl):
+            session.start()
+        return session
+    
+    def _restore_state(self, state: Dict[str, Any], min_ttl: float) -> bool:
+        token_expires = state.get("token_expires")
+        if not state.get("token") or not token_expires or token_expires - time.time() < min_ttl:
+            self._log("Saved token is missing or expired, full start required")
+            return False
+        
+        for cookie in state.get("jar", []):
+            expires = cookie.get("expires")
+            self.cookies.set(
+                cookie["name"],
+                cookie["value"],
+                domain=cookie.get("domain", ""),
+                path=cookie.get("path", "/"),
+                expires=expires if isinstance(expires, (int, float)) else None,
+                secure=cookie.get("secure", False)
+            )
+        
+        self.cookies_dict.update(state.get("cookies_dict", {}))
+        self.token_manager.update(state["token"])
+        self._initialized = True
+        self._restored_state = True
+        self._token_rejected = False
+        self._log(f"Session restored from state, token valid for {int(token_expires - time.time())}s")
+        return True
+    
+    def _recover_token(self) -> bool:
+        """Get a usable token once after the API rejected the current one"""
+        if not self._token_rejected:
+            return False
+        
+        self._token_rejected = False
+        
+        if self._restored_state:
+            self._log("Restored token rejected, running full session start")
+            self._restored_state = False
+            self.start()
+            return True
+        
+        if self.token_manager.token == self._rejected_token:
+            # Error response didn't rotate _m_h5_tk, ask the API for a new one
+            self._log("Token rejected, requesting a new one")
+            self._fetch_token()
+        else:
+            self._log("Token rejected, retrying with rotated token")
+        return True
+    
+    def _refresh_after_token_error(self, search_param: str, search_type: str) -> bool:
+        """Re-bootstrap or re-warm once after the API rejected the token"""
+        if not self._recover_token():
+            return False
+        
+        self._warmed_up.pop(search_type, None)
+        return self._get_search_page_cookies(search_param, search_type)
+    
+    def _call_with_retry(self, fetch: Callable[[], Any], search_param: Optional[str] = None,
+                         search_type: Optional[str] = None) -> Any:
+        """Run fetch, retrying failures that retry_policy classifies as transient"""
+        self.retry_policy.on_request()
+        attempt = 0
+        token_refreshed = False
+        
+        while True:
+            try:
+                return fetch()
+            except TokenError:
+                # A new token fixes this, no need to wait or spend the retry budget
+                if token_refreshed:
+                    raise
+                token_refreshed = True
+                if search_type is not None:
+                    recovered = self._refresh_after_token_error(search_param, search_type)
+                else:
+                    recovered = self._recover_token()
+                if not recovered:
+                    raise
+            except Search1688Error as e:
+                attempt += 1
+                if not self.retry_policy.should_retry(e, attempt):
+                    raise
+                delay = self.retry_policy.backoff(attempt, e)
+                self._log(f"{type(e).__name__}: {e}, retry {attempt} in {delay:.2f}s")
+                time.sleep(delay)
+    
+    def _status_error(self, response) -> HTTPStatusError:
+        return HTTPStatusError(response.status_code, response.url, parse_retry_after(response.headers.get('retry-after')))
+    
+    def _search_failed(self, error: Search1688Error) -> List[Dict]:
+        """Remember the error and return [] as before, unless raise_errors is set"""
+        self.last_error = error
+        self._log(f"Search failed: {type(error).__name__}: {error}")
+        if self.raise_errors:
+            raise error
+        return []
     
     def _ensure_initialized(self):
         if not self._initialized:
             self._initialize()
     
-    def _get_image_id(self, image_path):
+    def _get_image_id(self, image: ImageSource, cache_key: Optional[str] = None) -> str:
         self._ensure_initialized()
         
+        image_bytes = read_image_bytes(image)
+        
+        self._ensure_token_fresh()
+        timestamp = str(int(time.time() * 1000))
+        
+        # Form body and sign are built from base64 chunks, no full-size data string is ever made
+        body, sign = build_image_upload(image_bytes, self._signing_token_part(), timestamp, self.app_key)
+        
+        params = {
+            "jsv": "2.7.2",
+            "appKey": self.app_key,
+            "t": timestamp,
+            "sign": sign,
+            "api": "mtop.relationrecommend.WirelessRecommend.recommend",
+            "ignoreLogin": "true",
+            "prefix": "h5api",
+            "v": "2.0",
+            "type": "originaljson",
+            "dataType": "jsonp", 
+            "jsonpIncPrefix": "search1688",
+            "timeout": "20000"
+        }
+        
+        headers = {
+            "content-type": "application/x-www-form-urlencoded",
+            "origin": "https://s.1688.com",
+            "referer": "https://s.1688.com/",
+            "user-agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36"
+        }
+        
         try:
-            image_b64 = read_and_encode_image(image_path)
-            data_string = prepare_image_request(image_b64)
-            timestamp = str(int(time.time() * 1000))
-            
-            # If token exists, use it for signing
-            if self._token_part:
-                sign = generate_sign(self._token_part, timestamp, self.app_key, data_string)
-            else:
-                # Try to get token from cookies
-                if '_m_h5_tk' in self.cookies_dict:
-                    token_from_cookies = self.cookies_dict['_m_h5_tk']
-                    token_part_from_cookies = token_from_cookies.split('_')[0] if '_' in token_from_cookies else token_from_cookies
-                    sign = generate_sign(token_part_from_cookies, timestamp, self.app_key, data_string)
-                    self._log("Using token from cookies for signing")
-                else:
-                    # Use fallback signature
-                    sign = generate_sign("fallback_token", timestamp, self.app_key, data_string)
-                    self._log("Using fallback token for signing")
-            
-            params = {
-                "jsv": "2.7.2",
-                "appKey": self.app_key,
-                "t": timestamp,
-                "sign": sign,
-                "api": "mtop.relationrecommend.WirelessRecommend.recommend",
-                "ignoreLogin": "true",
-                "prefix": "h5api",
-                "v": "2.0",
-                "type": "originaljson",
-                "dataType": "jsonp", 
-                "jsonpIncPrefix": "search1688",
-                "timeout": "20000"
-            }
-            
-            headers = {
-                "content-type": "application/x-www-form-urlencoded",
-                "origin": "https://s.1688.com",
-                "referer": "https://s.1688.com/",
-                "user-agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36"
-            }
-            
             response = self.post(
                 url=self.base_url,
                 params=params,
-                data={"data": data_string},
+                data=body,
                 headers=headers
             )
-            
-            if response.status_code == 200:
-                result = response.json()
-                if result.get("data", {}).get("success"):
-                    image_id = result["data"].get("imageId")
-                    if image_id:
-                        return image_id
-                else:
-                    self._log(f"API error in image upload: {result.get('ret', ['Unknown error'])}")
-            else:
-                self._log(f"Image upload HTTP error: {response.status_code}")
-            return None
-            
-        except Exception as e:
-            self._log(f"Image upload request error: {e}")
-            return None
+        except requests.RequestException as e:
+            raise NetworkError(f"Image upload request error: {e}") from e
+        
+        if response.status_code != 200:
+            raise self._status_error(response)
+        
+        try:
+            result = codec.loads(response.content)
+        except ValueError as e:
+            raise JSONPParseError(f"Image upload JSON decode error: {e}") from e
+        
+        if not result.get("data", {}).get("success"):
+            self._log(f"API error in image upload: {result.get('ret', ['Unknown error'])}")
+            self._note_ret(result.get('ret'))
+            raise ret_error(result.get('ret')) or BusinessError(["Image upload was not accepted"])
+        
+        image_id = result["data"].get("imageId")
+        if not image_id:
+            raise BusinessError(["Image upload returned no imageId"])
+        
+        if cache_key is not None:
+            self.image_id_cache.set(cache_key, image_id)
+        return image_id
     
     def _get_search_page_cookies(self, search_param: str, search_type: str = "image"):
-        """Get cookies for search page"""
+        """Get cookies for search page, skipped while previous warm-up is fresh"""
+        warmed_at = self._warmed_up.get(search_type)
+        if warmed_at is not None and time.monotonic() - warmed_at < self.warmup_ttl:
+            self._log(f"Search page cookies for {search_type} search are fresh, skipping warm-up")
+            return True
+        
         try:
             if search_type == "image":
                 initial_url = "https://s.1688.com/youyuan/index.htm"
@@ -322,45 +572,278 @@ class Sync1688Session(requests.Session):
                 for cookie_name, cookie_value in self.cookies.items():
                     self.cookies_dict[cookie_name] = cookie_value
 
+            self._warmed_up[search_type] = time.monotonic()
             return True
                 
         except Exception as e:
             self._log(f"Cookie collection error: {e}")
             return False
 
-    def search_by_image(self, image_path: str) -> List[Dict]:
-        """Search products by image"""
+    def search_by_image(self, image_path: ImageSource, fields: Optional[Iterable[str]] = None,
+                        exclude: Optional[Iterable[str]] = None) -> List[Dict]:
+        """Search products by image (path, bytes or binary file), optionally keeping only `fields` or dropping `exclude` keys"""
+        self.last_error = None
+        try:
+            return self._search_image(image_path, FieldProjection.create(fields, exclude))
+        except Search1688Error as e:
+            return self._search_failed(e)
+
+    def search_by_text(self, keywords: str, fields: Optional[Iterable[str]] = None,
+                       exclude: Optional[Iterable[str]] = None) -> List[Dict]:
+        """Search products by text keywords, optionally keeping only `fields` or dropping `exclude` keys"""
+        self.last_error = None
+        try:
+            return self._search_text(keywords, FieldProjection.create(fields, exclude))
+        except Search1688Error as e:
+            return self._search_failed(e)
+
+    def _search_image(self, image_path: ImageSource, projection: Optional[FieldProjection] = None) -> List[Dict]:
+        """search_by_image that raises Search1688Error instead of returning []"""
         self._ensure_initialized()
         
-        image_id = self._get_image_id(image_path)
+        # Read once: file objects can't be read again, and retries reuse the content
+        image = read_image_bytes(image_path)
         
-        if not image_id:
-            self._log("Failed to get image ID")
-            return []
+        if self.result_cache is not None:
+            # Hashed once, the imageId cache reuses it on a miss
+            content_hash = ImageIdCache.key_for(image)
+            cache_key = ResultCache.make_key("image", content_hash, 1, self._cache_filters(60, projection))
+            return self._cached_search(
+                cache_key, lambda session: session._search_by_image(image, projection, content_hash)
+            )
         
-        products = self._search_by_image_id_api(image_id)
-        return products
+        return self._search_by_image(image, projection)
 
-    def search_by_text(self, keywords: str) -> List[Dict]:
-        """Search products by text keywords"""
+    def _search_text(self, keywords: str, projection: Optional[FieldProjection] = None) -> List[Dict]:
+        """search_by_text that raises Search1688Error instead of returning []"""
         self._ensure_initialized()
         
-        products = self._search_by_keywords_api(keywords)
+        if self.result_cache is not None:
+            cache_key = ResultCache.make_key("text", keywords, 1, self._cache_filters(60, projection))
+            return self._cached_search(cache_key, lambda session: session._search_by_keywords_api(keywords, projection))
+        
+        return self._search_by_keywords_api(keywords, projection)
+
+    def _search_by_image(self, image: ImageSource, projection: Optional[FieldProjection] = None,
+                         content_hash: Optional[str] = None) -> List[Dict]:
+        image_id = self._upload_image(image, content_hash)
+        return self._search_by_image_id_api(image_id, projection)
+
+    def _upload_image(self, image_path: ImageSource, content_hash: Optional[str] = None) -> str:
+        """Get imageId, retrying transient errors and token rejections
+        
+        `content_hash` is ImageIdCache.key_for() of the image, if the caller already has it.
+        """
+        image = read_image_bytes(image_path)
+        
+        # Cached by the original content, so the preprocessor only runs on a miss
+        cache_key = None
+        if self.image_id_cache is not None:
+            cache_key = content_hash or self.image_id_cache.key_for(image)
+            cached_image_id = self.image_id_cache.get(cache_key)
+            if cached_image_id:
+                self._log(f"Image ID taken from cache: {cached_image_id}")
+                return cached_image_id
+        
+        if self.image_preprocessor is not None:
+            prepared = self.image_preprocessor(image)
+            self._log(f"Image preprocessed: {len(image)} -> {len(prepared)} bytes")
+            image = prepared
+        
+        return self._call_with_retry(lambda: self._get_image_id(image, cache_key))
+
+    @staticmethod
+    def _cache_filters(page_size: int, projection: Optional[FieldProjection]) -> Dict[str, Any]:
+        filters: Dict[str, Any] = {"page_size": page_size}
+        if projection is not None:
+            filters.update(projection.cache_filters())
+        return filters
+
+    def _cached_search(self, cache_key: str, fetch: Callable[["Sync1688Session"], List[Dict]]) -> List[Dict]:
+        """Serve from result_cache, refreshing stale entries in background
+        
+        fetch(session) runs the search on this session on a miss, and on the
+        refresh session when a stale entry is refreshed.
+        """
+        cached = self.result_cache.get(cache_key)
+        if cached is not None:
+            products, is_fresh = cached
+            if self.offer_factory is not None:
+                # Entries loaded from the SQLite tier come back as plain items
+                products = [self._make_offer(item) if isinstance(item, dict) else item for item in products]
+            if not is_fresh:
+                self._schedule_refresh(cache_key, fetch)
+            self._log(f"Returning {len(products)} cached products ({'fresh' if is_fresh else 'stale'})")
+            return products
+        
+        # Failures raise Search1688Error, so an empty list is a real empty result
+        products = fetch(self)
+        self.result_cache.set(cache_key, products)
         return products
 
-    def _search_by_image_id_api(self, image_id: str) -> List[Dict]:
+    def _schedule_refresh(self, cache_key: str, fetch: Callable[["Sync1688Session"], List[Dict]]):
+        with self._refresh_lock:
+            if cache_key in self._refreshing:
+                return
+            self._refreshing.add(cache_key)
+            if self._refresh_executor is None:
+                # A single thread, so the refresh session is never used by two threads at once
+                self._refresh_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="search1688-refresh")
+            self._refresh_executor.submit(self._refresh, cache_key, fetch)
+
+    def _refresh(self, cache_key: str, fetch: Callable[["Sync1688Session"], List[Dict]]):
+        """Runs on the refresh thread: this session isn't thread-safe, and a pooled one
+        may already be serving another caller, so the search runs on a session of its own"""
+        try:
+            if self._refresh_session is None:
+                self._refresh_session = self._new_refresh_session()
+            self._refresh_session._ensure_initialized()
+            self.result_cache.set(cache_key, fetch(self._refresh_session))
+        except Exception as e:
+            self._log(f"Background cache refresh failed: {e}")
+        finally:
+            with self._refresh_lock:
+                self._refreshing.discard(cache_key)
+
+    def _new_refresh_session(self) -> "Sync1688Session":
+        """Separate identity with this session's settings and imageId cache, created on first refresh"""
+        session = type(self)(
+            debug=self.debug, image_id_cache=self.image_id_cache, warmup_ttl=self.warmup_ttl,
+            rate_limiter=self.rate_limiter, retry_policy=self.retry_policy, offer_factory=self.offer_factory,
+            fallback_max_bytes=self.fallback_max_bytes, image_preprocessor=self.image_preprocessor
+        )
+        session.proxies.update(self.proxies)
+        session.verify = self.verify
+        return session
+
+    def _close_refresh_session(self):
+        if self._refresh_session is not None:
+            self._refresh_session.close()
+            self._refresh_session = None
+
+    def search_by_text_iter(self, keywords: str, max_pages: Optional[int] = None,
+                            page_size: int = 60, fields: Optional[Iterable[str]] = None,
+                            exclude: Optional[Iterable[str]] = None) -> Iterator[List[Dict]]:
+        """Yield text search results page by page"""
+        projection = FieldProjection.create(fields, exclude)
+        self.last_error = None
+        self._ensure_initialized()
+        
+        if not self._get_search_page_cookies(keywords, "text"):
+            self._log("Cookie collection failed, paging without search page cookies")
+        
+        def fetch_page(page, session=None):
+            session = self if session is None else session
+            return session._call_with_retry(
+                lambda: session._get_text_offer_list(keywords, page, page_size, projection), keywords, "text"
+            )
+        
+        def fetch_page_cached(page):
+            cache_key = ResultCache.make_key("text", keywords, page, self._cache_filters(page_size, projection))
+            return self._cached_search(cache_key, lambda session: fetch_page(page, session))
+        
+        if self.result_cache is not None:
+            yield from self._iter_pages(fetch_page_cached, max_pages, page_size)
+            return
+        
+        yield from self._iter_pages(fetch_page, max_pages, page_size)
+
+    def search_by_image_iter(self, image_path: ImageSource, max_pages: Optional[int] = None,
+                             page_size: int = 60, fields: Optional[Iterable[str]] = None,
+                             exclude: Optional[Iterable[str]] = None) -> Iterator[List[Dict]]:
+        """Yield image search results page by page, uploading the image once (and only if a page isn't cached)"""
+        projection = FieldProjection.create(fields, exclude)
+        self.last_error = None
+        try:
+            self._ensure_initialized()
+            # Read once: the content is both the result cache key and what gets uploaded
+            image = read_image_bytes(image_path)
+            content_hash = ImageIdCache.key_for(image) if self.result_cache is not None else None
+        except Search1688Error as e:
+            self._search_failed(e)
+            return
+        
+        image_id = None
+        use_fallback = False
+        
+        def upload():
+            # Deferred to the first page fetch, so a fully cached search needs neither the upload nor the page GETs
+            nonlocal image_id, use_fallback
+            image_id = self._upload_image(image, content_hash)
+            if not self._get_search_page_cookies(image_id, "image"):
+                self._log("Cookie collection failed, using fallback method")
+                use_fallback = True
+        
+        def fetch_page(page):
+            if image_id is None:
+                upload()
+            if use_fallback:
+                # The fallback only returns the first page
+                if page > 1:
+                    return []
+                return self._call_with_retry(lambda: self._search_by_image_id_fallback(image_id, projection))
+            return self._call_with_retry(
+                lambda: self._get_offer_list(image_id, page, page_size, projection), image_id, "image"
+            )
+        
+        def refresh_page(session, page):
+            # The refresh session gets its own imageId (image_id_cache usually has it)
+            image_id = session._upload_image(image, content_hash)
+            return session._call_with_retry(
+                lambda: session._get_offer_list(image_id, page, page_size, projection), image_id, "image"
+            )
+        
+        def fetch_page_cached(page):
+            # Same key as search_by_image for page 1 with 60 offers
+            cache_key = ResultCache.make_key("image", content_hash, page, self._cache_filters(page_size, projection))
+            return self._cached_search(
+                cache_key, lambda session: fetch_page(page) if session is self else refresh_page(session, page)
+            )
+        
+        if self.result_cache is not None:
+            yield from self._iter_pages(fetch_page_cached, max_pages, page_size)
+            return
+        
+        yield from self._iter_pages(fetch_page, max_pages, page_size)
+
+    def _iter_pages(self, fetch_page: Callable[[int], List[Dict]], max_pages: Optional[int],
+                    page_size: int) -> Iterator[List[Dict]]:
+        """Page through fetch_page on the calling thread
+        
+        Pages aren't prefetched in a worker thread: the session isn't thread-safe,
+        and the loop body may use it (or hand it back to a pool) between pages.
+        """
+        page = 1
+        while True:
+            try:
+                products = fetch_page(page)
+            except Search1688Error as e:
+                self._search_failed(e)
+                return
+            
+            if not products:
+                return
+            yield products
+            
+            # A short page means there is nothing after it
+            if len(products) < page_size or (max_pages is not None and page >= max_pages):
+                return
+            page += 1
+
+    def _search_by_image_id_api(self, image_id: str, projection: Optional[FieldProjection] = None) -> List[Dict]:
         self._ensure_initialized()
         
         cookies_success = self._get_search_page_cookies(image_id, "image")
         
         if not cookies_success:
             self._log("Cookie collection failed, using fallback method")
-            return self._search_by_image_id_fallback(image_id)
+            return self._call_with_retry(lambda: self._search_by_image_id_fallback(image_id, projection))
         
-        products = self._get_offer_list(image_id)
-        return products
+        return self._call_with_retry(
+            lambda: self._get_offer_list(image_id, projection=projection), image_id, "image"
+        )
 
-    def _search_by_keywords_api(self, keywords: str) -> List[Dict]:
+    def _search_by_keywords_api(self, keywords: str, projection: Optional[FieldProjection] = None) -> List[Dict]:
         """Search products by keywords using API"""
         self._ensure_initialized()
         
@@ -368,238 +851,195 @@ class Sync1688Session(requests.Session):
         
         if not cookies_success:
             self._log("Cookie collection failed, using fallback method")
-            return self._search_by_keywords_fallback(keywords)
+            return self._search_by_keywords_fallback(keywords, projection)
         
-        products = self._get_text_offer_list(keywords)
-        return products
+        return self._call_with_retry(
+            lambda: self._get_text_offer_list(keywords, projection=projection), keywords, "text"
+        )
 
-    def _get_offer_list(self, image_id: str) -> List[Dict]:
+    def _get_offer_list(self, image_id: str, page: int = 1, page_size: int = 60,
+                        projection: Optional[FieldProjection] = None) -> List[Dict]:
+        params_data = {
+            "beginPage": page,
+            "pageSize": page_size,
+            "method": "imageOfferSearchService",
+            "searchScene": "pcImageSearch",
+            "appName": "pctusou",
+            "tab": "imageSearch",
+            "imageId": image_id,
+            "imageIdList": image_id,
+            "spm": "a26352.13672862.imagesearch.upload"
+        }
+        
+        request_data = {
+            "appId": 32517,
+            "params": codec.dumps(params_data)
+        }
+        
+        data_string = codec.dumps(request_data)
+        
+        self._ensure_token_fresh()
+        timestamp = str(int(time.time() * 1000))
+        
+        sign = generate_sign(self._signing_token_part(), timestamp, self.app_key, data_string)
+        
+        params = {
+            "jsv": "2.7.2",
+            "appKey": self.app_key,
+            "t": timestamp,
+            "sign": sign,
+            "api": "mtop.relationrecommend.wirelessrecommend.recommend",
+            "v": "2.0",
+            "type": "jsonp",
+            "dataType": "jsonp",
+            "timeout": "20000",
+            "jsonpIncPrefix": "reqTppId_32517_getOfferList",
+            "callback": f"mtopjsonpreqTppId_32517_getOfferList{int(time.time())}",
+            "data": data_string
+        }
+        
+        full_url = f"{self.base_url}?{urllib.parse.urlencode(params)}"
+        
+        cookies_str = '; '.join([f'{k}={v}' for k, v in self.cookies_dict.items()])
+        
+        headers = {
+            "authority": "h5api.m.1688.com",
+            "method": "GET",
+            "scheme": "https",
+            "accept": "*/*",
+            "accept-language": "ru-RU,ru;q=0.9,en-US;q=0.8,en;q=0.7",
+            "cookie": cookies_str,
+            "referer": f"https://pages-fast.1688.com/wow/cbu/srch_rec/image_search/youyuan/index.html?tab=imageSearch&imageId={image_id}&imageIdList={image_id}&spm=a26352.13672862.imagesearch.upload",
+            "sec-ch-ua": '"Chromium";v="142", "Google Chrome";v="142", "Not_A Brand";v="99"',
+            "sec-ch-ua-mobile": "?0",
+            "sec-ch-ua-platform": '"Windows"',
+            "sec-fetch-dest": "script",
+            "sec-fetch-mode": "no-cors",
+            "sec-fetch-site": "same-site",
+            "user-agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/142.0.0.0 Safari/537.36"
+        }
+        
         try:
-            params_data = {
-                "beginPage": 1,
-                "pageSize": 60,
-                "method": "imageOfferSearchService",
-                "searchScene": "pcImageSearch",
-                "appName": "pctusou",
-                "tab": "imageSearch",
-                "imageId": image_id,
-                "imageIdList": image_id,
-                "spm": "a26352.13672862.imagesearch.upload"
-            }
-            
-            request_data = {
-                "appId": 32517,
-                "params": json.dumps(params_data, ensure_ascii=False)
-            }
-            
-            data_string = json.dumps(request_data, ensure_ascii=False)
-            
-            timestamp = str(int(time.time() * 1000))
-            
-            # Use token for signing if available
-            if self._token_part:
-                sign = generate_sign(self._token_part, timestamp, self.app_key, data_string)
-            else:
-                # Try to get token from cookies
-                if '_m_h5_tk' in self.cookies_dict:
-                    token_from_cookies = self.cookies_dict['_m_h5_tk']
-                    token_part_from_cookies = token_from_cookies.split('_')[0] if '_' in token_from_cookies else token_from_cookies
-                    sign = generate_sign(token_part_from_cookies, timestamp, self.app_key, data_string)
-                else:
-                    sign = generate_sign("fallback", timestamp, self.app_key, data_string)
-            
-            params = {
-                "jsv": "2.7.2",
-                "appKey": self.app_key,
-                "t": timestamp,
-                "sign": sign,
-                "api": "mtop.relationrecommend.wirelessrecommend.recommend",
-                "v": "2.0",
-                "type": "jsonp",
-                "dataType": "jsonp",
-                "timeout": "20000",
-                "jsonpIncPrefix": "reqTppId_32517_getOfferList",
-                "callback": f"mtopjsonpreqTppId_32517_getOfferList{int(time.time())}",
-                "data": data_string
-            }
-            
-            full_url = f"{self.base_url}?{urllib.parse.urlencode(params)}"
-            
-            cookies_str = '; '.join([f'{k}={v}' for k, v in self.cookies_dict.items()])
-            
-            headers = {
-                "authority": "h5api.m.1688.com",
-                "method": "GET",
-                "scheme": "https",
-                "accept": "*/*",
-                "accept-language": "ru-RU,ru;q=0.9,en-US;q=0.8,en;q=0.7",
-                "cookie": cookies_str,
-                "referer": f"https://pages-fast.1688.com/wow/cbu/srch_rec/image_search/youyuan/index.html?tab=imageSearch&imageId={image_id}&imageIdList={image_id}&spm=a26352.13672862.imagesearch.upload",
-                "sec-ch-ua": '"Chromium";v="142", "Google Chrome";v="142", "Not_A Brand";v="99"',
-                "sec-ch-ua-mobile": "?0",
-                "sec-ch-ua-platform": '"Windows"',
-                "sec-fetch-dest": "script",
-                "sec-fetch-mode": "no-cors",
-                "sec-fetch-site": "same-site",
-                "user-agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/142.0.0.0 Safari/537.36"
-            }
-            
             response = self.get(
                 url=full_url,
                 headers=headers
             )
-            
-            if response.status_code == 200:
-                response_text = response.text
-                
-                if response_text:
-                    if response_text.startswith('mtopjsonp') or 'mtopjsonp' in response_text:
-                        json_start = response_text.find('{')
-                        json_end = response_text.rfind('}') + 1
-                        if json_start != -1 and json_end != -1:
-                            json_str = response_text[json_start:json_end]
-                            
-                            try:
-                                result = json.loads(json_str)
-                                
-                                # Check for API errors
-                                if 'ret' in result and not result.get('ret', ['SUCCESS'])[0].startswith('SUCCESS'):
-                                    self._log(f"API returned error: {result.get('ret')}")
-                                    return []
-                                
-                                products = self._parse_api_products(result)
-                                return products
-                                
-                            except json.JSONDecodeError as e:
-                                self._log(f"JSON decode error: {e}")
-                                return []
-                    else:
-                        self._log("Invalid JSONP response format")
-                        return []
-                else:
-                    self._log("Failed to decode response")
-                    return []
-            else:
-                self._log(f"Products request failed with status: {response.status_code}")
-                return []
-                
-        except Exception as e:
-            self._log(f"Products request error: {e}")
-            return []
+        except requests.RequestException as e:
+            raise NetworkError(f"Products request error: {e}") from e
+        
+        if response.status_code != 200:
+            raise self._status_error(response)
+        
+        result = decode_jsonp(response.content)
+        
+        # Check for API errors
+        error = ret_error(result.get('ret'))
+        if error is not None:
+            self._log(f"Products API returned error: {result.get('ret')}")
+            self._note_ret(result.get('ret'))
+            raise error
+        
+        products = self._parse_api_products(result, projection)
+        return products
 
-    def _get_text_offer_list(self, keywords: str) -> List[Dict]:
+    def _get_text_offer_list(self, keywords: str, page: int = 1, page_size: int = 60,
+                             projection: Optional[FieldProjection] = None) -> List[Dict]:
         """Get product list for text search using the correct API"""
+        # Form parameters as in call stack
+        params_data = {
+            "beginPage": page,
+            "pageSize": page_size,
+            "method": "getOfferList",
+            "pageId": "qWJOoeNkRwblv903Iv6KQqPVkYDrgMudKHTRsee9Sjz7N9z1",
+            "verticalProductFlag": "pcmarket",
+            "searchScene": "pcOfferSearch",
+            "charset": "GBK",
+            "spm": "a26352.b28411319/2508.searchbox.0",
+            "keywords": keywords
+        }
+        
+        request_data = {
+            "appId": 32517,
+            "params": codec.dumps(params_data)
+        }
+        
+        data_string = codec.dumps(request_data)
+        
+        self._ensure_token_fresh()
+        timestamp = str(int(time.time() * 1000))
+        
+        sign = generate_sign(self._signing_token_part(), timestamp, self.app_key, data_string)
+        
+        # Parameters as in call stack
+        params = {
+            "jsv": "2.7.4",
+            "appKey": self.app_key,
+            "t": timestamp,
+            "sign": sign,
+            "api": "mtop.relationrecommend.WirelessRecommend.recommend",
+            "v": "2.0",
+            "jsonpIncPrefix": "reqTppId_32517_getOfferList",
+            "excludeKeys": projection.exclude_keys if projection is not None else "",
+            "type": "jsonp",
+            "dataType": "jsonp",
+            "callback": f"mtopjsonpreqTppId_32517_getOfferList{int(time.time())}",
+            "data": data_string
+        }
+        
+        full_url = f"{self.base_url}?{urllib.parse.urlencode(params)}"
+        
+        cookies_str = '; '.join([f'{k}={v}' for k, v in self.cookies_dict.items()])
+        
+        headers = {
+            "authority": "h5api.m.1688.com",
+            "method": "GET",
+            "scheme": "https",
+            "accept": "*/*",
+            "accept-language": "ru-RU,ru;q=0.9,en-US;q=0.8,en;q=0.7",
+            "cookie": cookies_str,
+            "referer": f"https://s.1688.com/selloffer/offer_search.htm?keywords={urllib.parse.quote(keywords)}&spm=a26352.b28411319%2F2508.searchbox.0",
+            "sec-ch-ua": '"Chromium";v="142", "Google Chrome";v="142", "Not_A Brand";v="99"',
+            "sec-ch-ua-mobile": "?0",
+            "sec-ch-ua-platform": '"Windows"',
+            "sec-fetch-dest": "script",
+            "sec-fetch-mode": "no-cors",
+            "sec-fetch-site": "same-site",
+            "user-agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/142.0.0.0 Safari/537.36"
+        }
+        
         try:
-            # Form parameters as in call stack
-            params_data = {
-                "beginPage": 1,
-                "pageSize": 60,
-                "method": "getOfferList",
-                "pageId": "qWJOoeNkRwblv903Iv6KQqPVkYDrgMudKHTRsee9Sjz7N9z1",
-                "verticalProductFlag": "pcmarket",
-                "searchScene": "pcOfferSearch",
-                "charset": "GBK",
-                "spm": "a26352.b28411319/2508.searchbox.0",
-                "keywords": keywords
-            }
-            
-            request_data = {
-                "appId": 32517,
-                "params": json.dumps(params_data, ensure_ascii=False)
-            }
-            
-            data_string = json.dumps(request_data, ensure_ascii=False)
-            
-            timestamp = str(int(time.time() * 1000))
-            
-            # Use token for signing if available
-            if self._token_part:
-                sign = generate_sign(self._token_part, timestamp, self.app_key, data_string)
-            else:
-                sign = generate_sign("fallback", timestamp, self.app_key, data_string)
-            
-            # Parameters as in call stack
-            params = {
-                "jsv": "2.7.4",
-                "appKey": self.app_key,
-                "t": timestamp,
-                "sign": sign,
-                "api": "mtop.relationrecommend.WirelessRecommend.recommend",
-                "v": "2.0",
-                "jsonpIncPrefix": "reqTppId_32517_getOfferList",
-                "excludeKeys": "",
-                "type": "jsonp",
-                "dataType": "jsonp",
-                "callback": f"mtopjsonpreqTppId_32517_getOfferList{int(time.time())}",
-                "data": data_string
-            }
-            
-            full_url = f"{self.base_url}?{urllib.parse.urlencode(params)}"
-            
-            cookies_str = '; '.join([f'{k}={v}' for k, v in self.cookies_dict.items()])
-            
-            headers = {
-                "authority": "h5api.m.1688.com",
-                "method": "GET",
-                "scheme": "https",
-                "accept": "*/*",
-                "accept-language": "ru-RU,ru;q=0.9,en-US;q=0.8,en;q=0.7",
-                "cookie": cookies_str,
-                "referer": f"https://s.1688.com/selloffer/offer_search.htm?keywords={urllib.parse.quote(keywords)}&spm=a26352.b28411319%2F2508.searchbox.0",
-                "sec-ch-ua": '"Chromium";v="142", "Google Chrome";v="142", "Not_A Brand";v="99"',
-                "sec-ch-ua-mobile": "?0",
-                "sec-ch-ua-platform": '"Windows"',
-                "sec-fetch-dest": "script",
-                "sec-fetch-mode": "no-cors",
-                "sec-fetch-site": "same-site",
-                "user-agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/142.0.0.0 Safari/537.36"
-            }
-            
             response = self.get(
                 url=full_url,
                 headers=headers
             )
-            
-            if response.status_code == 200:
-                response_text = response.text
-                
-                if response_text:
-                    if response_text.startswith('mtopjsonp') or 'mtopjsonp' in response_text:
-                        json_start = response_text.find('{')
-                        json_end = response_text.rfind('}') + 1
-                        if json_start != -1 and json_end != -1:
-                            json_str = response_text[json_start:json_end]
-                            
-                            try:
-                                result = json.loads(json_str)
-                                
-                                # Check for API errors
-                                if 'ret' in result and not result.get('ret', ['SUCCESS'])[0].startswith('SUCCESS'):
-                                    self._log(f"Text search API returned error: {result.get('ret')}")
-                                    return []
-                                
-                                products = self._parse_api_products(result)
-                                self._log(f"Text search API found {len(products)} products")
-                                return products
-                                
-                            except json.JSONDecodeError as e:
-                                self._log(f"Text search JSON decode error: {e}")
-                                return []
-                    else:
-                        self._log("Invalid JSONP response format in text search")
-                        return []
-                else:
-                    self._log("Failed to decode text search response")
-                    return []
-            else:
-                self._log(f"Text search API request failed with status: {response.status_code}")
-                return []
-                
-        except Exception as e:
-            self._log(f"Text search API request error: {e}")
-            return []
+        except requests.RequestException as e:
+            raise NetworkError(f"Text search request error: {e}") from e
+        
+        if response.status_code != 200:
+            raise self._status_error(response)
+        
+        result = decode_jsonp(response.content)
+        
+        # Check for API errors
+        error = ret_error(result.get('ret'))
+        if error is not None:
+            self._log(f"Text search API returned error: {result.get('ret')}")
+            self._note_ret(result.get('ret'))
+            raise error
+        
+        products = self._parse_api_products(result, projection)
+        self._log(f"Text search API found {len(products)} products")
+        return products
 
-    def _parse_api_products(self, api_result: Dict) -> List[Dict]:
+    def _make_offer(self, item: Dict, projection: Optional[FieldProjection] = None) -> Any:
+        if projection is not None:
+            item = projection.apply(item)
+        if self.offer_factory is not None:
+            return self.offer_factory(item)
+        # Projected items are fresh dicts already
+        return item if projection is not None else dict(item)
+
+    def _parse_api_products(self, api_result: Dict, projection: Optional[FieldProjection] = None) -> List[Dict]:
         products = []
         
         try:
@@ -613,9 +1053,8 @@ class Sync1688Session(requests.Session):
             
             for item in items:
                 try:
-                    # Simply convert each item to Python dictionary
-                    product_dict = dict(item)
-                    products.append(product_dict)
+                    # Simply convert each item to Python dictionary unless a compact type is requested
+                    products.append(self._make_offer(item, projection))
                 except Exception as e:
                     self._log(f"Error parsing product item: {e}")
                     continue
@@ -625,44 +1064,58 @@ class Sync1688Session(requests.Session):
         
         return products
 
-    def _search_by_image_id_fallback(self, image_id: str) -> List[Dict]:
+    def _search_by_image_id_fallback(self, image_id: str, projection: Optional[FieldProjection] = None) -> List[Dict]:
+        search_url = "https://s.1688.com/youyuan/index.htm"
+        params = {
+            "tab": "imageSearch",
+            "imageId": image_id
+        }
+        
+        headers = {
+            "user-agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36",
+            "accept": "text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8",
+            "accept-language": "ru-RU,ru;q=0.9,en-US;q=0.8,en;q=0.7",
+            "referer": "https://s.1688.com/"
+        }
+        
         try:
-            search_url = "https://s.1688.com/youyuan/index.htm"
-            params = {
-                "tab": "imageSearch",
-                "imageId": image_id
-            }
-            
-            headers = {
-                "user-agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36",
-                "accept": "text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8",
-                "accept-language": "ru-RU,ru;q=0.9,en-US;q=0.8,en;q=0.7",
-                "referer": "https://s.1688.com/"
-            }
-            
             response = self.get(
                 url=search_url,
                 params=params,
-                headers=headers
+                headers=headers,
+                stream=True
             )
+        except requests.RequestException as e:
+            raise NetworkError(f"Fallback method request error: {e}") from e
+        
+        # Stop downloading as soon as the embedded offer data is complete
+        try:
+            if response.status_code != 200:
+                raise self._status_error(response)
             
-            if response.status_code == 200:
-                html_content = response.text
-                # Now extract_products_from_html returns dictionaries directly
-                products = extract_products_from_html(html_content)
-                self._log(f"Fallback method found {len(products)} products")
-                return products
-            else:
-                self._log(f"Fallback method HTTP error: {response.status_code}")
-                return []
-                
-        except Exception as e:
-            self._log(f"Fallback method error: {e}")
-            return []
+            scanner = OfferDataScanner(content_type_charset(response.headers.get('content-type')))
+            for chunk in response.iter_content(chunk_size=65536):
+                if scanner.feed(chunk):
+                    break
+                if scanner.bytes_read >= self.fallback_max_bytes:
+                    self._log(f"Fallback page exceeds {self.fallback_max_bytes} bytes, giving up")
+                    break
+        except requests.RequestException as e:
+            raise NetworkError(f"Fallback method request error: {e}") from e
+        finally:
+            response.close()
+        
+        offer_data = scanner.finish()
+        items = offers_from_offer_data(offer_data) if offer_data else []
+        products = [self._make_offer(item, projection) for item in items]
+        self._log(f"Fallback method found {len(products)} products after {scanner.bytes_read} bytes")
+        return products
 
-    def _search_by_keywords_fallback(self, keywords: str) -> List[Dict]:
+    def _search_by_keywords_fallback(self, keywords: str, projection: Optional[FieldProjection] = None) -> List[Dict]:
         """Fallback method for text search"""
-        return self._get_text_offer_list(keywords)
+        return self._call_with_retry(
+            lambda: self._get_text_offer_list(keywords, projection=projection), keywords, "text"
+        )
 
     @property
     def is_active(self):
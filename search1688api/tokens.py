@@ -0,0 +1,63 @@
+import time
+from typing import Optional
+
+from .utils import parse_token_expiry
+
+
+class TokenManager:
+    """Current _m_h5_tk signing token and its refresh schedule
+    
+    The token value ends with its expiry in milliseconds ("<token>_<ms>").
+    Sessions feed every _m_h5_tk they see into update(), so rotated tokens are
+    picked up from any response, and refresh it once needs_refresh() says
+    the token is within `refresh_margin` seconds of expiry. Failed refreshes
+    are retried no more often than every `retry_interval` seconds.
+    """
+
+    def __init__(self, refresh_margin: float = 120, retry_interval: float = 10):
+        self.refresh_margin = refresh_margin
+        self.retry_interval = retry_interval  # Minimum pause between refresh attempts
+        self.token: Optional[str] = None
+        self.expires_at: Optional[float] = None
+        self.rotations = 0
+        self._last_refresh_attempt = 0.0
+
+    @property
+    def token_part(self) -> Optional[str]:
+        return self.token.split('_')[0] if self.token else None
+
+    def update(self, token: Optional[str]) -> bool:
+        """Store new token value, returns True if it changed"""
+        if not token or token == self.token:
+            return False
+        
+        self.token = token
+        self.expires_at = parse_token_expiry(token)
+        self.rotations += 1
+        return True
+
+    def clear(self):
+        self.token = None
+        self.expires_at = None
+        self._last_refresh_attempt = 0.0
+
+    def expires_in(self) -> Optional[float]:
+        if self.expires_at is None:
+            return None
+        return self.expires_at - time.time()
+
+    def mark_refresh_attempt(self):
+        self._last_refresh_attempt = time.monotonic()
+
+    def needs_refresh(self) -> bool:
+        return self.refresh_delay() == 0
+
+    def refresh_delay(self) -> float:
+        """Seconds until the token should be refreshed"""
+        since_attempt = time.monotonic() - self._last_refresh_attempt
+        expires_in = self.expires_in()
+        
+        if expires_in is None:
+            # No usable token yet: retry once per margin, not before every request
+            return max(0.0, self.refresh_margin - since_attempt)
+        return max(0.0, expires_in - self.refresh_margin, self.retry_interval - since_attempt)
@@ -1,73 +1,185 @@
 import base64
+import os
+import re
 import time
 import hashlib
 import json
-from typing import Dict, List
+import urllib.parse
+from typing import BinaryIO, Dict, List, Optional, Tuple, Union
 
-def extract_products_from_html(html_content: str) -> List[Dict]:
-    products = []
-    
+from . import codec
+from .errors import (
+    ImageReadError, MtopError, TokenError, ThrottledError, ValidationError, BusinessError
+)
+
+STATE_VERSION = 1
+
+# mtop "ret" codes meaning the signing token or session is missing, stale or rejected
+TOKEN_ERROR_CODES = (
+    "FAIL_SYS_TOKEN_EXOIRED",
+    "FAIL_SYS_TOKEN_EMPTY",
+    "FAIL_SYS_TOKEN_ILLEGAL",
+    "FAIL_SYS_ILLEGAL_ACCESS",
+    "FAIL_SYS_SESSION_EXPIRED",
+)
+
+# mtop "ret" codes returned when anti-bot protection (slider/captcha) kicks in
+ANTI_BOT_CODES = (
+    "RGV587_ERROR",
+    "FAIL_SYS_USER_VALIDATE",
+)
+
+# mtop "ret" codes of flow control, the request may succeed after a pause
+THROTTLE_CODES = (
+    "FAIL_SYS_TRAFFIC_LIMIT",
+    "FAIL_SYS_FLOWLIMIT",
+    "FAIL_SYS_SERVICE_BUSY",
+    "FAIL_SYS_SYSTEM_BUSY",
+)
+
+# `offerresultData = {...}` or `offerresultData = successDataCheck({...})`, matched right after the marker
+OFFER_DATA_MARKER = "offerresultData"
+OFFER_DATA_ASSIGNMENT = re.compile(r'\s*=\s*(?:successDataCheck\s*\(\s*)?(?={)')
+
+# The object is followed by ")" (successDataCheck) or ";"
+OBJECT_CLOSE = re.compile(r'}\s*[);]')
+_CLOSE_ATTEMPTS = 3
+
+# JSON strings as whole tokens, brackets, and commas directly before a closing bracket
+_JSON_TOKEN = re.compile(r'"[^"\\]*(?:\\.[^"\\]*)*"|[{}\[\]]|,(?=\s*[}\]])')
+_TRAILING_COMMA = re.compile(r',(?=\s*[}\]])')
+
+_json_decoder = json.JSONDecoder()
+
+
+def strip_trailing_commas(text: str, start: int = 0) -> Optional[str]:
+    """The object starting at `start` without trailing commas, None if it isn't closed"""
+    depth = 0
+    pieces = []
+    last = start
+    for token in _JSON_TOKEN.finditer(text, start):
+        value = token.group()
+        if value == ",":
+            pieces.append(text[last:token.start()])
+            last = token.end()
+        elif value == "{" or value == "[":
+            depth += 1
+        elif value == "}" or value == "]":
+            depth -= 1
+            if depth == 0:
+                pieces.append(text[last:token.end()])
+                return "".join(pieces)
+    return None
+
+
+def _strip_commas_between(text: str, start: int, end: int) -> Optional[str]:
+    """text[start:end] without trailing commas, telling strings apart by quote parity
+
+    Only the commas themselves are visited, which is much faster than
+    tokenizing every string. None if the span has escaped backslashes,
+    which make `\\"` ambiguous to count.
+    """
+    if text.find("\\\\", start, end) != -1:
+        return None
+    pieces = []
+    last = counted = start
+    quotes = 0
+    for match in _TRAILING_COMMA.finditer(text, start, end):
+        position = match.start()
+        quotes += text.count('"', counted, position) - text.count('\\"', counted, position)
+        counted = position
+        if quotes % 2 == 0:
+            pieces.append(text[last:position])
+            last = position + 1
+    pieces.append(text[last:end])
+    return "".join(pieces)
+
+
+def _decode_repaired(text: str, start: int, end: Optional[int]):
+    # Where the object ends, if not given: the first few "})" / "};" after it
+    if end is not None:
+        ends = [end]
+    else:
+        ends = [match.start() + 1 for _, match in zip(range(_CLOSE_ATTEMPTS), OBJECT_CLOSE.finditer(text, start))]
+    for candidate in ends:
+        repaired = _strip_commas_between(text, start, candidate)
+        if repaired is None:
+            break
+        try:
+            return codec.loads(repaired)
+        except ValueError:
+            continue
+
+    # Escaped backslashes, or no usable end: follow the object token by token
+    repaired = strip_trailing_commas(text, start)
+    if repaired is None:
+        return None
     try:
-        patterns = [
-            r'window\.data\.offerresultData\s*=\s*successDataCheck\(\s*({.*?})\s*\)',
-            r'window\.data\.offerresultData\s*=\s*({.*?});',
-            r'offerresultData\s*=\s*successDataCheck\(\s*({.*?})\s*\)'
-        ]
-        
-        json_data = None
-        for pattern in patterns:
-            match = re.search(pattern, html_content, re.DOTALL)
-            if match:
-                try:
-                    json_str = match.group(1)
-                    json_str = re.sub(r',\s*]', ']', json_str)
-                    json_str = re.sub(r',\s*}', '}', json_str)
-                    data = json.loads(json_str)
-                    json_data = data
-                    break
-                except json.JSONDecodeError:
-                    continue
-        
-        if not json_data:
-            return products
-        
-        offer_list = []
-        
-        if "data" in json_data and "offerList" in json_data["data"]:
-            offer_list = json_data["data"]["offerList"]
-        elif "offerList" in json_data:
-            offer_list = json_data["offerList"]
-        else:
-            def find_offer_list(obj):
-                if isinstance(obj, dict):
-                    for key, value in obj.items():
-                        if key == "offerList" and isinstance(value, list):
-                            return value
-                        result = find_offer_list(value)
-                        if result is not None:
-                            return result
-                elif isinstance(obj, list):
-                    for item in obj:
-                        result = find_offer_list(item)
-                        if result is not None:
-                            return result
-                return None
-            
-            offer_list = find_offer_list(json_data) or []
-        
-        # Вместо создания объектов Product, сразу возвращаем словари
-        for offer_data in offer_list:
-            try:
-                # Просто добавляем сырые данные оффера как словарь
-                if isinstance(offer_data, dict):
-                    products.append(offer_data)
-            except Exception:
-                continue
-                
-    except Exception:
-        pass
+        return codec.loads(repaired)
+    except ValueError:
+        return None
+
+
+def decode_object_at(text: str, start: int, end: Optional[int] = None) -> Optional[Dict]:
+    """Parse the JSON object starting at `start` (and ending at `end`, if known)
+
+    Trailing commas are only repaired if strict parsing fails.
+    """
+    try:
+        data = _json_decoder.raw_decode(text, start)[0]
+    except json.JSONDecodeError:
+        data = _decode_repaired(text, start, end)
+    return data if isinstance(data, dict) else None
+
+
+def find_offer_data(html_content: str) -> Optional[Dict]:
+    """The offerresultData object embedded in a search page"""
+    position = html_content.find(OFFER_DATA_MARKER)
+    while position != -1:
+        position += len(OFFER_DATA_MARKER)
+        match = OFFER_DATA_ASSIGNMENT.match(html_content, position)
+        if match:
+            data = decode_object_at(html_content, match.end())
+            if data is not None:
+                return data
+        position = html_content.find(OFFER_DATA_MARKER, position)
+    return None
+
+
+def _find_offer_list(obj) -> Optional[List]:
+    if isinstance(obj, dict):
+        for key, value in obj.items():
+            if key == "offerList" and isinstance(value, list):
+                return value
+            result = _find_offer_list(value)
+            if result is not None:
+                return result
+    elif isinstance(obj, list):
+        for item in obj:
+            result = _find_offer_list(item)
+            if result is not None:
+                return result
+    return None
+
+
+def offers_from_offer_data(json_data: Dict) -> List[Dict]:
+    data = json_data.get("data")
+    if isinstance(data, dict) and "offerList" in data:
+        offer_list = data["offerList"]
+    elif "offerList" in json_data:
+        offer_list = json_data["offerList"]
+    else:
+        offer_list = _find_offer_list(json_data)
     
-    return products
+    # Offers are returned as the raw dictionaries
+    return [offer for offer in offer_list or () if isinstance(offer, dict)]
+
+
+def extract_products_from_html(html_content: str) -> List[Dict]:
+    json_data = find_offer_data(html_content) if html_content else None
+    if not json_data:
+        return []
+    return offers_from_offer_data(json_data)
 
 def prepare_image_request(image_b64: str) -> str:
     params_data = {
@@ -79,10 +191,42 @@ def prepare_image_request(image_b64: str) -> str:
     
     request_data = {
         "appId": 32517,
-        "params": json.dumps(params_data, ensure_ascii=False)
+        "params": codec.dumps(params_data)
     }
     
-    return json.dumps(request_data, ensure_ascii=False)
+    return codec.dumps(request_data)
+
+
+# The upload data string is this prefix, the base64 image and this suffix; base64 needs no JSON escaping
+_IMAGE_REQUEST_PREFIX, _IMAGE_REQUEST_SUFFIX = prepare_image_request("@IMAGE@").split("@IMAGE@")
+_IMAGE_FORM_PREFIX = ("data=" + urllib.parse.quote_plus(_IMAGE_REQUEST_PREFIX)).encode("ascii")
+_IMAGE_FORM_SUFFIX = urllib.parse.quote_plus(_IMAGE_REQUEST_SUFFIX).encode("ascii")
+
+# Image bytes base64-encoded at a time; a multiple of 3, so the encoded chunks simply concatenate
+UPLOAD_CHUNK_SIZE = 3 * 64 * 1024
+
+
+def build_image_upload(image_bytes: Union[bytes, memoryview], token_part: str, timestamp: str,
+                       app_key: str) -> Tuple[bytes, str]:
+    """Form body and sign of an image upload, built chunk by chunk
+
+    Equal to urlencoding {"data": prepare_image_request(...)} and signing
+    that data string, but without the full-size intermediate strings: each
+    base64 chunk is hashed and percent-encoded straight into the body.
+    """
+    if not token_part:
+        raise ValueError("Токен не установлен")
+    
+    md5 = hashlib.md5(f"{token_part}&{timestamp}&{app_key}&{_IMAGE_REQUEST_PREFIX}".encode("utf-8"))
+    parts = [_IMAGE_FORM_PREFIX]
+    view = memoryview(image_bytes)
+    for start in range(0, len(view), UPLOAD_CHUNK_SIZE):
+        chunk = base64.b64encode(view[start:start + UPLOAD_CHUNK_SIZE])
+        md5.update(chunk)
+        parts.append(chunk.replace(b"+", b"%2B").replace(b"/", b"%2F").replace(b"=", b"%3D"))
+    md5.update(_IMAGE_REQUEST_SUFFIX.encode("ascii"))
+    parts.append(_IMAGE_FORM_SUFFIX)
+    return b"".join(parts), md5.hexdigest()
 
 
 def generate_sign(token_part: str, timestamp: str, app_key: str, data_string: str) -> str:
@@ -94,10 +238,124 @@ def generate_sign(token_part: str, timestamp: str, app_key: str, data_string: st
     return md5_hash
 
 
-def read_and_encode_image(image_path: str) -> str:
+# A path, the image content, or a binary file object
+ImageSource = Union[str, "os.PathLike[str]", bytes, bytearray, memoryview, BinaryIO]
+
+
+def read_image_bytes(image: ImageSource) -> Union[bytes, memoryview]:
+    """Image content; bytes-like input is returned without copying, file objects are read from their position"""
     try:
-        with open(image_path, 'rb') as f:
-            image_b64 = base64.b64encode(f.read()).decode('utf-8')
-        return image_b64
+        if isinstance(image, bytes):
+            data = image
+        elif isinstance(image, (bytearray, memoryview)):
+            data = memoryview(image).cast("B")
+        elif hasattr(image, "read"):
+            data = image.read()
+            if not isinstance(data, bytes):
+                raise TypeError("image file object must be opened in binary mode")
+        else:
+            with open(image, 'rb') as f:
+                data = f.read()
     except Exception as e:
-        raise ValueError(f"Ошибка чтения файла: {e}")
\ No newline at end of file
+        raise ImageReadError(f"Ошибка чтения файла: {e}")
+    
+    if not len(data):
+        raise ImageReadError("Image is empty")
+    return data
+
+
+def image_label(image: ImageSource) -> str:
+    """Short description of an image source for log messages"""
+    if isinstance(image, (bytes, bytearray, memoryview)):
+        return f"<{memoryview(image).nbytes} bytes>"
+    if hasattr(image, "read"):
+        return repr(getattr(image, "name", image))
+    return repr(os.fspath(image)) if isinstance(image, (str, os.PathLike)) else repr(image)
+
+
+def read_and_encode_image(image: ImageSource) -> str:
+    """Base64 of an image; no longer used by the sessions, kept for backward compatibility"""
+    return base64.b64encode(read_image_bytes(image)).decode('utf-8')
+
+
+def is_token_error(ret) -> bool:
+    """Check whether mtop "ret" list reports a token problem"""
+    if not ret:
+        return False
+    return any(str(code).startswith(TOKEN_ERROR_CODES) for code in ret)
+
+
+def is_anti_bot_error(ret) -> bool:
+    """Check whether mtop "ret" list reports a slider/captcha challenge"""
+    if not ret:
+        return False
+    return any(str(code).startswith(ANTI_BOT_CODES) for code in ret)
+
+
+def is_throttle_error(ret) -> bool:
+    """Check whether mtop "ret" list reports flow control"""
+    if not ret:
+        return False
+    return any(str(code).startswith(THROTTLE_CODES) for code in ret)
+
+
+def ret_error(ret) -> Optional[MtopError]:
+    """Typed error for a failed mtop "ret", None if it reports SUCCESS"""
+    if not ret or str(ret[0]).startswith('SUCCESS'):
+        return None
+    if is_token_error(ret):
+        return TokenError(ret)
+    if is_throttle_error(ret):
+        return ThrottledError(ret)
+    if is_anti_bot_error(ret):
+        return ValidationError(ret)
+    return BusinessError(ret)
+
+
+def json_default(value):
+    """json.dumps fallback for compact product types such as Offer"""
+    if hasattr(value, "to_dict"):
+        return value.to_dict()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Retry-After header in seconds; HTTP-date form is ignored"""
+    try:
+        return max(0.0, float(value)) if value else None
+    except ValueError:
+        return None
+
+
+def is_throttled_response(status: int, url: str, location: Optional[str] = None) -> bool:
+    """HTTP 429 or a redirect to the anti-bot "punish" page"""
+    return status == 429 or 'punish' in str(url) or 'punish' in (location or '')
+
+
+def parse_token_expiry(token: Optional[str]) -> Optional[float]:
+    """Return expiry (unix seconds) embedded in _m_h5_tk value "<token>_<ms>" """
+    if not token or '_' not in token:
+        return None
+    try:
+        return int(token.rsplit('_', 1)[1]) / 1000
+    except ValueError:
+        return None
+
+
+def dump_session_state(path: str, state: Dict) -> None:
+    state = dict(state, version=STATE_VERSION)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(state, f, ensure_ascii=False)
+    os.replace(tmp_path, path)
+
+
+def load_session_state(path: str) -> Dict:
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            state = json.load(f)
+    except (OSError, json.JSONDecodeError) as e:
+        raise ValueError(f"Ошибка чтения состояния сессии: {e}")
+    if not isinstance(state, dict) or state.get("version") != STATE_VERSION:
+        raise ValueError("Неподдерживаемый формат состояния сессии")
+    return state
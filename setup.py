@@ -15,4 +15,15 @@ setup(
         "brotli>=1.0.9",
         "zstandard>=0.18.0",
     ],
+    entry_points={
+        "console_scripts": [
+            "search1688=search1688api.cli:main",
+        ],
+    },
+    extras_require={
+        "numpy": ["numpy>=1.17"],
+        "arrow": ["pyarrow>=8.0"],
+        "fast": ["orjson>=3.6"],
+        "image": ["Pillow>=8.0"],
+    },
 )
@@ -0,0 +1,104 @@
+"""Byte-for-byte equivalences the request signatures depend on, and chunk-split HTML scanning
+
+Upload bodies and data strings are signed, so a mismatch doesn't raise
+anywhere; the API just rejects the sign. These pin the fast paths to the
+straightforward ones they replace.
+"""
+import base64
+import json
+import random
+import unittest
+import urllib.parse
+
+from search1688api import codec
+from search1688api.htmlscan import OfferDataScanner
+from search1688api.utils import UPLOAD_CHUNK_SIZE, build_image_upload, generate_sign, prepare_image_request
+
+TOKEN, TIMESTAMP, APP_KEY = "0123456789abcdef0123456789abcdef", "1700000000000", "12574478"
+
+
+class BuildImageUploadTest(unittest.TestCase):
+    def assert_matches_urlencode(self, image: bytes):
+        data = prepare_image_request(base64.b64encode(image).decode("ascii"))
+        body, sign = build_image_upload(image, TOKEN, TIMESTAMP, APP_KEY)
+        self.assertEqual(body, urllib.parse.urlencode({"data": data}).encode("ascii"))
+        self.assertEqual(sign, generate_sign(TOKEN, TIMESTAMP, APP_KEY, data))
+
+    def test_sizes_around_chunk_boundaries(self):
+        rng = random.Random(1688)
+        for size in (1, 2, 3, 4, 1000, UPLOAD_CHUNK_SIZE - 1, UPLOAD_CHUNK_SIZE, UPLOAD_CHUNK_SIZE + 1,
+                     3 * UPLOAD_CHUNK_SIZE + 2):
+            with self.subTest(size=size):
+                self.assert_matches_urlencode(bytes(rng.getrandbits(8) for _ in range(size)))
+
+    def test_padding_plus_and_slash(self):
+        # base64 "+" and "/" and "=" padding all need percent-encoding
+        self.assert_matches_urlencode(b"\xfb\xff\xbf" * 1000 + b"\xff")
+
+    def test_memoryview(self):
+        image = bytes(range(256)) * 50
+        self.assertEqual(build_image_upload(memoryview(image), TOKEN, TIMESTAMP, APP_KEY),
+                         build_image_upload(image, TOKEN, TIMESTAMP, APP_KEY))
+
+
+class CodecDumpsTest(unittest.TestCase):
+    def test_matches_stdlib(self):
+        values = [
+            {"beginPage": 1, "pageSize": 60, "keywords": "手机壳 phone case", "charset": "GBK"},
+            {"keywords": "quote \" backslash \\ slash / tab \t newline \n nul \x00 del \x7f"},
+            {"keywords": "   emoji \U0001f600 lone surrogate \ud800"},
+            {"appId": 32517, "params": codec.dumps({"imageId": "1a2b", "flag": True, "none": None, "price": 1.5})},
+            {"nested": {"list": [1, "二", {"三": []}]}},
+        ]
+        for value in values:
+            with self.subTest(value=value):
+                self.assertEqual(codec.dumps(value), json.dumps(value, ensure_ascii=False))
+
+
+def search_page(body: str) -> str:
+    noise = '<script>init({"id": 1});</script><div>价格 })</div>\n' * 40
+    return noise + "<script>window.data.offerresultData = successDataCheck(" + body + ");</script>" + noise
+
+
+class OfferDataScannerTest(unittest.TestCase):
+    offers = [
+        {"id": i, "title": f"标题 {i} }}); x, \"q\" \\ end", "tags": [i, "a"], "price": i / 4}
+        for i in range(40)
+    ]
+    data = {"data": {"offerList": offers}, "empty": {}}
+
+    def scan(self, page: bytes, cuts, encoding: str = "utf-8"):
+        scanner = OfferDataScanner(encoding)
+        start = 0
+        for cut in list(cuts) + [len(page)]:
+            if scanner.feed(page[start:cut]):
+                break
+            start = cut
+        return scanner.finish()
+
+    def assert_every_split(self, body: str, encoding: str = "utf-8"):
+        page = search_page(body).encode(encoding)
+        rng = random.Random(len(page))
+        splits = [range(1, len(page)), range(7, len(page), 7), range(4096, len(page), 4096)]
+        splits += [sorted(rng.sample(range(1, len(page)), 50)) for _ in range(20)]
+        for cuts in splits:
+            self.assertEqual(self.scan(page, cuts, encoding), self.data)
+
+    def test_strict_json(self):
+        self.assert_every_split(json.dumps(self.data, ensure_ascii=False))
+
+    def test_trailing_commas(self):
+        body = json.dumps(self.data, ensure_ascii=False).replace('"a"]', '"a",]').replace("}]", "},]")
+        self.assertNotEqual(body, json.dumps(self.data, ensure_ascii=False))
+        self.assert_every_split(body)
+
+    def test_gbk(self):
+        self.assert_every_split(json.dumps(self.data, ensure_ascii=False), "gbk")
+
+    def test_missing_object(self):
+        page = search_page("").replace("offerresultData", "otherData").encode("utf-8")
+        self.assertIsNone(self.scan(page, range(100, len(page), 100)))
+
+
+if __name__ == "__main__":
+    unittest.main()